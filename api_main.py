@@ -1,13 +1,19 @@
-from fastapi import FastAPI, HTTPException, Header, Depends, Request
+from fastapi import FastAPI, HTTPException, Header, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from typing import Optional, List
 
 # Importaciones de tu app
-from app.database.connection import init_db
+from app.database.connection import init_db, close_pool, get_pool_stats, get_read_pool_stats, reporte_configuracion
+from app.database.group_commit import detener_escritor, get_group_commit_stats
+from app.database.query_log import get_query_stats
+from app.database.retry import get_retry_stats
+from app.database.backup import iniciar_respaldo_en_segundo_plano, obtener_estado, listar_respaldos
+from app.database.archive import archivar_ventas
+from app.services.version_service import VersionService
 from app.controllers.auth_controller import AuthController
 from app.controllers.inventario_controller import InventarioController
 from app.controllers.caja_controller import CajaController
@@ -29,6 +35,12 @@ app = FastAPI(
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+@app.on_event("shutdown")
+def cerrar_conexiones():
+    # Vaciamos la cola del escritor y cerramos las conexiones del pool
+    detener_escritor()
+    close_pool()
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -115,6 +127,12 @@ class VentaRequest(BaseModel):
     monto_pago: float
     referencia: Optional[str] = None    
 
+class VentaLoteRequest(BaseModel):
+    ventas: List[VentaRequest]
+
+class AnularVentaRequest(BaseModel):
+    motivo: Optional[str] = None
+
 # --- Modelos Cliente ---
 class ClienteCreate(BaseModel):
     nombre: str
@@ -127,6 +145,19 @@ class ClienteUpdate(BaseModel):
     email: Optional[str] = None
 
 
+# ============= LISTADOS CON ETAG =============
+
+def respuesta_versionada(request: Request, clave, tabla, generar):
+    # El JSON se serializa una vez por versión de la tabla; si el navegador ya
+    # tiene esa versión (If-None-Match) se responde 304 sin cuerpo
+    etag, cuerpo = VersionService.respuesta(clave, tabla, generar)
+    if etag is None: raise HTTPException(status_code=500, detail=cuerpo['message'])
+    # no-cache: el navegador guarda la respuesta pero la revalida en cada carga
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if VersionService.coincide(etag, request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cuerpo, media_type='application/json', headers=headers)
+
 # ============= ENDPOINTS DE AUTENTICACIÓN =============
 
 @app.post("/api/auth/login")
@@ -209,11 +240,30 @@ def agregar_producto(producto: ProductoCreate):
     return resultado
 
 @app.get("/api/inventario/productos")
-def listar_productos():
-    resultado = InventarioController.listar_productos()
+def listar_productos(request: Request):
+    return respuesta_versionada(request, 'productos', 'producto', InventarioController.listar_productos)
+
+@app.get("/api/inventario/productos/buscar")
+def buscar_productos(q: str = '', limite: int = Query(20, ge=1, le=100)):
+    # Va antes de /productos/{id}; prefijos sin acentos, los más relevantes primero
+    resultado = InventarioController.buscar_productos(q, limite)
     if not resultado['success']: raise HTTPException(status_code=500, detail=resultado['message'])
     return resultado
 
+@app.get("/api/inventario/productos/changes")
+def cambios_productos(since: int = Query(0, ge=0)):
+    # Sondeo de las terminales: solo lo cambiado después de `since` y la versión nueva
+    resultado = InventarioController.cambios_productos(since)
+    if not resultado['success']: raise HTTPException(status_code=400, detail=resultado['message'])
+    return resultado
+
+@app.get("/api/inventario/productos/barcode/{code}")
+def buscar_por_codigo_barras(code: str):
+    # Escaneo en el punto de venta: se resuelve con el mapa de códigos en memoria
+    resultado = InventarioController.buscar_por_codigo_barras(code)
+    if not resultado['success']: raise HTTPException(status_code=404, detail=resultado['message'])
+    return resultado
+
 @app.get("/api/inventario/productos/{id}")
 def buscar_producto(id: int):
     resultado = InventarioController.buscar_producto(id)
@@ -260,10 +310,8 @@ def agregar_proveedor(proveedor: ProveedorCreate):
     return resultado
 
 @app.get("/api/proveedores")
-def listar_proveedores():
-    resultado = ProveedorController.listar_proveedores()
-    if not resultado['success']: raise HTTPException(status_code=500, detail=resultado['message'])
-    return resultado
+def listar_proveedores(request: Request):
+    return respuesta_versionada(request, 'proveedores', 'proveedor', ProveedorController.listar_proveedores)
 
 @app.get("/api/proveedores/{id}")
 def buscar_proveedor(id: int):
@@ -314,24 +362,85 @@ def listar_cajas():
 # ============= ENDPOINTS DE VENTAS =============
 
 @app.post("/api/ventas")
-def realizar_venta(venta: VentaRequest):
+def realizar_venta(venta: VentaRequest, idempotency_key: Optional[str] = Header(None)):
     # Pasamos el objeto completo 'venta' para manejar los pagos
-    resultado = VentaController.realizar_venta(venta)
+    # Con el header Idempotency-Key un reintento devuelve la venta original
+    resultado = VentaController.realizar_venta(venta, idempotency_key)
+    if not resultado['success']: raise HTTPException(status_code=400, detail=resultado['message'])
+    return resultado
+
+@app.post("/api/ventas/batch")
+def realizar_ventas_lote(lote: VentaLoteRequest):
+    # Ventas encoladas por terminales sin conexión; la respuesta trae un resultado por venta
+    resultado = VentaController.realizar_ventas_lote(lote)
     if not resultado['success']: raise HTTPException(status_code=400, detail=resultado['message'])
     return resultado
 
 @app.get("/api/ventas")
-def listar_ventas():
-    resultado = VentaController.listar_ventas()
+def listar_ventas(desde: Optional[str] = None, hasta: Optional[str] = None,
+                  fk_caja: Optional[int] = None, fk_usuario: Optional[int] = None,
+                  fk_cliente: Optional[int] = None, metodo_pago: Optional[str] = None,
+                  limite: Optional[int] = Query(None, ge=1, le=500), antes_de: Optional[int] = None,
+                  include: Optional[str] = None, ids: Optional[str] = None):
+    if ids:
+        # ?ids=1,2,3: esas ventas con sus items (dos consultas en total)
+        try:
+            lista_ids = [int(i) for i in ids.split(',') if i.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids debe ser una lista de números separados por coma")
+        if len(lista_ids) > 500:
+            raise HTTPException(status_code=400, detail="Se pueden pedir hasta 500 ventas por consulta")
+        resultado = VentaController.obtener_ventas(lista_ids)
+        if not resultado['success']: raise HTTPException(status_code=500, detail=resultado['message'])
+        return resultado
+
+    # Con desde/hasta (YYYY-MM-DD) se incluyen las ventas archivadas de ese rango
+    # Paginación por cursor: la página siguiente se pide con antes_de=<siguiente>.
+    # Sin limite ni antes_de se devuelven todas las ventas, como antes de paginar;
+    # con antes_de y sin limite la página es de 50
+    if limite is None and antes_de is not None:
+        limite = 50
+    # ?include=items agrega el detalle de cada venta de la página
+    resultado = VentaController.listar_ventas(
+        desde, hasta, limite, antes_de,
+        fk_caja=fk_caja, fk_usuario=fk_usuario, fk_cliente=fk_cliente, metodo_pago=metodo_pago,
+        incluir_items='items' in (include or '').split(',')
+    )
     if not resultado['success']: raise HTTPException(status_code=500, detail=resultado['message'])
     return resultado
 
+@app.get("/api/ventas/exportar")
+def exportar_ventas(desde: Optional[str] = None, hasta: Optional[str] = None, formato: str = 'csv'):
+    # Libro de ventas línea por línea (cabecera, pago y producto), transmitido por lotes
+    resultado = VentaController.exportar_ventas(desde, hasta, formato)
+    if not resultado['success']: raise HTTPException(status_code=400, detail=resultado['message'])
+    media_type = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    nombre = f"ventas_{desde or 'inicio'}_{hasta or 'hoy'}.{formato}"
+    return StreamingResponse(resultado['contenido'], media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="{nombre}"'})
+
+@app.get("/api/ventas/resumen")
+def resumen_ventas(desde: Optional[str] = None, hasta: Optional[str] = None, agrupar: str = 'dia'):
+    # Lee la tabla resumen_ventas; agrupar admite dia, hora, fk_caja, fk_usuario,
+    # metodo_pago y fk_producto separados por coma (ej. ?agrupar=dia,metodo_pago)
+    columnas = [c.strip() for c in agrupar.split(',') if c.strip()]
+    resultado = VentaController.resumen_ventas(desde, hasta, columnas)
+    if not resultado['success']: raise HTTPException(status_code=400, detail=resultado['message'])
+    return resultado
+
 @app.get("/api/ventas/{id}")
 def obtener_venta(id: int):
     resultado = VentaController.obtener_venta(id)
     if not resultado['success']: raise HTTPException(status_code=404, detail=resultado['message'])
     return resultado
 
+@app.post("/api/ventas/{id}/anular")
+def anular_venta(id: int, request: Optional[AnularVentaRequest] = None):
+    # Devuelve el stock de todas las líneas y revierte los totales de la caja en un solo commit
+    resultado = VentaController.anular_venta(id, request.motivo if request else None)
+    if not resultado['success']: raise HTTPException(status_code=400, detail=resultado['message'])
+    return resultado
+
 # ============= ENDPOINTS DE CLIENTES =============
 
 @app.post("/api/clientes")
@@ -341,10 +450,8 @@ def agregar_cliente(cliente: ClienteCreate):
     return resultado
 
 @app.get("/api/clientes")
-def listar_clientes():
-    resultado = ClienteController.listar_clientes()
-    if not resultado['success']: raise HTTPException(status_code=500, detail=resultado['message'])
-    return resultado
+def listar_clientes(request: Request):
+    return respuesta_versionada(request, 'clientes', 'cliente', ClienteController.listar_clientes)
 
 @app.get("/api/clientes/{id}")
 def buscar_cliente(id: int):
@@ -437,6 +544,45 @@ async def historial_page(request: Request):
 async def pos_page(request: Request):
     return templates.TemplateResponse("ventas/pos.html", {"request": request})
 
+# ============= ENDPOINTS DE ADMINISTRACIÓN DE BASE DE DATOS =============
+
+@app.get("/api/admin/db/estadisticas")
+def estadisticas_db():
+    return {
+        'success': True,
+        'pool': get_pool_stats(),
+        'pool_lectura': get_read_pool_stats(),
+        'configuracion': reporte_configuracion(),
+        'group_commit': get_group_commit_stats(),
+        'reintentos': get_retry_stats()
+    }
+
+@app.get("/api/admin/db/consultas")
+def estadisticas_consultas(top: int = 20):
+    # Sentencias más costosas y últimas consultas lentas con su plan
+    return {'success': True, 'consultas': get_query_stats(top)}
+
+@app.post("/api/admin/db/respaldo")
+def crear_respaldo():
+    # El respaldo corre en segundo plano; el progreso se consulta con GET
+    try:
+        iniciar_respaldo_en_segundo_plano()
+        return {'success': True, 'message': 'Respaldo iniciado', 'estado': obtener_estado()}
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
+
+@app.get("/api/admin/db/respaldo")
+def estado_respaldo():
+    return {'success': True, 'estado': obtener_estado(), 'respaldos': listar_respaldos()}
+
+@app.post("/api/admin/db/archivar")
+def archivar_ventas_antiguas(meses: int = 12):
+    # Mueve a los archivos históricos las ventas de cajas cerradas con más de N meses
+    try:
+        return {'success': True, 'archivadas': archivar_ventas(meses)}
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
+
 @app.get("/health")
 def health_check():
     return {"status": "ok", "message": "API funcionando correctamente"}
@@ -24,10 +24,11 @@ class CajaController:
             # Por ahora usaremos el usuario 1 o el que estemos usando para pruebas.
             usuario_id = 1 
             
-            CajaService.cerrar_caja(monto_final, usuario_id)
+            conciliacion = CajaService.cerrar_caja(monto_final, usuario_id)
             return {
                 'success': True,
-                'message': 'Caja cerrada correctamente'
+                'message': 'Caja cerrada correctamente',
+                'data': conciliacion
             }
         except Exception as e:
             return {'success': False, 'message': str(e)}
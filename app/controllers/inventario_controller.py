@@ -71,6 +71,15 @@ class InventarioController:
                 'message': str(e)
             }
     
+    @staticmethod
+    def cambios_productos(desde):
+        """Productos cambiados desde una versión del catálogo"""
+        try:
+            cambios = InventarioService.cambios_productos(desde)
+            return {'success': True, **cambios}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
     @staticmethod
     def buscar_producto(id):
         """Busca un producto por ID"""
@@ -89,6 +98,26 @@ class InventarioController:
                 'message': str(e)
             }
     @staticmethod
+    def buscar_productos(texto, limite=20):
+        """Busca productos por nombre o código"""
+        try:
+            productos = InventarioService.buscar_productos(texto, limite)
+            return {'success': True, 'productos': productos}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def buscar_por_codigo_barras(codigo):
+        """Busca un producto por código de barras"""
+        try:
+            producto = InventarioService.buscar_por_codigo_barras(codigo)
+            if not producto:
+                return {'success': False, 'message': 'Producto no encontrado'}
+            return {'success': True, 'producto': producto}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
     def eliminar_producto(id):
         try:
             InventarioService.eliminar_producto(id)
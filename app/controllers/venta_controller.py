@@ -3,7 +3,7 @@ from app.services.venta_service import VentaService
 class VentaController:
     
     @staticmethod
-    def realizar_venta(venta_request): # Recibimos el objeto Pydantic completo
+    def realizar_venta(venta_request, clave_idempotencia=None): # Recibimos el objeto Pydantic completo
         try:
             # Obtenemos usuario (usamos 1 temporalmente o la logica de token futura)
             usuario_id = venta_request.fk_usuario if venta_request.fk_usuario else 1
@@ -14,7 +14,8 @@ class VentaController:
                 usuario_id,
                 venta_request.metodo_pago, # <---
                 venta_request.monto_pago,  # <---
-                venta_request.referencia   # <---
+                venta_request.referencia,  # <---
+                clave_idempotencia=clave_idempotencia
             )
             
             return {
@@ -28,9 +29,64 @@ class VentaController:
             return {'success': False, 'message': str(e)}
 
     @staticmethod
-    def listar_ventas():
+    def realizar_ventas_lote(lote_request):
         try:
-            ventas = VentaService.listar_ventas()
+            resultados = VentaService.realizar_ventas_lote(lote_request.ventas)
+            registradas = sum(1 for r in resultados if r['success'])
+            return {
+                'success': True,
+                'message': f'{registradas} de {len(resultados)} ventas registradas',
+                'registradas': registradas,
+                'rechazadas': len(resultados) - registradas,
+                'resultados': resultados
+            }
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def listar_ventas(desde=None, hasta=None, limite=None, antes_de=None,
+                      fk_caja=None, fk_usuario=None, fk_cliente=None, metodo_pago=None,
+                      incluir_items=False):
+        try:
+            ventas = VentaService.listar_ventas(
+                desde, hasta, limite, antes_de,
+                fk_caja=fk_caja, fk_usuario=fk_usuario, fk_cliente=fk_cliente, metodo_pago=metodo_pago,
+                incluir_items=incluir_items
+            )
+            # Cursor de la página siguiente (None si esta fue la última)
+            siguiente = ventas[-1]['id'] if limite and len(ventas) >= limite else None
+            return {'success': True, 'ventas': ventas, 'siguiente': siguiente}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def anular_venta(id, motivo=None):
+        try:
+            anulacion = VentaService.anular_venta(id, motivo)
+            return {'success': True, 'message': 'Venta anulada correctamente', 'anulacion': anulacion}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def exportar_ventas(desde=None, hasta=None, formato='csv'):
+        try:
+            contenido = VentaService.exportar_ventas(desde, hasta, formato)
+            return {'success': True, 'contenido': contenido}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def resumen_ventas(desde=None, hasta=None, agrupar=('dia',)):
+        try:
+            resumen = VentaService.resumen_ventas(desde, hasta, agrupar)
+            return {'success': True, 'resumen': resumen}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def obtener_ventas(ids):
+        try:
+            ventas = VentaService.obtener_ventas(ids)
             return {'success': True, 'ventas': ventas}
         except Exception as e:
             return {'success': False, 'message': str(e)}
@@ -0,0 +1,221 @@
+"""
+Archivo histórico de ventas
+Las ventas de cajas cerradas con más de N meses se mueven (venta y su
+detalle) a un archivo SQLite por año, así la base principal se mantiene
+pequeña y sus páginas quedan en caché. La tabla venta_archivo registra qué
+fechas e ids contiene cada archivo; las consultas de historial adjuntan
+(ATTACH) solo los archivos que cubren el rango pedido.
+
+Con la base principal en WAL, SQLite no garantiza que una transacción sea
+atómica entre ella y el archivo adjunto. Por eso cada período se mueve en dos
+transacciones: primero se confirma la copia en el archivo y después, sobre la
+base principal, se borran solo las ventas que ya están en el archivo (y se
+actualiza venta_archivo). Una caída entre las dos deja ventas duplicadas, nunca
+perdidas; la siguiente ejecución las borra (la copia usa INSERT OR IGNORE).
+
+Uso desde consola:
+    python -m app.database.archive [--meses N]
+"""
+import argparse
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.request import pathname2url
+from app.database import connection
+
+ARCHIVE_DIR = os.environ.get('DB_ARCHIVE_DIR', os.path.join(os.path.dirname(__file__), 'archivo'))
+ARCHIVE_MONTHS = int(os.environ.get('DB_ARCHIVE_MONTHS', '12'))
+# SQLite admite 10 bases adjuntas por conexión (SQLITE_MAX_ATTACHED)
+MAX_ADJUNTOS = 10
+TABLAS = ('venta', 'detalle_venta')
+
+
+def ruta_archivo(periodo, directorio=None):
+    return os.path.join(directorio or ARCHIVE_DIR, f'ventas-{periodo}.db')
+
+
+def _fecha_limite(meses, ahora):
+    mes = ahora.month - meses
+    anio = ahora.year + (mes - 1) // 12
+    mes = (mes - 1) % 12 + 1
+    return ahora.replace(year=anio, month=mes, day=min(ahora.day, 28)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _sincronizar_esquema(cursor, tabla):
+    """Crea la tabla en el archivo (o le agrega columnas nuevas) según la de la base principal"""
+    columnas = cursor.execute(f'PRAGMA main.table_info({tabla})').fetchall()
+    existentes = {c[1] for c in cursor.execute(f'PRAGMA archivo.table_info({tabla})').fetchall()}
+    if not existentes:
+        definicion = ', '.join(
+            f'{c[1]} INTEGER PRIMARY KEY' if c[5] else f'{c[1]} {c[2]}' for c in columnas
+        )
+        cursor.execute(f'CREATE TABLE archivo.{tabla} ({definicion})')
+    else:
+        for c in columnas:
+            if c[1] not in existentes:
+                cursor.execute(f'ALTER TABLE archivo.{tabla} ADD COLUMN {c[1]} {c[2]}')
+    return [c[1] for c in columnas]
+
+
+def _copiar_periodo(conn, cursor, periodo, limite):
+    """Primera transacción: copia las ventas del período al archivo"""
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        columnas = {tabla: _sincronizar_esquema(cursor, tabla) for tabla in TABLAS}
+        cursor.execute('CREATE INDEX IF NOT EXISTS archivo.idx_venta_fecha ON venta (fecha)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS archivo.idx_detalle_venta_venta ON detalle_venta (fk_venta)')
+
+        cursor.execute('DROP TABLE IF EXISTS temp.mover')
+        cursor.execute('''
+            CREATE TEMP TABLE mover AS
+            SELECT v.id FROM main.venta v
+            JOIN main.caja c ON c.id = v.fk_caja
+            WHERE c.estado = 'Cerrada' AND v.fecha < ? AND substr(v.fecha, 1, 4) = ?
+        ''', (limite, periodo))
+
+        lista = ', '.join(columnas['venta'])
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO archivo.venta ({lista})
+            SELECT {lista} FROM main.venta WHERE id IN (SELECT id FROM temp.mover)
+        ''')
+        lista = ', '.join(columnas['detalle_venta'])
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO archivo.detalle_venta ({lista})
+            SELECT {lista} FROM main.detalle_venta WHERE fk_venta IN (SELECT id FROM temp.mover)
+        ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _borrar_archivadas(conn, cursor, periodo, ruta):
+    """Segunda transacción: borra de la base principal lo que ya quedó en el archivo"""
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        copiadas = 'SELECT id FROM archivo.venta WHERE id IN (SELECT id FROM temp.mover)'
+        cursor.execute(f'DELETE FROM main.detalle_venta WHERE fk_venta IN ({copiadas})')
+        cursor.execute(f'DELETE FROM main.venta WHERE id IN ({copiadas})')
+        movidas = cursor.rowcount
+
+        cursor.execute('''
+            INSERT OR REPLACE INTO main.venta_archivo (periodo, archivo, fecha_desde, fecha_hasta, id_desde, id_hasta, ventas, actualizado)
+            SELECT ?, ?, MIN(fecha), MAX(fecha), MIN(id), MAX(id), COUNT(*), ? FROM archivo.venta
+            HAVING COUNT(*) > 0
+        ''', (periodo, os.path.basename(ruta), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return movidas
+
+
+def _mover_periodo(conn, periodo, limite, directorio):
+    ruta = ruta_archivo(periodo, directorio)
+    cursor = conn.cursor()
+    cursor.execute('ATTACH DATABASE ? AS archivo', (ruta,))
+    try:
+        _copiar_periodo(conn, cursor, periodo, limite)
+        return _borrar_archivadas(conn, cursor, periodo, ruta)
+    finally:
+        cursor.execute('DROP TABLE IF EXISTS temp.mover')
+        cursor.execute('DETACH DATABASE archivo')
+
+
+def archivar_ventas(meses=ARCHIVE_MONTHS, ahora=None, directorio=None, origen=None):
+    """
+    Mueve a los archivos por año las ventas de cajas cerradas anteriores a
+    `meses` meses. Devuelve {periodo: ventas movidas}.
+    """
+    limite = _fecha_limite(meses, ahora or datetime.now())
+    directorio = directorio or ARCHIVE_DIR
+    os.makedirs(directorio, exist_ok=True)
+
+    conn = sqlite3.connect(origen or connection.DB_PATH)
+    try:
+        connection.apply_profile(conn)
+        periodos = [r[0] for r in conn.execute('''
+            SELECT DISTINCT substr(v.fecha, 1, 4) FROM venta v
+            JOIN caja c ON c.id = v.fk_caja
+            WHERE c.estado = 'Cerrada' AND v.fecha < ?
+            ORDER BY 1
+        ''', (limite,)).fetchall()]
+
+        resultado = {}
+        for periodo in periodos:
+            resultado[periodo] = _mover_periodo(conn, periodo, limite, directorio)
+        return resultado
+    finally:
+        conn.close()
+
+
+def archivos_para_rango(cursor, desde=None, hasta=None, directorio=None):
+    """Archivos cuyo rango de fechas se cruza con [desde, hasta]"""
+    cursor.execute('''
+        SELECT periodo, archivo FROM venta_archivo
+        WHERE fecha_hasta >= ? AND fecha_desde <= ?
+        ORDER BY periodo
+    ''', (desde or '', hasta or '9999'))
+    return [(r[0], os.path.join(directorio or ARCHIVE_DIR, r[1])) for r in cursor.fetchall()]
+
+
+def archivos_para_id(cursor, id, directorio=None):
+    """Archivos que pueden contener la venta con ese id"""
+    cursor.execute('SELECT periodo, archivo FROM venta_archivo WHERE ? BETWEEN id_desde AND id_hasta', (id,))
+    return [(r[0], os.path.join(directorio or ARCHIVE_DIR, r[1])) for r in cursor.fetchall()]
+
+
+def columna_venta(cursor, esquema, columna, defecto='0'):
+    """Expresión para una columna de venta que un archivo anterior a su migración puede no tener"""
+    existentes = {c[1] for c in cursor.execute(f'PRAGMA {esquema}.table_info(venta)').fetchall()}
+    return f'v.{columna}' if columna in existentes else defecto
+
+
+@contextmanager
+def conexion_con_archivos(archivos):
+    """
+    Conexión de lectura con los archivos adjuntos como arch_<periodo>.
+    Se toma directamente del pool de lectura (ATTACH no se permite dentro de
+    una transacción) y los archivos se separan antes de devolverla.
+    """
+    if len(archivos) > MAX_ADJUNTOS:
+        raise Exception(f"El rango pedido abarca más de {MAX_ADJUNTOS} archivos históricos")
+    pool = connection.get_read_pool()
+    conn = connection.PooledConnection(pool, pool.acquire())
+    adjuntos = []
+    try:
+        for periodo, ruta in archivos:
+            alias = f'arch_{periodo}'
+            conn.execute(f'ATTACH DATABASE ? AS {alias}', ('file:%s?mode=ro' % pathname2url(ruta),))
+            adjuntos.append(alias)
+        yield conn, adjuntos
+    finally:
+        separada = True
+        for alias in adjuntos:
+            try:
+                conn.execute(f'DETACH DATABASE {alias}')
+            except sqlite3.Error:
+                separada = False
+        if separada:
+            conn.close()
+        else:
+            # Con un archivo todavía adjunto la conexión no vuelve al pool:
+            # el siguiente ATTACH con el mismo alias fallaría
+            conn.descartar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Archiva las ventas antiguas del minimercado')
+    parser.add_argument('--meses', type=int, default=ARCHIVE_MONTHS, help='Antigüedad mínima en meses')
+    parser.add_argument('--destino', default=ARCHIVE_DIR, help='Directorio de los archivos')
+    args = parser.parse_args(argv)
+    resultado = archivar_ventas(meses=args.meses, directorio=args.destino)
+    if not resultado:
+        print("No hay ventas para archivar")
+    for periodo, movidas in resultado.items():
+        print(f"Ventas archivadas en {periodo}: {movidas}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Respaldo en línea de minimercado.db
+Usa la API de backup de SQLite copiando un número acotado de páginas por paso
+y cediendo el procesador entre pasos, así la caja sigue vendiendo mientras se
+copia. La copia se toma de un snapshot de lectura (con WAL los escritores no
+se bloquean y el respaldo no se reinicia por las ventas que entran).
+Los respaldos se comprimen con gzip y se conservan los N más recientes.
+
+Las ventas movidas a los archivos históricos (archive.py) ya no están en la
+base principal: cada respaldo copia también los archivos que registra
+venta_archivo en su snapshot, en el directorio <respaldo>.archivo, y la
+rotación los elimina junto con su respaldo.
+
+Uso desde consola:
+    python -m app.database.backup [--destino DIR] [--paginas N] [--conservar N] [--sin-comprimir]
+"""
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.request import pathname2url
+from app.database import archive, connection
+
+BACKUP_DIR = os.environ.get('DB_BACKUP_DIR', os.path.join(os.path.dirname(__file__), 'respaldos'))
+BACKUP_PAGES_PER_STEP = int(os.environ.get('DB_BACKUP_PAGES', '256'))
+BACKUP_PAUSE_MS = float(os.environ.get('DB_BACKUP_PAUSE_MS', '5'))
+BACKUP_KEEP = int(os.environ.get('DB_BACKUP_KEEP', '7'))
+PREFIJO = 'minimercado-'
+SUFIJO_ARCHIVOS = '.archivo'
+
+_lock = threading.Lock()
+_estado = {
+    'en_curso': False,
+    'paginas_copiadas': 0,
+    'paginas_totales': 0,
+    'porcentaje': 0.0,
+    'inicio': None,
+    'fin': None,
+    'archivo': None,
+    'error': None,
+}
+
+
+def _actualizar_estado(**valores):
+    with _lock:
+        _estado.update(valores)
+
+
+def obtener_estado():
+    """Progreso del respaldo en curso (o resultado del último)"""
+    with _lock:
+        return dict(_estado)
+
+
+def listar_respaldos(destino=None):
+    """Respaldos existentes, del más reciente al más antiguo"""
+    destino = destino or BACKUP_DIR
+    if not os.path.isdir(destino):
+        return []
+    archivos = sorted(
+        (f for f in os.listdir(destino)
+         if f.startswith(PREFIJO) and os.path.isfile(os.path.join(destino, f))),
+        reverse=True
+    )
+    respaldos = []
+    for f in archivos:
+        historicos = directorio_archivos(destino, f)
+        respaldos.append({
+            'archivo': f,
+            'bytes': os.path.getsize(os.path.join(destino, f)),
+            'archivos_historicos': sorted(os.listdir(historicos)) if os.path.isdir(historicos) else [],
+        })
+    return respaldos
+
+
+def directorio_archivos(destino, archivo):
+    """Directorio con las copias de los archivos históricos de un respaldo"""
+    return os.path.join(destino, archivo.split('.db')[0] + SUFIJO_ARCHIVOS)
+
+
+def rotar_respaldos(destino=None, conservar=BACKUP_KEEP):
+    """Elimina los respaldos más antiguos dejando solo los `conservar` más recientes"""
+    destino = destino or BACKUP_DIR
+    eliminados = []
+    for info in listar_respaldos(destino)[conservar:]:
+        os.remove(os.path.join(destino, info['archivo']))
+        shutil.rmtree(directorio_archivos(destino, info['archivo']), ignore_errors=True)
+        eliminados.append(info['archivo'])
+    return eliminados
+
+
+def _comprimir_o_mover(temporal, final, comprimir):
+    """Deja la copia terminada en `final` (con .gz si se comprime)"""
+    if comprimir:
+        final += '.gz'
+        with open(temporal, 'rb') as f_in, gzip.open(final, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(temporal)
+    else:
+        os.replace(temporal, final)
+    return final
+
+
+def _respaldar_archivos(archivos, directorio, destino, comprimir):
+    """
+    Copia los archivos históricos con la API de backup (cada uno es una foto
+    consistente). Devuelve (copiados, faltantes).
+    """
+    copiados, faltantes = [], []
+    for archivo in archivos:
+        ruta = os.path.join(directorio, archivo)
+        if not os.path.exists(ruta):
+            faltantes.append(archivo)
+            continue
+        os.makedirs(destino, exist_ok=True)
+        temporal = os.path.join(destino, '.' + archivo + '.tmp')
+        src = sqlite3.connect('file:%s?mode=ro' % pathname2url(ruta), uri=True)
+        dst = sqlite3.connect(temporal)
+        try:
+            src.backup(dst)
+        finally:
+            src.close()
+            dst.close()
+        copiados.append(os.path.basename(_comprimir_o_mover(temporal, os.path.join(destino, archivo), comprimir)))
+    return copiados, faltantes
+
+
+def realizar_respaldo(destino=None, paginas=BACKUP_PAGES_PER_STEP, pausa_ms=BACKUP_PAUSE_MS,
+                      comprimir=True, conservar=BACKUP_KEEP, origen=None, directorio_historicos=None):
+    """
+    Copia la base de datos y sus archivos históricos a `destino` y devuelve
+    la información del respaldo. Solo puede haber un respaldo en curso a la vez.
+    """
+    destino = destino or BACKUP_DIR
+    origen = origen or connection.DB_PATH
+    directorio_historicos = directorio_historicos or archive.ARCHIVE_DIR
+    with _lock:
+        if _estado['en_curso']:
+            raise Exception("Ya hay un respaldo en curso")
+        _estado.update({
+            'en_curso': True, 'paginas_copiadas': 0, 'paginas_totales': 0, 'porcentaje': 0.0,
+            'inicio': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'fin': None,
+            'archivo': None, 'error': None,
+        })
+
+    os.makedirs(destino, exist_ok=True)
+    nombre = PREFIJO + datetime.now().strftime("%Y%m%d-%H%M%S-%f") + '.db'
+    temporal = os.path.join(destino, '.' + nombre + '.tmp')
+
+    def progreso(status, restantes, total):
+        copiadas = total - restantes
+        _actualizar_estado(
+            paginas_copiadas=copiadas, paginas_totales=total,
+            porcentaje=round(100.0 * copiadas / total, 2) if total else 100.0
+        )
+        # Cedemos el procesador entre pasos para no afectar a las ventas
+        if pausa_ms and restantes:
+            time.sleep(pausa_ms / 1000.0)
+
+    src = sqlite3.connect(origen)
+    dst = sqlite3.connect(temporal)
+    try:
+        # Snapshot de lectura: el respaldo ve una foto fija y no se reinicia
+        src.execute('BEGIN')
+        src.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        src.backup(dst, pages=paginas, progress=progreso)
+        # Archivos históricos que conoce esta foto de la base principal
+        try:
+            historicos = [r[0] for r in src.execute('SELECT archivo FROM venta_archivo ORDER BY periodo')]
+        except sqlite3.OperationalError:
+            historicos = []  # base anterior a la migración del archivo histórico
+        src.rollback()
+        dst.close()
+
+        final = _comprimir_o_mover(temporal, os.path.join(destino, nombre), comprimir)
+        # Se copian después de la foto: una venta archivada entre medio queda
+        # en los dos lados, nunca en ninguno
+        copiados, faltantes = _respaldar_archivos(
+            historicos, directorio_historicos, directorio_archivos(destino, nombre), comprimir
+        )
+
+        eliminados = rotar_respaldos(destino, conservar)
+        info = {
+            'archivo': os.path.basename(final),
+            'ruta': final,
+            'bytes': os.path.getsize(final),
+            'archivos_historicos': copiados,
+            'historicos_faltantes': faltantes,
+            'rotados': eliminados,
+        }
+        _actualizar_estado(archivo=info['archivo'], porcentaje=100.0)
+        return info
+    except Exception as e:
+        _actualizar_estado(error=str(e))
+        if os.path.exists(temporal):
+            dst.close()
+            os.remove(temporal)
+        raise
+    finally:
+        src.close()
+        dst.close()
+        _actualizar_estado(en_curso=False, fin=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def iniciar_respaldo_en_segundo_plano(**opciones):
+    """Lanza realizar_respaldo en un hilo y retorna de inmediato"""
+    if obtener_estado()['en_curso']:
+        raise Exception("Ya hay un respaldo en curso")
+
+    def ejecutar():
+        try:
+            realizar_respaldo(**opciones)
+        except Exception as e:
+            print(f"Error en el respaldo: {e}")
+
+    hilo = threading.Thread(target=ejecutar, name='respaldo-db', daemon=True)
+    hilo.start()
+    return hilo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Respaldo en línea de la base de datos del minimercado')
+    parser.add_argument('--destino', default=BACKUP_DIR, help='Directorio de los respaldos')
+    parser.add_argument('--paginas', type=int, default=BACKUP_PAGES_PER_STEP, help='Páginas copiadas por paso')
+    parser.add_argument('--pausa-ms', type=float, default=BACKUP_PAUSE_MS, help='Pausa entre pasos')
+    parser.add_argument('--conservar', type=int, default=BACKUP_KEEP, help='Respaldos a conservar')
+    parser.add_argument('--sin-comprimir', action='store_true', help='No comprimir con gzip')
+    args = parser.parse_args(argv)
+
+    info = realizar_respaldo(
+        destino=args.destino, paginas=args.paginas, pausa_ms=args.pausa_ms,
+        comprimir=not args.sin_comprimir, conservar=args.conservar
+    )
+    print(f"Respaldo creado: {info['ruta']} ({info['bytes']} bytes)")
+    for archivo in info['archivos_historicos']:
+        print(f"Archivo histórico respaldado: {archivo}")
+    for archivo in info['historicos_faltantes']:
+        print(f"Advertencia: no se encontró el archivo histórico {archivo}")
+    for archivo in info['rotados']:
+        print(f"Respaldo antiguo eliminado: {archivo}")
+
+
+if __name__ == '__main__':
+    main()
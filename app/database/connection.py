@@ -3,12 +3,550 @@ Conexión a base de datos SQLite
 """
 import sqlite3
 import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from app.database.migrations import run_migrations, verificar_codigo_barras_unico
+from app.database.query_log import InstrumentedCursor, instrumentar
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'minimercado.db')
 
+# Configuración del pool (se puede ajustar por variables de entorno)
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+# Pool separado de conexiones de solo lectura (historial, listados, reportes)
+READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', '8'))
+# Tamaño de la caché de sentencias preparadas de cada conexión
+STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE', '256'))
+
+# Perfiles de ajuste de SQLite. Se aplican a cada conexión que abre el pool.
+# - rendimiento: WAL (lecturas y escrituras no se bloquean entre sí), synchronous=NORMAL
+#   (seguro con WAL: solo se pierde la última transacción ante un corte de luz)
+# - seguro: WAL pero con fsync en cada commit
+# - basico: el comportamiento por defecto de SQLite (rollback journal)
+# cache_size negativo = KiB, mmap_size en bytes, busy_timeout en milisegundos
+PRAGMA_PROFILES = {
+    'rendimiento': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'seguro': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16384,
+        'mmap_size': 0,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'basico': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+}
+DB_PROFILE = os.environ.get('DB_PROFILE', 'rendimiento')
+# Espera de SQLite ante un bloqueo en las conexiones de escritura. Es corta a
+# propósito: todas las escrituras pasan por con_reintentos (retry.py), que
+# sigue reintentando con backoff y jitter hasta DB_RETRY_DEADLINE_MS. Con la
+# espera del perfil (5 s) un solo intento consumía todo el plazo.
+WRITE_BUSY_TIMEOUT_MS = int(os.environ.get('DB_WRITE_BUSY_TIMEOUT_MS', '200'))
+
+
+def apply_profile(conn, nombre=None, read_only=False):
+    """Aplica un perfil de PRAGMA a una conexión sqlite3"""
+    nombre = nombre or DB_PROFILE
+    if nombre not in PRAGMA_PROFILES:
+        raise Exception(f"Perfil de base de datos desconocido: '{nombre}'")
+    for pragma, valor in PRAGMA_PROFILES[nombre].items():
+        if read_only and pragma == 'journal_mode':
+            # El modo de journal es del archivo; lo fija el pool de escritura
+            continue
+        conn.execute(f'PRAGMA {pragma} = {valor}')
+
+
+class _ConnectionWrapper:
+    """Parte común de las conexiones que se entregan a los repositorios"""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._cursores = []
+
+    def cursor(self):
+        cursor = instrumentar(self._raw.cursor(), self._raw)
+        if isinstance(cursor, InstrumentedCursor):
+            self._cursores.append(cursor)
+        return cursor
+
+    def execute(self, sql, params=()):
+        cursor = self.cursor()
+        cursor.execute(sql, params)
+        return cursor
+
+    def executemany(self, sql, seq_of_params):
+        cursor = self.cursor()
+        cursor.executemany(sql, seq_of_params)
+        return cursor
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def _finalizar_cursores(self):
+        # Cierra la medición de las sentencias que quedaron sin agotar
+        cursores, self._cursores = self._cursores, []
+        for cursor in cursores:
+            cursor._finalizar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class PooledConnection(_ConnectionWrapper):
+    """
+    Envoltura de una conexión del pool.
+    Se comporta como sqlite3.Connection, pero close() la devuelve al pool
+    en lugar de cerrarla, así la siguiente petición la recibe "caliente".
+    """
+
+    def __init__(self, pool, raw):
+        super().__init__(raw)
+        self._pool = pool
+        self._returned = False
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        """Devuelve la conexión al pool (idempotente)"""
+        if not self._returned:
+            self._returned = True
+            self._finalizar_cursores()
+            self._pool.release(self._raw)
+
+    def descartar(self):
+        """Cierra la conexión y libera su cupo sin devolverla al pool"""
+        if not self._returned:
+            self._returned = True
+            self._finalizar_cursores()
+            self._pool._discard(self._raw)
+
+    def __del__(self):
+        # Red de seguridad: si un repositorio no llegó a cerrar la conexión
+        # (excepción antes del close), el cupo vuelve al pool igualmente
+        if not getattr(self, '_returned', True):
+            self._returned = True
+            self._pool.release(self._raw)
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones SQLite.
+    - Máximo `max_size` conexiones abiertas a la vez.
+    - Cada hilo reutiliza preferentemente la última conexión que usó.
+    - Si no hay conexiones libres se espera hasta `timeout` segundos.
+    """
+
+    def __init__(self, path, max_size=POOL_SIZE, timeout=POOL_TIMEOUT, profile=None, read_only=False):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.profile = profile or DB_PROFILE
+        self.read_only = read_only
+        self._idle = []          # conexiones libres (LIFO: la más reciente está más caliente)
+        self._owner = {}         # id(conexión) -> id del último hilo que la usó
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+        # RLock: una conexión puede devolverse desde __del__ mientras el hilo ya tiene el lock
+        self._cond = threading.Condition(threading.RLock())
+        self._stats = {
+            'adquisiciones': 0,
+            'reutilizadas_mismo_hilo': 0,
+            'creadas': 0,
+            'esperas': 0,
+            'tiempo_espera_total': 0.0,
+            'tiempo_espera_max': 0.0,
+            'timeouts': 0,
+        }
+
+    def _connect(self):
+        if self.read_only:
+            # mode=ro: la conexión no puede escribir ni tomar el bloqueo de escritura
+            conn = sqlite3.connect(
+                'file:%s?mode=ro' % pathname2url(self.path),
+                uri=True,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+        else:
+            conn = sqlite3.connect(
+                self.path,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+        try:
+            apply_profile(conn, self.profile, read_only=self.read_only)
+            if not self.read_only:
+                conn.execute(f'PRAGMA busy_timeout = {WRITE_BUSY_TIMEOUT_MS}')
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def acquire(self):
+        """Obtiene una conexión del pool (o crea una nueva si hay cupo)"""
+        thread_id = threading.get_ident()
+        inicio = time.perf_counter()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    # Preferimos la conexión que este mismo hilo usó por última vez
+                    for i in range(len(self._idle) - 1, -1, -1):
+                        if self._owner.get(id(self._idle[i])) == thread_id:
+                            raw = self._idle.pop(i)
+                            self._stats['reutilizadas_mismo_hilo'] += 1
+                            break
+                    else:
+                        raw = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    self._created += 1
+                    self._stats['creadas'] += 1
+                    raw = None
+                    break
+                waited = True
+                restante = self.timeout - (time.perf_counter() - inicio)
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    raise Exception("No hay conexiones disponibles en el pool de base de datos")
+                self._cond.wait(restante)
+
+            self._in_use += 1
+            self._stats['adquisiciones'] += 1
+            if waited:
+                espera = time.perf_counter() - inicio
+                self._stats['esperas'] += 1
+                self._stats['tiempo_espera_total'] += espera
+                self._stats['tiempo_espera_max'] = max(self._stats['tiempo_espera_max'], espera)
+
+        if raw is None:
+            # La conexión se abre fuera del lock para no bloquear a otros hilos
+            try:
+                raw = self._connect()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        self._owner[id(raw)] = thread_id
+        return raw
+
+    def release(self, raw):
+        """Devuelve una conexión al pool, descartando transacciones a medio terminar"""
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except sqlite3.Error:
+            # Conexión rota: se descarta y se libera su cupo
+            self._discard(raw)
+            return
+        if self._closed:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(raw)
+            self._cond.notify()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._owner.pop(id(raw), None)
+            self._created -= 1
+            self._in_use -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Cierra las conexiones libres (las que estén en uso se cierran al devolverse)"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for raw in idle:
+                self._owner.pop(id(raw), None)
+                self._created -= 1
+        for raw in idle:
+            raw.close()
+
+    def stats(self):
+        with self._cond:
+            data = dict(self._stats)
+            data.update({
+                'tamano_maximo': self.max_size,
+                'abiertas': self._created,
+                'en_uso': self._in_use,
+                'libres': len(self._idle),
+            })
+        if data['esperas']:
+            data['tiempo_espera_promedio'] = data['tiempo_espera_total'] / data['esperas']
+        else:
+            data['tiempo_espera_promedio'] = 0.0
+        return data
+
+
+class _TransactionConnection(_ConnectionWrapper):
+    """
+    Conexión entregada a los repositorios dentro de transaccion().
+    commit(), rollback() y close() no hacen nada: quien abrió la transacción
+    decide al final si se confirma o se revierte todo junto.
+    """
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self._finalizar_cursores()
+
+
+_pool = None
+_read_pool = None
+_pool_lock = threading.Lock()
+# Transacción (unidad de trabajo) activa en el hilo actual
+_local = threading.local()
+
+
+def get_pool():
+    """Devuelve el pool global (se crea en el primer uso)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def get_read_pool():
+    """Devuelve el pool de solo lectura (se crea en el primer uso)"""
+    global _read_pool
+    if _read_pool is None:
+        with _pool_lock:
+            if _read_pool is None:
+                _read_pool = ConnectionPool(DB_PATH, max_size=READ_POOL_SIZE, read_only=True)
+    return _read_pool
+
+
 def get_connection():
-    """Obtiene una conexión a la base de datos"""
-    return sqlite3.connect(DB_PATH)
+    """
+    Obtiene una conexión a la base de datos (reutilizada desde el pool).
+    Si el hilo está dentro de transaccion(), devuelve la conexión de esa
+    transacción para que todas las operaciones se confirmen juntas.
+    """
+    uow = getattr(_local, 'uow', None)
+    if uow is not None:
+        return _TransactionConnection(uow['raw'])
+    pool = get_pool()
+    return PooledConnection(pool, pool.acquire())
+
+
+def get_read_connection():
+    """
+    Obtiene una conexión de solo lectura para listados, búsquedas y reportes.
+    Con WAL estas lecturas nunca bloquean ni son bloqueadas por las ventas.
+    Dentro de transaccion() devuelve la conexión de la transacción (para leer
+    lo que ya se escribió) y dentro de lectura_consistente() la del snapshot.
+    """
+    uow = getattr(_local, 'uow', None)
+    if uow is not None:
+        return _TransactionConnection(uow['raw'])
+    snapshot = getattr(_local, 'snapshot', None)
+    if snapshot is not None:
+        return _TransactionConnection(snapshot)
+    pool = get_read_pool()
+    return PooledConnection(pool, pool.acquire())
+
+
+@contextmanager
+def lectura_consistente():
+    """
+    Todas las lecturas del bloque ven la misma foto de la base de datos,
+    aunque entre una consulta y otra se registren ventas:
+
+        with lectura_consistente():
+            ventas = VentaRepository.listar()
+            cajas = CajaRepository.listar_todas()
+    """
+    if getattr(_local, 'uow', None) is not None or getattr(_local, 'snapshot', None) is not None:
+        # Ya estamos dentro de una transacción o de otro snapshot
+        yield
+        return
+    pool = get_read_pool()
+    raw = pool.acquire()
+    try:
+        raw.execute('BEGIN')
+        # En WAL el snapshot se fija con la primera lectura
+        raw.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        _local.snapshot = raw
+        try:
+            yield
+        finally:
+            _local.snapshot = None
+            raw.rollback()
+    finally:
+        pool.release(raw)
+
+
+def en_transaccion():
+    """Indica si el hilo actual está dentro de transaccion()"""
+    return getattr(_local, 'uow', None) is not None
+
+
+@contextmanager
+def transaccion():
+    """
+    Unidad de trabajo: todas las llamadas a repositorios dentro del bloque
+    comparten una misma conexión y se confirman con un único commit al final.
+
+        with transaccion():
+            ProductoRepository.actualizar_stock(...)
+            VentaRepository.crear_venta(...)
+
+    Si el bloque lanza una excepción se revierte todo. Las transacciones
+    anidadas se implementan con SAVEPOINT, así un bloque interno puede fallar
+    sin deshacer el trabajo del bloque externo.
+    """
+    uow = getattr(_local, 'uow', None)
+    if uow is not None:
+        uow['depth'] += 1
+        nombre = 'sp_%d' % uow['depth']
+        raw = uow['raw']
+        pendientes = len(uow['al_confirmar'])
+        raw.execute('SAVEPOINT ' + nombre)
+        try:
+            yield
+        except BaseException:
+            raw.execute('ROLLBACK TO ' + nombre)
+            raw.execute('RELEASE ' + nombre)
+            # Lo registrado dentro del bloque revertido ya no se va a confirmar
+            del uow['al_confirmar'][pendientes:]
+            raise
+        else:
+            raw.execute('RELEASE ' + nombre)
+        finally:
+            uow['depth'] -= 1
+        return
+
+    pool = get_pool()
+    raw = pool.acquire()
+    try:
+        # IMMEDIATE toma el bloqueo de escritura al inicio, así las lecturas
+        # del bloque (stock, caja abierta) no quedan obsoletas antes de escribir
+        raw.execute('BEGIN IMMEDIATE')
+        _local.uow = {'raw': raw, 'depth': 0, 'al_confirmar': []}
+        try:
+            yield
+        except BaseException:
+            raw.rollback()
+            raise
+        else:
+            raw.commit()
+            pendientes = _local.uow['al_confirmar']
+        finally:
+            _local.uow = None
+    finally:
+        pool.release(raw)
+    for fn in pendientes:
+        fn()
+
+
+def al_confirmar(fn):
+    """
+    Ejecuta fn cuando lo escrito quede confirmado: al final de la transacción
+    abierta (no se ejecuta si se revierte) o en el momento si no hay ninguna.
+    Para cachés en memoria que deben reflejar solo datos ya guardados.
+    """
+    uow = getattr(_local, 'uow', None)
+    if uow is None:
+        fn()
+    else:
+        uow['al_confirmar'].append(fn)
+
+
+@contextmanager
+def conexion():
+    """
+    Context manager para usar una conexión del pool:
+
+        with conexion() as conn:
+            conn.execute(...)
+
+    Hace commit si el bloque termina bien, rollback si lanza una excepción,
+    y siempre devuelve la conexión al pool.
+    """
+    conn = get_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_pool_stats():
+    """Estadísticas del pool: tamaño, conexiones en uso y tiempos de espera"""
+    return get_pool().stats()
+
+
+def get_read_pool_stats():
+    """Estadísticas del pool de solo lectura"""
+    return get_read_pool().stats()
+
+
+def reporte_configuracion():
+    """Valores efectivos de los PRAGMA en una conexión del pool"""
+    conn = get_connection()
+    try:
+        reporte = {'perfil': get_pool().profile, 'ruta': DB_PATH}
+        for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size',
+                       'temp_store', 'busy_timeout'):
+            reporte[pragma] = conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+        return reporte
+    finally:
+        conn.close()
+
+
+def close_pool():
+    """Cierra las conexiones libres de los pools (por ejemplo al apagar la API)"""
+    global _pool, _read_pool
+    with _pool_lock:
+        pools = [_pool, _read_pool]
+        _pool = _read_pool = None
+    for pool in pools:
+        if pool is not None:
+            pool.close_all()
 
 def init_db():
     """Inicializa las tablas de la base de datos"""
@@ -113,5 +651,17 @@ def init_db():
     ''')
     
     conn.commit()
+
+    # Migraciones versionadas (índices, columnas nuevas, etc.)
+    run_migrations(conn)
+    verificar_codigo_barras_unico(conn)
     conn.close()
-    print("Base de datos inicializada correctamente")
\ No newline at end of file
+    print("Base de datos inicializada correctamente")
+
+    # Reporte de arranque: confirma que el nodo realmente corre con el perfil esperado
+    reporte = reporte_configuracion()
+    sync = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}.get(reporte['synchronous'], reporte['synchronous'])
+    temp = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}.get(reporte['temp_store'], reporte['temp_store'])
+    print(f"Perfil SQLite '{reporte['perfil']}': journal_mode={reporte['journal_mode']}, "
+          f"synchronous={sync}, cache_size={reporte['cache_size']}, mmap_size={reporte['mmap_size']}, "
+          f"temp_store={temp}, busy_timeout={reporte['busy_timeout']}ms")
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Escritor único con commit agrupado (group commit)
+Las transacciones de venta se encolan y un hilo dedicado las ejecuta en lotes:
+todo lo que llega dentro de una ventana de pocos milisegundos se confirma con
+un solo COMMIT. Cada trabajo corre en su propio SAVEPOINT, así un error solo
+deshace ese trabajo y cada llamador recibe su propio resultado o excepción.
+
+Se activa con la variable de entorno DB_GROUP_COMMIT=1.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from app.database.connection import transaccion, en_transaccion
+from app.database.retry import con_reintentos
+
+GROUP_COMMIT_ENABLED = os.environ.get('DB_GROUP_COMMIT', '0') == '1'
+# Tiempo que se espera para juntar más trabajos en el mismo lote
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get('DB_GROUP_COMMIT_WINDOW_MS', '3'))
+GROUP_COMMIT_MAX_BATCH = int(os.environ.get('DB_GROUP_COMMIT_MAX_BATCH', '128'))
+
+
+class GroupCommitWriter:
+    """Hilo escritor que agrupa varias transacciones en un solo commit"""
+
+    def __init__(self, ventana_ms=GROUP_COMMIT_WINDOW_MS, max_lote=GROUP_COMMIT_MAX_BATCH):
+        self.ventana = ventana_ms / 1000.0
+        self.max_lote = max_lote
+        self._cola = queue.Queue()
+        self._detenido = False
+        self._lock = threading.Lock()
+        self._stats = {'lotes': 0, 'trabajos': 0, 'errores': 0, 'lote_max': 0, 'commits_fallidos': 0}
+        self._hilo = threading.Thread(target=self._loop, name='group-commit-writer', daemon=True)
+        self._hilo.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Encola fn(*args, **kwargs) y espera a que su lote se confirme"""
+        if threading.current_thread() is self._hilo:
+            # Llamada reentrante desde un trabajo: ya estamos dentro del lote
+            return fn(*args, **kwargs)
+        futuro = Future()
+        # Bajo el mismo lock que stop(): ningún trabajo queda detrás de la señal de parada
+        with self._lock:
+            if self._detenido:
+                raise Exception("El escritor de la base de datos está detenido")
+            self._cola.put((futuro, fn, args, kwargs))
+        return futuro.result()
+
+    def stop(self, timeout=5):
+        """Detiene el hilo después de procesar lo que ya está en la cola"""
+        with self._lock:
+            if not self._detenido:
+                self._detenido = True
+                self._cola.put(None)
+        self._hilo.join(timeout=timeout)
+        if self._hilo.is_alive():
+            # El lote en curso no terminó a tiempo: lo que sigue en la cola no
+            # se va a ejecutar; el hilo sale al terminar ese lote
+            self._rechazar_pendientes()
+            self._cola.put(None)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+        data['promedio_por_lote'] = data['trabajos'] / data['lotes'] if data['lotes'] else 0.0
+        data['en_cola'] = self._cola.qsize()
+        return data
+
+    def _recolectar(self):
+        """Espera el primer trabajo y junta los que lleguen dentro de la ventana"""
+        primero = self._cola.get()
+        if primero is None:
+            return None
+        lote = [primero]
+        limite = time.perf_counter() + self.ventana
+        while len(lote) < self.max_lote:
+            restante = limite - time.perf_counter()
+            try:
+                trabajo = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if trabajo is None:
+                # Señal de parada: se procesa el lote actual y luego se sale
+                self._cola.put(None)
+                break
+            lote.append(trabajo)
+        return lote
+
+    def _loop(self):
+        try:
+            while True:
+                lote = self._recolectar()
+                if lote is None:
+                    return
+                self._ejecutar_lote(lote)
+        finally:
+            self._rechazar_pendientes()
+
+    def _rechazar_pendientes(self):
+        """Responde con error a los trabajos que quedaron en la cola sin ejecutar"""
+        while True:
+            try:
+                trabajo = self._cola.get_nowait()
+            except queue.Empty:
+                return
+            if trabajo is not None and not trabajo[0].done():
+                trabajo[0].set_exception(Exception("El escritor de la base de datos está detenido"))
+
+    def _ejecutar_trabajos(self, lote):
+        resultados = []
+        with transaccion():
+            for futuro, fn, args, kwargs in lote:
+                try:
+                    with transaccion():  # SAVEPOINT por trabajo
+                        resultados.append((futuro, fn(*args, **kwargs), None))
+                except Exception as e:
+                    resultados.append((futuro, None, e))
+        return resultados
+
+    def _ejecutar_lote(self, lote):
+        try:
+            # Si el BEGIN/COMMIT encuentra la base bloqueada se repite el lote completo
+            resultados = con_reintentos(self._ejecutar_trabajos, lote)
+        except Exception as e:
+            # Falló el BEGIN o el COMMIT: ningún trabajo del lote quedó guardado
+            with self._lock:
+                self._stats['commits_fallidos'] += 1
+            for futuro, fn, args, kwargs in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        errores = 0
+        for futuro, resultado, error in resultados:
+            if error is not None:
+                errores += 1
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(resultado)
+        with self._lock:
+            self._stats['lotes'] += 1
+            self._stats['trabajos'] += len(lote)
+            self._stats['errores'] += errores
+            self._stats['lote_max'] = max(self._stats['lote_max'], len(lote))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Devuelve el escritor global (el hilo se inicia en el primer uso)"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter()
+    return _writer
+
+
+def ejecutar_escritura(fn, *args, **kwargs):
+    """
+    Ejecuta fn como una transacción de escritura.
+    Con DB_GROUP_COMMIT=1 se envía al escritor único; si no, se ejecuta en el
+    hilo actual dentro de transaccion(), repitiéndola completa si la base
+    está bloqueada. Si ya hay una transacción abierta, fn se ejecuta dentro
+    de ella (como SAVEPOINT).
+    """
+    if en_transaccion():
+        with transaccion():
+            return fn(*args, **kwargs)
+    if GROUP_COMMIT_ENABLED:
+        return get_writer().submit(fn, *args, **kwargs)
+    return con_reintentos(_en_transaccion, fn, args, kwargs)
+
+
+def _en_transaccion(fn, args, kwargs):
+    with transaccion():
+        return fn(*args, **kwargs)
+
+
+def get_group_commit_stats():
+    """Estadísticas del escritor (None si no se está usando)"""
+    if _writer is None:
+        return None
+    return _writer.stats()
+
+
+def detener_escritor():
+    """Detiene el escritor global si está corriendo"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
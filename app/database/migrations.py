@@ -0,0 +1,322 @@
+"""
+Migraciones versionadas del esquema
+La versión aplicada se guarda en PRAGMA user_version de la base de datos.
+Cada migración se aplica en su propia transacción y en orden ascendente.
+"""
+import logging
+import sqlite3
+
+logger = logging.getLogger('app.database.migrations')
+
+
+def _resumen_ventas(cursor):
+    # Import diferido: resumen depende de connection, que importa este módulo
+    from app.database.resumen import poblar
+    poblar(cursor)
+
+
+def _anulacion_ventas(cursor):
+    # ALTER TABLE ADD COLUMN no admite IF NOT EXISTS
+    existentes = {c[1] for c in cursor.execute('PRAGMA table_info(venta)').fetchall()}
+    for columna, definicion in (
+        ('anulada', 'INTEGER NOT NULL DEFAULT 0'),
+        ('fecha_anulacion', 'TEXT'),
+        ('motivo_anulacion', 'TEXT'),
+    ):
+        if columna not in existentes:
+            cursor.execute(f'ALTER TABLE venta ADD COLUMN {columna} {definicion}')
+
+
+def _codigo_barras_unico(cursor):
+    # Un código vacío equivale a no tener código (y no debe chocar con el índice único)
+    cursor.execute("UPDATE producto SET codigo_barras = NULL WHERE TRIM(codigo_barras) = ''")
+    repetidos = [r[0] for r in cursor.execute('''
+        SELECT codigo_barras FROM producto
+        WHERE activo = 1 AND codigo_barras IS NOT NULL
+        GROUP BY codigo_barras HAVING COUNT(*) > 1
+    ''').fetchall()]
+    if repetidos:
+        # No se borran datos: verificar_codigo_barras_unico lo vuelve a
+        # intentar en cada arranque hasta que los repetidos se corrijan
+        logger.warning(
+            "Códigos de barras repetidos entre productos activos, falta el índice único: %s",
+            ', '.join(repetidos)
+        )
+        return repetidos
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_producto_codigo_barras_activo
+        ON producto (codigo_barras) WHERE activo = 1 AND codigo_barras IS NOT NULL
+    ''')
+    return []
+
+
+def verificar_codigo_barras_unico(conn):
+    """
+    Crea el índice único de códigos de barras si la migración 8 no pudo
+    crearlo (había códigos repetidos). Devuelve los códigos que siguen repetidos.
+    """
+    if get_version(conn) < 8:
+        return []
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_producto_codigo_barras_activo'"
+    ).fetchone()
+    if existe:
+        return []
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        repetidos = _codigo_barras_unico(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return repetidos
+
+
+def _busqueda_productos(cursor):
+    # Índice de texto completo con contenido externo (la tabla producto):
+    # sin acentos, sin mayúsculas y con prefijos de 2 y 3 letras precalculados
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS producto_fts USING fts5(
+                nombre, codigo_barras,
+                content='producto', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sin FTS5: ProductoRepository.buscar usa LIKE
+        print(f"Advertencia: búsqueda de texto completo no disponible ({e})")
+        return
+    # Solo nombre y código disparan la sincronización (no el stock de cada venta)
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS producto_fts_ai AFTER INSERT ON producto BEGIN
+            INSERT INTO producto_fts (rowid, nombre, codigo_barras) VALUES (new.id, new.nombre, new.codigo_barras);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS producto_fts_ad AFTER DELETE ON producto BEGIN
+            INSERT INTO producto_fts (producto_fts, rowid, nombre, codigo_barras) VALUES ('delete', old.id, old.nombre, old.codigo_barras);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS producto_fts_au AFTER UPDATE OF nombre, codigo_barras ON producto BEGIN
+            INSERT INTO producto_fts (producto_fts, rowid, nombre, codigo_barras) VALUES ('delete', old.id, old.nombre, old.codigo_barras);
+            INSERT INTO producto_fts (rowid, nombre, codigo_barras) VALUES (new.id, new.nombre, new.codigo_barras);
+        END
+    ''')
+    cursor.execute("INSERT INTO producto_fts (producto_fts) VALUES ('rebuild')")
+
+
+# Tablas de catálogo cuyos listados se cachean por versión (ETag)
+TABLAS_VERSIONADAS = ('producto', 'proveedor', 'cliente')
+
+
+def _versiones_catalogo(cursor):
+    # Cada escritura en la tabla (incluido el stock de cada venta) suma 1 a su versión
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tabla_version (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for tabla in TABLAS_VERSIONADAS:
+        cursor.execute('INSERT OR IGNORE INTO tabla_version (tabla, version) VALUES (?, 1)', (tabla,))
+        for sufijo, evento in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {tabla}_version_{sufijo} AFTER {evento} ON {tabla} BEGIN
+                    UPDATE tabla_version SET version = version + 1 WHERE tabla = '{tabla}';
+                END
+            ''')
+
+
+def _version_productos(cursor):
+    # Versión de cambio por producto: la versión del catálogo de su última escritura
+    existentes = {c[1] for c in cursor.execute('PRAGMA table_info(producto)').fetchall()}
+    if 'version' not in existentes:
+        cursor.execute('ALTER TABLE producto ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+        UPDATE producto SET version = (SELECT version FROM tabla_version WHERE tabla = 'producto')
+        WHERE version = 0
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_producto_version ON producto (version)')
+    # Toda escritura que no fija la versión (altas, ediciones, bajas, stock de
+    # cada venta o anulación) la toma del contador de la migración 10. El UPDATE
+    # interno vuelve a sumar en tabla_version: la versión de la fila nunca
+    # supera al contador y las escrituras siguientes quedan por encima.
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS producto_cambio_ai AFTER INSERT ON producto BEGIN
+            UPDATE producto SET version = (SELECT version + 1 FROM tabla_version WHERE tabla = 'producto')
+            WHERE id = new.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS producto_cambio_au AFTER UPDATE ON producto
+        WHEN new.version = old.version BEGIN
+            UPDATE producto SET version = (SELECT version + 1 FROM tabla_version WHERE tabla = 'producto')
+            WHERE id = new.id;
+        END
+    ''')
+
+
+def _version_productos_una_escritura(cursor):
+    # Con los triggers de las migraciones 10 y 11 cada escritura de producto
+    # (también el stock de cada línea de venta) sumaba dos veces al contador
+    # y reescribía la fila para fijar su versión. Ahora un solo trigger por
+    # evento suma una vez y fija la versión solo si la sentencia no la trajo
+    # (el descuento de stock de la venta la fija en el mismo UPDATE).
+    for trigger in ('producto_version_ai', 'producto_version_au', 'producto_cambio_ai', 'producto_cambio_au'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    # UPDATE OF sin la columna version: fijar la versión no vuelve a disparar
+    # el trigger. Una migración que agregue columnas a producto debe recrearlo.
+    columnas = [c[1] for c in cursor.execute('PRAGMA table_info(producto)').fetchall() if c[1] != 'version']
+    cursor.execute('''
+        CREATE TRIGGER producto_cambio_ai AFTER INSERT ON producto BEGIN
+            UPDATE tabla_version SET version = version + 1 WHERE tabla = 'producto';
+            UPDATE producto SET version = (SELECT version FROM tabla_version WHERE tabla = 'producto')
+            WHERE id = new.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER producto_cambio_au AFTER UPDATE OF {', '.join(columnas)} ON producto BEGIN
+            UPDATE tabla_version SET version = version + 1 WHERE tabla = 'producto';
+            UPDATE producto SET version = (SELECT version FROM tabla_version WHERE tabla = 'producto')
+            WHERE id = new.id AND new.version = old.version;
+        END
+    ''')
+
+
+# Cada migración es (versión, descripción, pasos). Un paso puede ser una
+# sentencia SQL o una función que recibe el cursor (para lógica condicional).
+# IMPORTANTE: nunca modificar una migración ya publicada; agregar una nueva.
+MIGRATIONS = [
+    (1, 'Índices para las consultas frecuentes', [
+        # Caja abierta del usuario: se consulta en cada venta
+        'CREATE INDEX IF NOT EXISTS idx_caja_usuario_estado ON caja (fk_usuario, estado)',
+        # Detalle de una venta (VentaRepository.obtener_por_id)
+        'CREATE INDEX IF NOT EXISTS idx_detalle_venta_venta ON detalle_venta (fk_venta)',
+        # Historial de ventas por fecha y por caja
+        'CREATE INDEX IF NOT EXISTS idx_venta_fecha ON venta (fecha)',
+        'CREATE INDEX IF NOT EXISTS idx_venta_caja ON venta (fk_caja)',
+        # Búsqueda por código de barras
+        'CREATE INDEX IF NOT EXISTS idx_producto_codigo_barras ON producto (codigo_barras)',
+        # Login y validación de usuarios activos
+        'CREATE INDEX IF NOT EXISTS idx_usuario_username_activo ON usuario (username, activo)',
+        # Estadísticas para que el planificador elija los índices nuevos
+        'ANALYZE',
+    ]),
+    (2, 'Registro de archivos históricos de ventas', [
+        # Un archivo SQLite por período (año) con las ventas movidas fuera de la base principal
+        '''CREATE TABLE IF NOT EXISTS venta_archivo (
+            periodo TEXT PRIMARY KEY,
+            archivo TEXT NOT NULL,
+            fecha_desde TEXT NOT NULL,
+            fecha_hasta TEXT NOT NULL,
+            id_desde INTEGER NOT NULL,
+            id_hasta INTEGER NOT NULL,
+            ventas INTEGER NOT NULL DEFAULT 0,
+            actualizado TEXT
+        )''',
+    ]),
+    (3, 'Claves de idempotencia de ventas', [
+        # Respuesta original de cada POST /api/ventas con Idempotency-Key
+        '''CREATE TABLE IF NOT EXISTS idempotencia (
+            clave TEXT PRIMARY KEY,
+            huella TEXT NOT NULL,
+            respuesta TEXT NOT NULL,
+            creado REAL NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_idempotencia_creado ON idempotencia (creado)',
+    ]),
+    (4, 'Índices para los filtros del historial de ventas', [
+        # Cada índice de una columna incluye el rowid (venta.id), así el
+        # filtro por igualdad ya sale ordenado por id para la paginación
+        'CREATE INDEX IF NOT EXISTS idx_venta_usuario ON venta (fk_usuario)',
+        'CREATE INDEX IF NOT EXISTS idx_venta_cliente ON venta (fk_cliente)',
+        'CREATE INDEX IF NOT EXISTS idx_venta_metodo_pago ON venta (metodo_pago)',
+        'ANALYZE',
+    ]),
+    (5, 'Resumen de ventas por día, hora, caja, usuario, método de pago y producto', [
+        # Se crea y se carga con las ventas existentes; desde aquí lo mantiene crear_venta
+        _resumen_ventas,
+    ]),
+    (6, 'Totales acumulados por caja y método de pago', [
+        # Lo mantiene crear_venta; la conciliación de la caja no recorre sus ventas
+        '''CREATE TABLE IF NOT EXISTS caja_totales (
+            fk_caja INTEGER NOT NULL,
+            metodo_pago TEXT NOT NULL,
+            ventas INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            recibido REAL NOT NULL DEFAULT 0,
+            cambio REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (fk_caja, metodo_pago)
+        ) WITHOUT ROWID''',
+        '''INSERT INTO caja_totales (fk_caja, metodo_pago, ventas, total, recibido, cambio)
+            SELECT fk_caja, IFNULL(metodo_pago, ''), COUNT(*), SUM(total),
+                   SUM(IFNULL(monto_pago, total)), SUM(IFNULL(cambio, 0))
+            FROM venta WHERE fk_caja IS NOT NULL
+            GROUP BY 1, 2''',
+    ]),
+    (7, 'Anulación de ventas', [
+        _anulacion_ventas,
+    ]),
+    (8, 'Código de barras único entre los productos activos', [
+        _codigo_barras_unico,
+    ]),
+    (9, 'Búsqueda de productos por texto completo (FTS5)', [
+        _busqueda_productos,
+    ]),
+    (10, 'Versión por tabla de catálogo para ETag', [
+        _versiones_catalogo,
+    ]),
+    (11, 'Versión de cambio por producto para sincronizar terminales', [
+        _version_productos,
+    ]),
+    (12, 'Índice parcial de productos con stock bajo', [
+        # Solo contiene los productos en alerta: la consulta lo recorre sin
+        # leer el catálogo (misma condición que obtener_productos_bajo_stock)
+        'CREATE INDEX IF NOT EXISTS idx_producto_bajo_stock ON producto (id) WHERE stock <= stock_minimo AND activo = 1',
+        'ANALYZE',
+    ]),
+    (13, 'Una sola escritura de versión por cambio de producto', [
+        _version_productos_una_escritura,
+    ]),
+]
+
+
+def get_version(conn):
+    """Versión de esquema aplicada en la base de datos"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def run_migrations(conn, migrations=None):
+    """
+    Aplica las migraciones pendientes sobre la conexión dada.
+    Devuelve la lista de versiones aplicadas en esta ejecución.
+    """
+    migrations = sorted(migrations if migrations is not None else MIGRATIONS, key=lambda m: m[0])
+    actual = get_version(conn)
+    aplicadas = []
+
+    for version, descripcion, pasos in migrations:
+        if version <= actual:
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for paso in pasos:
+                if callable(paso):
+                    paso(cursor)
+                else:
+                    cursor.execute(paso)
+            # PRAGMA no admite parámetros; version es un entero controlado por nosotros
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Error aplicando la migración {version} ({descripcion}): {e}")
+        print(f"Migración {version} aplicada: {descripcion}")
+        aplicadas.append(version)
+        actual = version
+
+    return aplicadas
@@ -0,0 +1,241 @@
+"""
+Instrumentación de consultas (slow query log)
+Los cursores entregados por get_connection / get_read_connection miden cada
+sentencia (tiempo de execute + fetch, filas). Las que superan el umbral se
+registran en el log junto con el método de repositorio que las originó y su
+EXPLAIN QUERY PLAN, marcando los recorridos completos de tabla (SCAN). El
+origen se busca en la pila solo para esas (y la primera vez que aparece cada
+sentencia), así medir las consultas rápidas cuesta poco.
+
+Variables de entorno:
+- DB_QUERY_LOG=0 desactiva la instrumentación
+- DB_SLOW_QUERY_MS umbral en milisegundos (por defecto 50)
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+QUERY_LOG_ENABLED = os.environ.get('DB_QUERY_LOG', '1') == '1'
+SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', '50'))
+# Máximo de sentencias distintas con estadísticas (evita crecer sin límite)
+MAX_STATEMENTS = 500
+
+logger = logging.getLogger('app.database.slow_query')
+
+_lock = threading.Lock()
+_stats = {}
+_lentas = deque(maxlen=100)
+_planes = {}
+# Métodos de las envolturas de conexión: no cuentan como origen de la sentencia
+_ENVOLTURAS = ('_ConnectionWrapper.', 'PooledConnection.', '_TransactionConnection.')
+
+
+def _normalizar(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def _origen():
+    """Busca en la pila el método de repositorio (o, si no hay, la función de app) que ejecutó la sentencia"""
+    frame = sys._getframe(2)
+    respaldo = None
+    while frame is not None:
+        modulo = frame.f_globals.get('__name__', '')
+        code = frame.f_code
+        nombre = getattr(code, 'co_qualname', code.co_name)
+        if modulo.startswith('app.repositories'):
+            return nombre
+        if (respaldo is None and modulo.startswith('app.') and modulo != __name__
+                and not nombre.startswith(_ENVOLTURAS)):
+            respaldo = nombre
+        frame = frame.f_back
+    return respaldo or 'desconocido'
+
+
+def _explicar(raw_conn, sql, params):
+    """EXPLAIN QUERY PLAN de la sentencia (se cachea por SQL)"""
+    with _lock:
+        plan = _planes.get(sql)
+    if plan is not None:
+        return plan
+    try:
+        filas = raw_conn.execute('EXPLAIN QUERY PLAN ' + sql, params or ()).fetchall()
+        plan = [f[3] for f in filas]
+    except Exception as e:
+        plan = [f'(no se pudo obtener el plan: {e})']
+    with _lock:
+        if len(_planes) < MAX_STATEMENTS:
+            _planes.setdefault(sql, plan)
+    return plan
+
+
+def _registrar(raw_conn, sql, params, duracion_ms, filas):
+    clave = _normalizar(sql)
+    lenta = duracion_ms >= SLOW_QUERY_MS and not sql.lstrip().upper().startswith(
+        ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA', 'EXPLAIN')
+    )
+    # Recorrer la pila cuesta: el origen solo se busca para las consultas
+    # lentas y la primera vez que aparece cada sentencia en las estadísticas
+    with _lock:
+        nueva = clave not in _stats and len(_stats) < MAX_STATEMENTS
+    origen = _origen() if lenta or nueva else None
+    with _lock:
+        stat = _stats.get(clave)
+        if stat is None and len(_stats) < MAX_STATEMENTS:
+            stat = _stats[clave] = {
+                'origen': origen or 'desconocido',
+                'ejecuciones': 0, 'tiempo_total_ms': 0.0, 'tiempo_max_ms': 0.0, 'filas': 0,
+            }
+        if stat is not None:
+            stat['ejecuciones'] += 1
+            stat['tiempo_total_ms'] += duracion_ms
+            stat['tiempo_max_ms'] = max(stat['tiempo_max_ms'], duracion_ms)
+            stat['filas'] += max(filas, 0)
+
+    if not lenta:
+        return
+
+    plan = _explicar(raw_conn, sql, params)
+    scan_completo = any(p.startswith('SCAN') and 'USING' not in p for p in plan)
+    registro = {
+        'origen': origen,
+        'sql': clave,
+        'duracion_ms': round(duracion_ms, 3),
+        'filas': filas,
+        'plan': plan,
+        'scan_completo': scan_completo,
+        'momento': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with _lock:
+        _lentas.append(registro)
+    logger.warning(
+        "Consulta lenta (%.1f ms, %d filas) en %s%s: %s | plan: %s",
+        duracion_ms, filas, origen, ' [SCAN COMPLETO]' if scan_completo else '',
+        registro['sql'], ' / '.join(plan)
+    )
+
+
+class InstrumentedCursor:
+    """
+    Envoltura de sqlite3.Cursor que mide cada sentencia.
+    La medición se cierra al ejecutar la siguiente sentencia, al agotar los
+    resultados o al cerrar la conexión que entregó el cursor.
+    """
+
+    def __init__(self, raw_cursor, raw_conn):
+        self._cursor = raw_cursor
+        self._conn = raw_conn
+        self._pendiente = None
+
+    # --- medición ---
+    def _iniciar(self, sql, params, inicio):
+        self._pendiente = {
+            'sql': sql, 'params': params,
+            'duracion': time.perf_counter() - inicio, 'filas': 0,
+            'es_consulta': self._cursor.description is not None,
+        }
+
+    def _finalizar(self):
+        p = self._pendiente
+        if p is None:
+            return
+        self._pendiente = None
+        # SELECT: filas leídas; INSERT/UPDATE/DELETE: filas afectadas
+        filas = p['filas'] if p['es_consulta'] else self._cursor.rowcount
+        _registrar(self._conn, p['sql'], p['params'], p['duracion'] * 1000.0, filas)
+
+    def _sumar_fetch(self, inicio, filas):
+        if self._pendiente is not None:
+            self._pendiente['duracion'] += time.perf_counter() - inicio
+            self._pendiente['filas'] += filas
+
+    # --- API de sqlite3.Cursor ---
+    def execute(self, sql, params=()):
+        self._finalizar()
+        inicio = time.perf_counter()
+        self._cursor.execute(sql, params)
+        self._iniciar(sql, params, inicio)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._finalizar()
+        seq_of_params = list(seq_of_params)
+        inicio = time.perf_counter()
+        self._cursor.executemany(sql, seq_of_params)
+        self._iniciar(sql, seq_of_params[0] if seq_of_params else (), inicio)
+        return self
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._sumar_fetch(inicio, 1 if row is not None else 0)
+        if row is None:
+            self._finalizar()
+        return row
+
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._sumar_fetch(inicio, len(rows))
+        if not rows:
+            self._finalizar()
+        return rows
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._sumar_fetch(inicio, len(rows))
+        self._finalizar()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finalizar()
+        self._cursor.close()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+
+def instrumentar(raw_cursor, raw_conn):
+    """Devuelve el cursor instrumentado (o el original si el log está desactivado)"""
+    if not QUERY_LOG_ENABLED:
+        return raw_cursor
+    return InstrumentedCursor(raw_cursor, raw_conn)
+
+
+def get_query_stats(top=20):
+    """Sentencias ordenadas por tiempo total, más las últimas consultas lentas"""
+    with _lock:
+        items = [
+            dict(sql=sql, **stat, tiempo_promedio_ms=stat['tiempo_total_ms'] / stat['ejecuciones'])
+            for sql, stat in _stats.items()
+        ]
+        lentas = list(_lentas)
+    items.sort(key=lambda s: s['tiempo_total_ms'], reverse=True)
+    return {'umbral_ms': SLOW_QUERY_MS, 'sentencias': items[:top], 'lentas': lentas}
+
+
+def reset_query_stats():
+    with _lock:
+        _stats.clear()
+        _lentas.clear()
+        _planes.clear()
@@ -0,0 +1,136 @@
+"""
+Resumen de ventas mantenido en línea
+La tabla resumen_ventas acumula unidades, importe y cantidad de ventas por
+día, hora, caja, usuario, método de pago y producto. Cada venta la actualiza
+dentro de su propia transacción, así los reportes leen O(días) filas en lugar
+de recorrer todo el detalle de ventas.
+
+Reconstrucción completa (incluye las ventas archivadas):
+    python -m app.database.resumen
+"""
+import argparse
+import sqlite3
+from urllib.request import pathname2url
+from app.database import archive, connection
+
+CLAVES = ('dia', 'hora', 'fk_caja', 'fk_usuario', 'metodo_pago', 'fk_producto')
+# Fila por venta (sin producto): ventas cuenta tickets y no suma unidades ni
+# importe, así cualquier agrupación suma bien. En las filas de producto,
+# ventas es la cantidad de tickets que incluyen ese producto.
+PRODUCTO_VENTAS = 0
+
+# Las claves NULL se guardan como 0 / '' para que el UPSERT las encuentre
+# (en un índice único SQLite considera distintos a todos los NULL)
+_CLAVES_VENTA = """substr(v.fecha, 1, 10), CAST(substr(v.fecha, 12, 2) AS INTEGER),
+           IFNULL(v.fk_caja, 0), IFNULL(v.fk_usuario, 0), IFNULL(v.metodo_pago, '')"""
+
+_SELECT = '''
+    SELECT {claves}, d.fk_producto,
+           {signo} * COUNT(DISTINCT v.id), {signo} * SUM(d.cantidad), {signo} * SUM(d.subtotal)
+    FROM {esquema}.venta v
+    JOIN {esquema}.detalle_venta d ON d.fk_venta = v.id
+    WHERE {filtro}
+    GROUP BY 1, 2, 3, 4, 5, 6
+    UNION ALL
+    SELECT {claves}, {producto_ventas}, {signo} * COUNT(*), 0, 0
+    FROM {esquema}.venta v
+    WHERE {filtro}
+    GROUP BY 1, 2, 3, 4, 5
+'''
+
+_UPSERT = '''
+    INSERT INTO main.resumen_ventas (dia, hora, fk_caja, fk_usuario, metodo_pago, fk_producto, ventas, cantidad, importe)
+    {select}
+    ON CONFLICT (dia, hora, fk_caja, fk_usuario, metodo_pago, fk_producto) DO UPDATE SET
+        ventas = ventas + excluded.ventas,
+        cantidad = cantidad + excluded.cantidad,
+        importe = importe + excluded.importe
+'''
+
+
+def crear_tabla(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_ventas (
+            dia TEXT NOT NULL,
+            hora INTEGER NOT NULL,
+            fk_caja INTEGER NOT NULL,
+            fk_usuario INTEGER NOT NULL,
+            metodo_pago TEXT NOT NULL,
+            fk_producto INTEGER NOT NULL,
+            ventas INTEGER NOT NULL DEFAULT 0,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            importe REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, hora, fk_caja, fk_usuario, metodo_pago, fk_producto)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _select(esquema, filtro, signo=1):
+    return _SELECT.format(claves=_CLAVES_VENTA, producto_ventas=PRODUCTO_VENTAS,
+                          signo=int(signo), esquema=esquema, filtro=filtro)
+
+
+def acumular_venta(cursor, venta_id, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) una venta en el resumen.
+    Se llama con el cursor de la transacción que escribe la venta.
+    """
+    cursor.execute(_UPSERT.format(select=_select('main', 'v.id = ?', signo)), (venta_id, venta_id))
+
+
+def _acumular_todo(cursor, esquema):
+    # Las ventas anuladas no suman (la columna no existe antes de la migración 7)
+    anulada = archive.columna_venta(cursor, esquema, 'anulada')
+    cursor.execute(_UPSERT.format(select=_select(esquema, f'{anulada} = 0')))
+
+
+def poblar(cursor):
+    """Carga inicial desde la base principal (paso de la migración)"""
+    crear_tabla(cursor)
+    _acumular_todo(cursor, 'main')
+
+
+def reconstruir_resumen(origen=None):
+    """Vuelve a calcular el resumen completo, incluyendo los archivos históricos"""
+    conn = sqlite3.connect(origen or connection.DB_PATH)
+    adjuntos = []
+    try:
+        connection.apply_profile(conn)
+        archivos = [
+            (periodo, archive.ruta_archivo(periodo))
+            for (periodo,) in conn.execute('SELECT periodo FROM venta_archivo ORDER BY periodo')
+        ]
+        if len(archivos) > archive.MAX_ADJUNTOS:
+            raise Exception(f"Hay más de {archive.MAX_ADJUNTOS} archivos históricos para adjuntar")
+        for periodo, ruta in archivos:
+            alias = f'arch_{periodo}'
+            conn.execute(f'ATTACH DATABASE ? AS {alias}', ('file:%s?mode=ro' % pathname2url(ruta),))
+            adjuntos.append(alias)
+
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('DELETE FROM main.resumen_ventas')
+            for esquema in ['main'] + adjuntos:
+                _acumular_todo(cursor, esquema)
+            filas = cursor.execute('SELECT COUNT(*) FROM main.resumen_ventas').fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return filas
+    finally:
+        for alias in adjuntos:
+            conn.execute(f'DETACH DATABASE {alias}')
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reconstruye la tabla resumen_ventas')
+    parser.parse_args(argv)
+    filas = reconstruir_resumen()
+    print(f"Resumen de ventas reconstruido: {filas} filas")
+
+
+if __name__ == '__main__':
+    main()
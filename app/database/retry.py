@@ -0,0 +1,94 @@
+"""
+Reintentos ante bloqueos de SQLite (SQLITE_BUSY / "database is locked")
+Con varias terminales escribiendo a la vez, un bloqueo breve no debe
+convertirse en una venta fallida: se reintenta con backoff exponencial con
+jitter hasta un plazo total, y se cuentan reintentos y abandonos.
+
+Variables de entorno:
+- DB_RETRY_DEADLINE_MS plazo total por operación (por defecto 3000)
+- DB_RETRY_BASE_MS espera inicial (por defecto 5)
+- DB_RETRY_MAX_MS espera máxima entre intentos (por defecto 250)
+
+Cada intento espera a lo sumo DB_WRITE_BUSY_TIMEOUT_MS dentro de SQLite
+(connection.py), bastante menos que el plazo total, así hay lugar para reintentar.
+"""
+import functools
+import os
+import random
+import sqlite3
+import threading
+import time
+from app.database.connection import en_transaccion
+
+RETRY_DEADLINE_MS = float(os.environ.get('DB_RETRY_DEADLINE_MS', '3000'))
+RETRY_BASE_MS = float(os.environ.get('DB_RETRY_BASE_MS', '5'))
+RETRY_MAX_MS = float(os.environ.get('DB_RETRY_MAX_MS', '250'))
+
+_lock = threading.Lock()
+_stats = {
+    'operaciones_reintentadas': 0,
+    'reintentos': 0,
+    'exitos_tras_reintento': 0,
+    'abandonos': 0,
+}
+
+
+def es_bloqueo(error):
+    """True si el error es un bloqueo transitorio de SQLite"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    mensaje = str(error).lower()
+    return 'locked' in mensaje or 'busy' in mensaje
+
+
+def _contar(**incrementos):
+    with _lock:
+        for clave, valor in incrementos.items():
+            _stats[clave] += valor
+
+
+def con_reintentos(fn, *args, **kwargs):
+    """
+    Ejecuta fn(*args, **kwargs) reintentando si la base de datos está bloqueada.
+    fn debe ser una transacción completa: cada intento empieza de cero.
+    """
+    inicio = time.perf_counter()
+    limite = inicio + RETRY_DEADLINE_MS / 1000.0
+    intento = 0
+    while True:
+        try:
+            resultado = fn(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not es_bloqueo(e):
+                raise
+            # Full jitter: espera aleatoria entre 0 y base * 2^intento (con tope)
+            espera = random.uniform(0, min(RETRY_MAX_MS, RETRY_BASE_MS * (2 ** intento))) / 1000.0
+            if time.perf_counter() + espera > limite:
+                _contar(abandonos=1, operaciones_reintentadas=1 if intento else 0)
+                raise Exception("La base de datos está ocupada. Intente nuevamente.") from e
+            intento += 1
+            _contar(reintentos=1)
+            time.sleep(espera)
+            continue
+        if intento:
+            _contar(operaciones_reintentadas=1, exitos_tras_reintento=1)
+        return resultado
+
+
+def reintentar_si_bloqueada(fn):
+    """
+    Decorador para métodos de escritura de los repositorios.
+    Dentro de transaccion() no reintenta: un bloqueo ahí invalida la
+    transacción completa, y es quien la abrió el que debe reintentarla.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if en_transaccion():
+            return fn(*args, **kwargs)
+        return con_reintentos(fn, *args, **kwargs)
+    return wrapper
+
+
+def get_retry_stats():
+    with _lock:
+        return dict(_stats)
@@ -4,7 +4,7 @@ RF20, RF21 - Control de apertura y cierre de caja
 """
 
 class Caja:
-    def __init__(self, id=None, fecha_apertura=None, fecha_cierre=None, monto_inicial=None, monto_final=None, fk_usuario=None, estado='Abierta'):
+    def __init__(self, id=None, fecha_apertura=None, fecha_cierre=None, monto_inicial=None, monto_final=None, fk_usuario=None, estado='Abierta', totales=None):
         self.id = id
         self.fecha_apertura = fecha_apertura
         self.fecha_cierre = fecha_cierre
@@ -12,6 +12,8 @@ class Caja:
         self.monto_final = monto_final
         self.fk_usuario = fk_usuario
         self.estado = estado
+        # Conciliación (ventas, total, efectivo esperado...) cuando se pide
+        self.totales = totales
     
     def to_dict(self):
         return {
@@ -21,5 +23,6 @@ class Caja:
             'monto_inicial': self.monto_inicial,
             'monto_final': self.monto_final,
             'fk_usuario': self.fk_usuario,
-            'estado': self.estado
+            'estado': self.estado,
+            'totales': self.totales
         }
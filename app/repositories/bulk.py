@@ -0,0 +1,25 @@
+"""
+Inserciones masivas compartidas por los repositorios
+La sentencia se prepara una sola vez y se ejecuta con executemany sobre
+tuplas ya armadas, en lugar de un cursor.execute por fila dentro de un for.
+"""
+
+
+def sql_insert(tabla, columnas):
+    """INSERT parametrizado para las columnas dadas"""
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        tabla, ', '.join(columnas), ', '.join('?' * len(columnas))
+    )
+
+
+def insertar_lote(cursor, tabla, columnas, filas):
+    """
+    Inserta todas las filas (tuplas en el orden de `columnas`) con una sola
+    preparación de la sentencia. No hace commit: corre en la transacción del
+    repositorio que la llama. Devuelve la cantidad de filas insertadas.
+    """
+    filas = filas if isinstance(filas, list) else list(filas)
+    if not filas:
+        return 0
+    cursor.executemany(sql_insert(tabla, columnas), filas)
+    return len(filas)
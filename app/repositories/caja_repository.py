@@ -1,9 +1,11 @@
-from app.database.connection import get_connection
+from app.database.connection import get_connection, get_read_connection
+from app.database.retry import reintentar_si_bloqueada
 from app.models.caja import Caja
 
 class CajaRepository:
     
     @staticmethod
+    @reintentar_si_bloqueada
     def abrir(caja):
         conn = get_connection()
         cursor = conn.cursor()
@@ -22,6 +24,7 @@ class CajaRepository:
             conn.close()
 
     @staticmethod
+    @reintentar_si_bloqueada
     def cerrar(id, fecha_cierre, monto_final):
         conn = get_connection()
         cursor = conn.cursor()
@@ -38,7 +41,7 @@ class CajaRepository:
     @staticmethod
     def obtener_abierta_por_usuario(fk_usuario):
         """Busca si el usuario tiene una caja abierta actualmente"""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT * FROM caja 
@@ -54,10 +57,71 @@ class CajaRepository:
                        fk_usuario=row[5], estado=row[6])
         return None
 
+    @staticmethod
+    def obtener_abiertas_por_usuarios(usuarios):
+        """Caja abierta de cada usuario en una sola consulta, como {fk_usuario: Caja}"""
+        usuarios = list(dict.fromkeys(usuarios))
+        if not usuarios:
+            return {}
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        marcadores = ', '.join('?' * len(usuarios))
+        cursor.execute(f'''
+            SELECT * FROM caja 
+            WHERE estado = 'Abierta' AND fk_usuario IN ({marcadores})
+            ORDER BY id
+        ''', usuarios)
+        rows = cursor.fetchall()
+        conn.close()
+        # Si un usuario tuviera más de una abierta queda la más reciente (mayor id)
+        return {
+            r[5]: Caja(id=r[0], fecha_apertura=r[1], fecha_cierre=r[2], 
+                       monto_inicial=r[3], monto_final=r[4], 
+                       fk_usuario=r[5], estado=r[6])
+            for r in rows
+        }
+
+    @staticmethod
+    def sumar_venta(cursor, venta, signo=1):
+        """
+        Acumula (signo=1) o descuenta (signo=-1) una venta en los totales de su caja.
+        Se llama con el cursor de la transacción que escribe la venta.
+        """
+        if venta.fk_caja is None:
+            return
+        recibido = venta.monto_pago if venta.monto_pago is not None else venta.total
+        cursor.execute('''
+            INSERT INTO caja_totales (fk_caja, metodo_pago, ventas, total, recibido, cambio)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (fk_caja, metodo_pago) DO UPDATE SET
+                ventas = ventas + excluded.ventas,
+                total = total + excluded.total,
+                recibido = recibido + excluded.recibido,
+                cambio = cambio + excluded.cambio
+        ''', (venta.fk_caja, venta.metodo_pago or '', signo, signo * venta.total,
+              signo * recibido, signo * (venta.cambio or 0)))
+
+    @staticmethod
+    def obtener_totales(fk_caja):
+        """Totales acumulados de la caja, por método de pago (una fila por método)"""
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT metodo_pago, ventas, total, recibido, cambio
+            FROM caja_totales WHERE fk_caja = ?
+            ORDER BY metodo_pago
+        ''', (fk_caja,))
+        rows = cursor.fetchall()
+        conn.close()
+        return {
+            r[0]: {'ventas': r[1], 'total': r[2], 'recibido': r[3], 'cambio': r[4]}
+            for r in rows
+        }
+
     @staticmethod
     def listar_todas():
         """Para historial de cajas (Admin)"""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM caja ORDER BY id DESC')
         rows = cursor.fetchall()
@@ -1,9 +1,11 @@
-from app.database.connection import get_connection
+from app.database.connection import get_connection, get_read_connection
+from app.database.retry import reintentar_si_bloqueada
 from app.models.cliente import Cliente
 
 class ClienteRepository:
     
     @staticmethod
+    @reintentar_si_bloqueada
     def crear(cliente):
         conn = get_connection()
         cursor = conn.cursor()
@@ -23,7 +25,7 @@ class ClienteRepository:
 
     @staticmethod
     def listar():
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM cliente WHERE activo = 1')
         rows = cursor.fetchall()
@@ -32,7 +34,7 @@ class ClienteRepository:
 
     @staticmethod
     def obtener_por_id(id):
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM cliente WHERE id = ?', (id,))
         row = cursor.fetchone()
@@ -42,6 +44,7 @@ class ClienteRepository:
         return None
 
     @staticmethod
+    @reintentar_si_bloqueada
     def actualizar(cliente):
         conn = get_connection()
         cursor = conn.cursor()
@@ -55,6 +58,7 @@ class ClienteRepository:
             conn.close()
 
     @staticmethod
+    @reintentar_si_bloqueada
     def eliminar(id):
         conn = get_connection()
         cursor = conn.cursor()
@@ -0,0 +1,48 @@
+"""
+Repositorio de claves de idempotencia
+"""
+from app.database.connection import get_connection, get_read_connection
+from app.database.retry import reintentar_si_bloqueada
+
+class IdempotenciaRepository:
+
+    @staticmethod
+    def obtener(clave):
+        """(huella, respuesta, creado) guardados para la clave, o None"""
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT huella, respuesta, creado FROM idempotencia WHERE clave = ?', (clave,))
+        row = cursor.fetchone()
+        conn.close()
+        return row
+
+    @staticmethod
+    @reintentar_si_bloqueada
+    def guardar(clave, huella, respuesta, creado):
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            # OR REPLACE: una clave vencida que aún no se purgó se reutiliza
+            cursor.execute('''
+                INSERT OR REPLACE INTO idempotencia (clave, huella, respuesta, creado)
+                VALUES (?, ?, ?, ?)
+            ''', (clave, huella, respuesta, creado))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+    @staticmethod
+    @reintentar_si_bloqueada
+    def eliminar_vencidas(limite):
+        """Borra las claves creadas antes de `limite` (epoch en segundos)"""
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM idempotencia WHERE creado < ?', (limite,))
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
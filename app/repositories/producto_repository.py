@@ -1,13 +1,115 @@
 """
 Repositorio de Productos
 """
-from app.database.connection import get_connection
+import sqlite3
+import threading
+from app.database.connection import al_confirmar, get_connection, get_read_connection
+from app.database.retry import reintentar_si_bloqueada
+from app.repositories.bulk import insertar_lote
 from app.models.producto import Producto
 
+# Mapa en memoria codigo_barras -> id de producto activo. Se carga completo en
+# la primera búsqueda y lo mantienen crear, actualizar y eliminar.
+_codigos = None
+_codigo_de = {}          # id -> codigo_barras (para quitar el código anterior)
+_desconocidos = set()    # códigos buscados que no existen (caché negativa)
+MAX_DESCONOCIDOS = 10000
+_generacion = 0          # avanza con cada cambio de códigos (ver obtener_por_codigo_barras)
+_lock_codigos = threading.Lock()
+
+# Columnas en orden explícito: según la versión de la base, activo y
+# codigo_barras no siempre están en la misma posición de SELECT *
+_COLUMNAS = 'id, nombre, precio, stock, stock_minimo, fk_proveedor, activo, codigo_barras'
+
+# Versión que tomará la fila en esta escritura (el trigger de producto suma 1
+# al contador). Fijarla en el mismo UPDATE evita que el trigger reescriba la fila.
+VERSION_SIGUIENTE = "(SELECT version + 1 FROM tabla_version WHERE tabla = 'producto')"
+
+
+def _producto(r):
+    return Producto(id=r[0], nombre=r[1], precio=r[2], stock=r[3], stock_minimo=r[4], fk_proveedor=r[5], activo=r[6], codigo_barras=r[7])
+
+
+def _normalizar_codigo(codigo):
+    """Un código vacío es lo mismo que no tener código"""
+    codigo = str(codigo).strip() if codigo is not None else ''
+    return codigo or None
+
+
+def _recordar_codigo(id, codigo):
+    global _generacion
+    with _lock_codigos:
+        _generacion += 1
+        anterior = _codigo_de.pop(id, None)
+        if _codigos is not None and anterior is not None and _codigos.get(anterior) == id:
+            del _codigos[anterior]
+        if codigo is None:
+            return
+        _desconocidos.discard(codigo)
+        if _codigos is not None:
+            _codigos[codigo] = id
+            _codigo_de[id] = codigo
+
+
+def _olvidar_codigos():
+    global _codigos, _generacion
+    with _lock_codigos:
+        _generacion += 1
+        _codigos = None
+        _codigo_de.clear()
+        _desconocidos.clear()
+
+
+def _cargar_codigos():
+    global _codigos
+    conn = get_read_connection()
+    try:
+        filas = conn.execute(
+            'SELECT codigo_barras, id FROM producto WHERE activo = 1 AND codigo_barras IS NOT NULL'
+        ).fetchall()
+    finally:
+        conn.close()
+    with _lock_codigos:
+        if _codigos is None:
+            _codigos = dict(filas)
+            _codigo_de.clear()
+            _codigo_de.update((id, codigo) for codigo, id in filas)
+
+
+# Productos con stock bajo (id -> Producto). La primera consulta de alertas
+# los carga con el índice parcial; después, cada escritura confirmada que toca
+# stock, mínimo o estado marca sus productos y la siguiente consulta revisa
+# solo esos. _revisar = None indica que hay que volver a cargar todo.
+_SQL_BAJO_STOCK = f'SELECT {_COLUMNAS} FROM producto WHERE stock <= stock_minimo AND activo = 1'
+_bajo_stock = {}
+_revisar = None
+MAX_REVISAR = 500
+_lock_bajo_stock = threading.Lock()
+_lock_revisar = threading.Lock()
+
+
+def _marcar_stock(ids):
+    global _revisar
+    with _lock_revisar:
+        if _revisar is None:
+            return
+        _revisar.update(ids)
+        # Muchos cambios juntos (importación, inventario): sale más barato recargar
+        if len(_revisar) > MAX_REVISAR:
+            _revisar = None
+
+
+def _olvidar_bajo_stock():
+    global _revisar
+    with _lock_revisar:
+        _revisar = None
+
 class ProductoRepository:
     
     @staticmethod
+    @reintentar_si_bloqueada
     def crear(producto):
+        producto.codigo_barras = _normalizar_codigo(producto.codigo_barras)
         conn = get_connection()
         cursor = conn.cursor()
         try:
@@ -18,34 +120,248 @@ class ProductoRepository:
             ''', (producto.nombre, producto.precio, producto.stock, producto.stock_minimo, producto.fk_proveedor, producto.activo, producto.codigo_barras))
             conn.commit()
             producto.id = cursor.lastrowid
+            if producto.activo:
+                _recordar_codigo(producto.id, producto.codigo_barras)
+            ProductoRepository.stock_modificado([producto.id])
             return producto
+        except sqlite3.IntegrityError:
+            raise Exception("El código de barras ya está asignado a otro producto")
         finally:
             conn.close()
 
     @staticmethod
-    def listar():
+    @reintentar_si_bloqueada
+    def crear_lote(productos):
+        """Inserta muchos productos (importación de catálogo) en una sola transacción"""
         conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM producto WHERE activo = 1')
+        try:
+            total = insertar_lote(cursor, 'producto', ('nombre', 'precio', 'stock', 'stock_minimo', 'fk_proveedor', 'activo', 'codigo_barras'), [
+                (p.nombre, p.precio, p.stock, p.stock_minimo, p.fk_proveedor, p.activo, _normalizar_codigo(p.codigo_barras))
+                for p in productos
+            ])
+            conn.commit()
+            # executemany no informa los ids: el mapa de códigos y las alertas se vuelven a cargar
+            _olvidar_codigos()
+            al_confirmar(_olvidar_bajo_stock)
+            return total
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise Exception("Hay códigos de barras repetidos o ya asignados a otro producto")
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+    @staticmethod
+    def listar():
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {_COLUMNAS} FROM producto WHERE activo = 1')
         rows = cursor.fetchall()
         conn.close()
-        # Mapeamos row[7] que es la nueva columna
-        return [Producto(id=r[0], nombre=r[1], precio=r[2], stock=r[3], stock_minimo=r[4], fk_proveedor=r[5], activo=r[6], codigo_barras=r[7] if len(r)>7 else None) for r in rows]
+        return [_producto(r) for r in rows]
 
     @staticmethod
     def obtener_por_id(id):
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM producto WHERE id = ?', (id,))
+        cursor.execute(f'SELECT {_COLUMNAS} FROM producto WHERE id = ?', (id,))
         row = cursor.fetchone()
         conn.close()
         if row:
-             # Mapeamos row[7]
-            return Producto(id=row[0], nombre=row[1], precio=row[2], stock=row[3], stock_minimo=row[4], fk_proveedor=row[5], activo=row[6], codigo_barras=row[7] if len(row)>7 else None)
+            return _producto(row)
         return None
 
     @staticmethod
+    def buscar(texto, limite=20):
+        """
+        Productos activos cuyo nombre o código empiezan con las palabras
+        buscadas (sin importar acentos ni mayúsculas), los más relevantes primero
+        """
+        terminos = [t.replace('"', '') for t in (texto or '').split()]
+        terminos = [t for t in terminos if t]
+        if not terminos:
+            return []
+        # Cada palabra como prefijo: "caf mol" encuentra "Café Molido"
+        consulta = ' '.join(f'"{t}"*' for t in terminos)
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        try:
+            try:
+                cursor.execute(f'''
+                    SELECT {', '.join('p.' + c for c in _COLUMNAS.split(', '))} FROM producto_fts f
+                    JOIN producto p ON p.id = f.rowid
+                    WHERE producto_fts MATCH ? AND p.activo = 1
+                    ORDER BY f.rank LIMIT ?
+                ''', (consulta, limite))
+            except sqlite3.OperationalError:
+                # Base sin FTS5: búsqueda por subcadena
+                patron = f"%{' '.join(terminos)}%"
+                cursor.execute(f'''
+                    SELECT {_COLUMNAS} FROM producto
+                    WHERE activo = 1 AND (nombre LIKE ? OR codigo_barras LIKE ?)
+                    ORDER BY nombre LIMIT ?
+                ''', (patron, patron, limite))
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+        return [_producto(r) for r in rows]
+
+    @staticmethod
+    def obtener_por_codigo_barras(codigo):
+        """
+        Producto activo con ese código de barras. El código se resuelve en el
+        mapa en memoria; los códigos inexistentes quedan en la caché negativa
+        y no vuelven a consultar la base.
+        """
+        codigo = _normalizar_codigo(codigo)
+        if codigo is None:
+            return None
+        if _codigos is None:
+            _cargar_codigos()
+        with _lock_codigos:
+            if codigo in _desconocidos:
+                return None
+            id = _codigos.get(codigo) if _codigos is not None else None
+            generacion = _generacion
+
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        try:
+            if id is not None:
+                cursor.execute(f'SELECT {_COLUMNAS} FROM producto WHERE id = ?', (id,))
+                row = cursor.fetchone()
+                # El mapa puede quedar viejo si la transacción que lo cambió se revirtió
+                if row and row[6] and row[7] == codigo:
+                    return _producto(row)
+
+            # Respaldo en la base: índice único parcial sobre los productos activos
+            # (si falta por códigos repetidos, idx_producto_codigo_barras)
+            cursor.execute(f'SELECT {_COLUMNAS} FROM producto WHERE codigo_barras = ? AND activo = 1', (codigo,))
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        if row:
+            _recordar_codigo(row[0], codigo)
+            return _producto(row)
+
+        with _lock_codigos:
+            # Si otro hilo asignó códigos mientras consultábamos, la fila pudo
+            # confirmarse después de nuestra lectura: no se guarda como inexistente
+            if _generacion != generacion:
+                return None
+            if _codigos is not None and _codigos.get(codigo) == id:
+                _codigos.pop(codigo, None)
+            if len(_desconocidos) >= MAX_DESCONOCIDOS:
+                _desconocidos.clear()
+            _desconocidos.add(codigo)
+        return None
+
+    @staticmethod
+    def obtener_productos_bajo_stock():
+        """
+        RF11 - Productos activos con stock en el mínimo o por debajo.
+        Se responde desde memoria; solo se consulta la base para los productos
+        escritos desde la consulta anterior (o todo, con el índice parcial).
+        """
+        global _bajo_stock, _revisar
+        with _lock_bajo_stock:
+            with _lock_revisar:
+                ids, _revisar = _revisar, set()
+            try:
+                if ids is None:
+                    conn = get_read_connection()
+                    cursor = conn.cursor()
+                    cursor.execute(_SQL_BAJO_STOCK)
+                    rows = cursor.fetchall()
+                    conn.close()
+                    _bajo_stock = {r[0]: _producto(r) for r in rows}
+                elif ids:
+                    ids = list(ids)
+                    conn = get_read_connection()
+                    cursor = conn.cursor()
+                    marcadores = ', '.join('?' * len(ids))
+                    cursor.execute(f'{_SQL_BAJO_STOCK} AND id IN ({marcadores})', ids)
+                    rows = cursor.fetchall()
+                    conn.close()
+                    # Los revisados que ya no cumplen la condición salen de la alerta
+                    for id in ids:
+                        _bajo_stock.pop(id, None)
+                    _bajo_stock.update((r[0], _producto(r)) for r in rows)
+            except Exception:
+                _olvidar_bajo_stock()
+                raise
+            return [_bajo_stock[id] for id in sorted(_bajo_stock)]
+
+    @staticmethod
+    def stock_modificado(ids):
+        """
+        Avisa que cambió el stock, el mínimo o el estado de estos productos.
+        Se aplica al confirmarse la transacción: si se revierte, no se marca nada.
+        """
+        ids = list(ids)
+        al_confirmar(lambda: _marcar_stock(ids))
+
+    @staticmethod
+    def listar_cambios(desde):
+        """
+        Productos escritos después de la versión `desde` (índice por version).
+        Devuelve (activos, ids_eliminados): los dados de baja van como lápidas.
+        """
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {_COLUMNAS} FROM producto WHERE version > ? ORDER BY version', (desde,))
+        rows = cursor.fetchall()
+        conn.close()
+        activos = [_producto(r) for r in rows if r[6]]
+        eliminados = [r[0] for r in rows if not r[6]]
+        return activos, eliminados
+
+    @staticmethod
+    def obtener_por_ids(ids):
+        """Productos de varios ids en una sola consulta, como {id: Producto}"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        marcadores = ', '.join('?' * len(ids))
+        cursor.execute(f'SELECT {_COLUMNAS} FROM producto WHERE id IN ({marcadores})', ids)
+        rows = cursor.fetchall()
+        conn.close()
+        return {r[0]: _producto(r) for r in rows}
+
+    @staticmethod
+    @reintentar_si_bloqueada
+    def descontar_stock(cantidades):
+        """
+        Descuenta stock de varios productos ({id: cantidad}) solo si alcanza.
+        El UPDATE es condicional, así dos cajas vendiendo el mismo producto no
+        pueden dejarlo en negativo; si a alguno no le alcanza no se descuenta nada.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                f'UPDATE producto SET stock = stock - ?, version = {VERSION_SIGUIENTE} WHERE id = ? AND stock >= ?',
+                [(cantidad, id, cantidad) for id, cantidad in cantidades.items()]
+            )
+            if cursor.rowcount != len(cantidades):
+                raise Exception("Stock insuficiente para completar la venta")
+            conn.commit()
+            ProductoRepository.stock_modificado(cantidades)
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+    @staticmethod
+    @reintentar_si_bloqueada
     def actualizar(producto):
+        producto.codigo_barras = _normalizar_codigo(producto.codigo_barras)
         conn = get_connection()
         cursor = conn.cursor()
         try:
@@ -56,18 +372,27 @@ class ProductoRepository:
                 WHERE id = ?
             ''', (producto.nombre, producto.precio, producto.stock, producto.stock_minimo, producto.fk_proveedor, producto.codigo_barras, producto.id))
             conn.commit()
+            # Si el producto estuviera inactivo, la búsqueda lo verifica contra la base
+            _recordar_codigo(producto.id, producto.codigo_barras)
+            ProductoRepository.stock_modificado([producto.id])
+        except sqlite3.IntegrityError:
+            raise Exception("El código de barras ya está asignado a otro producto")
         finally:
             conn.close()
     @staticmethod
-    def actualizar_stock(id, nuevo_stock):
+    @reintentar_si_bloqueada
+    def actualizar_stock(id, cantidad):
+        """Suma (o resta, si es negativa) la cantidad al stock del producto"""
         conn = get_connection()
         cursor = conn.cursor()
         try:
-            cursor.execute('UPDATE producto SET stock = ? WHERE id = ?', (nuevo_stock, id))
+            cursor.execute('UPDATE producto SET stock = stock + ? WHERE id = ?', (cantidad, id))
             conn.commit()
+            ProductoRepository.stock_modificado([id])
         finally:
             conn.close()
     @staticmethod
+    @reintentar_si_bloqueada
     def eliminar(id):
         conn = get_connection()
         cursor = conn.cursor()
@@ -75,5 +400,8 @@ class ProductoRepository:
             # Soft delete: cambiamos activo a 0
             cursor.execute('UPDATE producto SET activo = 0 WHERE id = ?', (id,))
             conn.commit()
+            # Un producto inactivo deja de resolverse por su código
+            _recordar_codigo(id, None)
+            ProductoRepository.stock_modificado([id])
         finally:
             conn.close()
\ No newline at end of file
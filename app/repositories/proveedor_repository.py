@@ -2,12 +2,14 @@
 Repositorio de Proveedores
 Gestiona las operaciones CRUD para la entidad Proveedor
 """
-from app.database.connection import get_connection
+from app.database.connection import get_connection, get_read_connection
+from app.database.retry import reintentar_si_bloqueada
 from app.models.proveedor import Proveedor
 
 class ProveedorRepository:
     
     @staticmethod
+    @reintentar_si_bloqueada
     def crear(proveedor):
         """Crea un nuevo proveedor"""
         conn = get_connection()
@@ -24,7 +26,7 @@ class ProveedorRepository:
     @staticmethod
     def obtener_por_id(id):
         """Obtiene un proveedor por ID"""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM proveedor WHERE id = ?', (id,))
         row = cursor.fetchone()
@@ -37,7 +39,7 @@ class ProveedorRepository:
     @staticmethod
     def listar():
         """Lista todos los proveedores activos"""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM proveedor WHERE activo = 1')
         rows = cursor.fetchall()
@@ -45,6 +47,7 @@ class ProveedorRepository:
         return [Proveedor(id=r[0], nombre=r[1], telefono=r[2], direccion=r[3], activo=r[4]) for r in rows]
     
     @staticmethod
+    @reintentar_si_bloqueada
     def actualizar(proveedor):
         """Actualiza la información de un proveedor"""
         conn = get_connection()
@@ -57,6 +60,7 @@ class ProveedorRepository:
         conn.close()
     
     @staticmethod
+    @reintentar_si_bloqueada
     def eliminar(id):
         """Elimina (desactiva) un proveedor"""
         conn = get_connection()
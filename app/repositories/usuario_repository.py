@@ -2,12 +2,14 @@
 Repositorio de Usuarios
 Gestiona las operaciones CRUD para la entidad Usuario
 """
-from app.database.connection import get_connection
+from app.database.connection import get_connection, get_read_connection
+from app.database.retry import reintentar_si_bloqueada
 from app.models.usuario import Usuario
 
 class UsuarioRepository:
     
     @staticmethod
+    @reintentar_si_bloqueada
     def crear(usuario):
         """Crea un nuevo usuario en la base de datos"""
         conn = get_connection()
@@ -29,7 +31,7 @@ class UsuarioRepository:
     @staticmethod
     def obtener_por_id(id):
         """Obtiene un usuario por ID"""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM usuario WHERE id = ?', (id,))
         row = cursor.fetchone()
@@ -42,7 +44,7 @@ class UsuarioRepository:
     @staticmethod
     def obtener_por_username(username):
         """Obtiene un usuario por Username (para validaciones)"""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM usuario WHERE username = ? AND activo = 1', (username,))
         row = cursor.fetchone()
@@ -54,7 +56,7 @@ class UsuarioRepository:
     @staticmethod
     def listar():
         """Lista todos los usuarios activos"""
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM usuario WHERE activo = 1')
         rows = cursor.fetchall()
@@ -62,6 +64,7 @@ class UsuarioRepository:
         return [Usuario(id=r[0], nombre=r[1], username=r[2], password_hash=r[3], rol=r[4], activo=r[5]) for r in rows]
     
     @staticmethod
+    @reintentar_si_bloqueada
     def actualizar(usuario):
         """Actualiza la información de un usuario"""
         conn = get_connection()
@@ -86,6 +89,7 @@ class UsuarioRepository:
         conn.close()
     
     @staticmethod
+    @reintentar_si_bloqueada
     def eliminar(id):
         """Elimina (desactiva) un usuario (Soft Delete)"""
         conn = get_connection()
@@ -1,9 +1,37 @@
-from app.database.connection import get_connection
+from app.database.connection import get_connection, get_read_connection
+from app.database.retry import reintentar_si_bloqueada
+from app.repositories.bulk import insertar_lote
+from app.database.resumen import CLAVES, PRODUCTO_VENTAS, acumular_venta
+from app.repositories.caja_repository import CajaRepository
+from app.repositories.producto_repository import VERSION_SIGUIENTE, ProductoRepository
+from app.database.archive import MAX_ADJUNTOS, archivos_para_rango, archivos_para_id, columna_venta, conexion_con_archivos
 from app.models.venta import Venta
 
+DETALLE_COLUMNAS = ('fk_venta', 'fk_producto', 'cantidad', 'precio_unitario', 'subtotal')
+# Una fila por línea de venta, con los datos de pago de la cabecera
+EXPORT_COLUMNAS = ('venta_id', 'fecha', 'fk_caja', 'fk_usuario', 'fk_cliente', 'metodo_pago',
+                   'total', 'monto_pago', 'cambio', 'referencia',
+                   'fk_producto', 'producto', 'cantidad', 'precio_unitario', 'subtotal', 'anulada')
+# Filas que se leen por cada fetchmany al exportar
+EXPORT_LOTE = 500
+# Cabecera de venta en orden explícito: anulada se agregó con una migración
+# y su posición en SELECT * depende de la versión de la base (o del archivo)
+_CABECERA = 'v.id, v.fecha, v.total, v.fk_cliente, v.fk_usuario, v.fk_caja'
+
+
+def _cabecera(r):
+    return {
+        "id": r[0], "fecha": r[1], "total": r[2],
+        "fk_cliente": r[3], "fk_usuario": r[4], "fk_caja": r[5],
+        "anulada": bool(r[6]),
+        "items": []
+    }
+
+
 class VentaRepository:
     
     @staticmethod
+    @reintentar_si_bloqueada
     def crear_venta(venta):
         conn = get_connection()
         cursor = conn.cursor()
@@ -18,12 +46,15 @@ class VentaRepository:
             venta_id = cursor.lastrowid
             venta.id = venta_id
             
-            # (El resto del código de insertar detalles queda IGUAL)
-            for item in venta.items:
-                cursor.execute('''
-                    INSERT INTO detalle_venta (fk_venta, fk_producto, cantidad, precio_unitario, subtotal)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (venta_id, item['producto_id'], item['cantidad'], item['precio'], item['subtotal']))
+            # Detalles: una sola sentencia preparada para todas las líneas
+            insertar_lote(cursor, 'detalle_venta', DETALLE_COLUMNAS, [
+                (venta_id, item['producto_id'], item['cantidad'], item['precio'], item['subtotal'])
+                for item in venta.items
+            ])
+            
+            # Resumen de reportes y totales de la caja en el mismo commit que la venta
+            acumular_venta(cursor, venta_id)
+            CajaRepository.sumar_venta(cursor, venta)
             
             conn.commit()
             return venta
@@ -34,49 +65,204 @@ class VentaRepository:
             conn.close()
 
     @staticmethod
-    def listar():
+    @reintentar_si_bloqueada
+    def anular(id, fecha_anulacion, motivo=None):
+        """
+        Marca la venta como anulada y revierte sus efectos: devuelve al stock
+        todas sus líneas y la descuenta del resumen y de los totales de la caja.
+        """
         conn = get_connection()
         cursor = conn.cursor()
-        # Hacemos un JOIN para traer el nombre del cliente y del usuario
-        query = '''
-            SELECT v.id, v.fecha, v.total, c.nombre as cliente, u.username as usuario
-            FROM venta v
-            LEFT JOIN cliente c ON v.fk_cliente = c.id
-            LEFT JOIN usuario u ON v.fk_usuario = u.id
-            ORDER BY v.id DESC
-        '''
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        conn.close()
-        
+        try:
+            cursor.execute('''
+                SELECT v.fk_caja, v.metodo_pago, v.total, v.monto_pago, v.cambio, v.anulada, c.estado
+                FROM venta v
+                LEFT JOIN caja c ON c.id = v.fk_caja
+                WHERE v.id = ?
+            ''', (id,))
+            row = cursor.fetchone()
+            if not row:
+                raise Exception("Venta no encontrada")
+            if row[5]:
+                raise Exception("La venta ya está anulada")
+            # Una caja cerrada ya se concilió: sus totales no se modifican
+            if row[0] is not None and row[6] != 'Abierta':
+                raise Exception("Solo se pueden anular ventas de una caja abierta")
+
+            cursor.execute('''
+                UPDATE venta SET anulada = 1, fecha_anulacion = ?, motivo_anulacion = ?
+                WHERE id = ? AND anulada = 0
+            ''', (fecha_anulacion, motivo, id))
+            if cursor.rowcount != 1:
+                raise Exception("La venta ya está anulada")
+
+            # Stock de todas las líneas en una sola sentencia (UPDATE ... FROM)
+            cursor.execute(f'''
+                UPDATE producto SET stock = stock + d.cantidad, version = {VERSION_SIGUIENTE}
+                FROM (
+                    SELECT fk_producto, SUM(cantidad) AS cantidad
+                    FROM detalle_venta WHERE fk_venta = ?
+                    GROUP BY fk_producto
+                ) AS d
+                WHERE producto.id = d.fk_producto
+                RETURNING producto.id
+            ''', (id,))
+            productos = [r[0] for r in cursor.fetchall()]
+            lineas = len(productos)
+
+            acumular_venta(cursor, id, signo=-1)
+            CajaRepository.sumar_venta(cursor, Venta(
+                id=id, total=row[2], fk_caja=row[0], metodo_pago=row[1], monto_pago=row[3], cambio=row[4]
+            ), signo=-1)
+
+            conn.commit()
+            ProductoRepository.stock_modificado(productos)
+            return {'id': id, 'total': row[2], 'productos': lineas, 'fecha_anulacion': fecha_anulacion}
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+    @staticmethod
+    def listar(desde=None, hasta=None, fk_caja=None, fk_usuario=None, fk_cliente=None,
+               metodo_pago=None, limite=None, antes_de=None, incluir_items=False):
+        """
+        Historial de ventas, de la más reciente a la más antigua.
+        Paginación por id (keyset): la página siguiente se pide con
+        antes_de = id de la última venta recibida, y cuesta lo mismo
+        sin importar cuántas ventas haya antes.
+        Con incluir_items los detalles de toda la página se traen en una
+        sola consulta adicional.
+        """
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        # Un día sin hora incluye todas las ventas de ese día
+        if hasta is not None and len(hasta) == 10:
+            hasta += ' 23:59:59'
+        condiciones, params = VentaRepository._filtros(
+            desde, hasta, fk_caja, fk_usuario, fk_cliente, metodo_pago, antes_de
+        )
+        archivos = []
+        if desde is not None or hasta is not None:
+            archivos = archivos_para_rango(cursor, desde, hasta)
+
+        if archivos:
+            conn.close()
+            rows, items = VentaRepository._listar_con_archivos(condiciones, params, limite, archivos, incluir_items)
+        else:
+            where = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+            # Hacemos un JOIN para traer el nombre del cliente y del usuario
+            query = f'''
+                SELECT v.id, v.fecha, v.total, c.nombre as cliente, u.username as usuario, v.anulada
+                FROM venta v
+                LEFT JOIN cliente c ON v.fk_cliente = c.id
+                LEFT JOIN usuario u ON v.fk_usuario = u.id
+                {where}
+                ORDER BY v.id DESC{' LIMIT ?' if limite else ''}
+            '''
+            cursor.execute(query, params + ([limite] if limite else []))
+            rows = cursor.fetchall()
+            items = VentaRepository._items_por_venta(cursor, [r[0] for r in rows]) if incluir_items else None
+            conn.close()
+
         # Retornamos diccionarios directamente para facilitar la vista
-        return [
+        ventas = [
             {
                 "id": r[0], "fecha": r[1], "total": r[2], 
                 "cliente": r[3] if r[3] else "Consumidor Final", 
-                "usuario": r[4]
+                "usuario": r[4], "anulada": bool(r[5])
             } 
             for r in rows
         ]
+        if incluir_items:
+            for venta in ventas:
+                venta["items"] = items.get(venta["id"], [])
+        return ventas
+
+    @staticmethod
+    def _items_por_venta(cursor, ids, esquemas=('main',)):
+        """Detalles de varias ventas en una consulta, agrupados como {fk_venta: [items]}"""
+        if not ids:
+            return {}
+        marcadores = ', '.join('?' * len(ids))
+        query = ' UNION ALL '.join(
+            f'''SELECT d.fk_venta, d.id, d.cantidad, d.precio_unitario, d.subtotal, p.nombre
+               FROM {e}.detalle_venta d
+               JOIN main.producto p ON d.fk_producto = p.id
+               WHERE d.fk_venta IN ({marcadores})'''
+            for e in esquemas
+        )
+        cursor.execute(query + ' ORDER BY 1, 2', list(ids) * len(esquemas))
+        items = {}
+        for d in cursor.fetchall():
+            items.setdefault(d[0], []).append({
+                "cantidad": d[2], "precio": d[3],
+                "subtotal": d[4], "producto": d[5]
+            })
+        return items
+
+    @staticmethod
+    def _filtros(desde, hasta, fk_caja, fk_usuario, fk_cliente, metodo_pago, antes_de):
+        """Condiciones WHERE (sobre el alias v) y sus parámetros"""
+        condiciones, params = [], []
+        for condicion, valor in (
+            ('v.fecha >= ?', desde), ('v.fecha <= ?', hasta),
+            ('v.fk_caja = ?', fk_caja), ('v.fk_usuario = ?', fk_usuario),
+            ('v.fk_cliente = ?', fk_cliente), ('v.metodo_pago = ?', metodo_pago),
+            ('v.id < ?', antes_de),
+        ):
+            if valor is not None:
+                condiciones.append(condicion)
+                params.append(valor)
+        return condiciones, params
+
+    @staticmethod
+    def _listar_con_archivos(condiciones, params, limite, archivos, incluir_items=False):
+        # Las ventas archivadas solo se consultan si el rango llega a sus fechas
+        with conexion_con_archivos(archivos) as (conn, esquemas):
+            cursor = conn.cursor()
+            partes = ['main'] + esquemas
+            where = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+            limit = ' LIMIT ?' if limite else ''
+            # Cada base aporta a lo sumo `limite` filas ya ordenadas por su índice
+            union = ' UNION ALL '.join(
+                f'SELECT * FROM (SELECT v.id, v.fecha, v.total, v.fk_cliente, v.fk_usuario, '
+                f'{columna_venta(cursor, e, "anulada")} AS anulada '
+                f'FROM {e}.venta v {where} ORDER BY v.id DESC{limit})'
+                for e in partes
+            )
+            query = f'''
+                SELECT v.id, v.fecha, v.total, c.nombre as cliente, u.username as usuario, v.anulada
+                FROM ({union}) v
+                LEFT JOIN main.cliente c ON v.fk_cliente = c.id
+                LEFT JOIN main.usuario u ON v.fk_usuario = u.id
+                ORDER BY v.id DESC{limit}
+            '''
+            por_parte = params + ([limite] if limite else [])
+            cursor.execute(query, por_parte * len(partes) + ([limite] if limite else []))
+            rows = cursor.fetchall()
+            items = VentaRepository._items_por_venta(cursor, [r[0] for r in rows], partes) if incluir_items else None
+            return rows, items
 
     @staticmethod
     def obtener_por_id(id):
-        conn = get_connection()
+        conn = get_read_connection()
         cursor = conn.cursor()
         
         # Obtener cabecera
-        cursor.execute('SELECT * FROM venta WHERE id = ?', (id,))
+        cursor.execute(f'SELECT {_CABECERA}, v.anulada FROM venta v WHERE v.id = ?', (id,))
         row = cursor.fetchone()
         
         if not row:
+            # Puede estar en un archivo histórico
+            archivos = archivos_para_id(cursor, id)
             conn.close()
+            if archivos:
+                return VentaRepository._obtener_archivada(id, archivos)
             return None
             
-        venta_dict = {
-            "id": row[0], "fecha": row[1], "total": row[2], 
-            "fk_cliente": row[3], "fk_usuario": row[4], "fk_caja": row[5],
-            "items": []
-        }
+        venta_dict = _cabecera(row)
         
         # Obtener detalles
         cursor.execute('''
@@ -95,4 +281,147 @@ class VentaRepository:
                 "subtotal": d[2], "producto": d[3]
             })
             
-        return venta_dict
\ No newline at end of file
+        return venta_dict
+
+    @staticmethod
+    def exportar(desde=None, hasta=None, lote=EXPORT_LOTE):
+        """
+        Libro de ventas línea por línea, en orden cronológico, como un
+        generador de lotes de filas (EXPORT_COLUMNAS). Las filas se leen con
+        fetchmany, así la memoria no depende del tamaño del rango.
+        desde/hasta son días (YYYY-MM-DD) inclusive.
+        """
+        if hasta and len(hasta) == 10:
+            hasta += ' 23:59:59'
+        conn = get_read_connection()
+        try:
+            archivos = archivos_para_rango(conn.cursor(), desde, hasta)
+        finally:
+            conn.close()
+        # Se valida antes de empezar a transmitir (ej. demasiados archivos)
+        if len(archivos) > MAX_ADJUNTOS:
+            raise Exception(f"El rango pedido abarca más de {MAX_ADJUNTOS} archivos históricos")
+        condiciones, params = VentaRepository._filtros(desde, hasta, None, None, None, None, None)
+        return VentaRepository._filas_exportacion(condiciones, params, archivos, lote)
+
+    @staticmethod
+    def _filas_exportacion(condiciones, params, archivos, lote):
+        where = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+        with conexion_con_archivos(archivos) as (conn, esquemas):
+            cursor = conn.cursor()
+            # Si el consumidor corta la exportación, la sentencia abierta
+            # bloquearía el DETACH del archivo que se estaba leyendo
+            try:
+                # Los archivos (por año, de menor a mayor) tienen ventas anteriores a las de la base principal
+                for esquema in esquemas + ['main']:
+                    # ORDER BY fecha, id sigue el índice idx_venta_fecha: sin ordenamiento temporal en memoria
+                    cursor.execute(f'''
+                        SELECT v.id, v.fecha, v.fk_caja, v.fk_usuario, v.fk_cliente, v.metodo_pago,
+                               v.total, v.monto_pago, v.cambio, v.referencia,
+                               d.fk_producto, p.nombre, d.cantidad, d.precio_unitario, d.subtotal,
+                               {columna_venta(cursor, esquema, 'anulada')}
+                        FROM {esquema}.venta v
+                        JOIN {esquema}.detalle_venta d ON d.fk_venta = v.id
+                        LEFT JOIN main.producto p ON p.id = d.fk_producto
+                        {where}
+                        ORDER BY v.fecha, v.id
+                    ''', params)
+                    while True:
+                        filas = cursor.fetchmany(lote)
+                        if not filas:
+                            break
+                        yield filas
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def obtener_por_ids(ids):
+        """Varias ventas con sus items en dos consultas, en el orden pedido"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        marcadores = ', '.join('?' * len(ids))
+        cursor.execute(f'SELECT {_CABECERA}, v.anulada FROM venta v WHERE v.id IN ({marcadores})', ids)
+        cabeceras = {row[0]: _cabecera(row) for row in cursor.fetchall()}
+        items = VentaRepository._items_por_venta(cursor, list(cabeceras))
+        conn.close()
+
+        ventas = []
+        for id in ids:
+            venta = cabeceras.get(id)
+            if venta is None:
+                # No está en la base principal: puede estar archivada
+                venta = VentaRepository.obtener_por_id(id)
+            else:
+                venta["items"] = items.get(id, [])
+            if venta:
+                ventas.append(venta)
+        return ventas
+
+    @staticmethod
+    def _obtener_archivada(id, archivos):
+        with conexion_con_archivos(archivos) as (conn, esquemas):
+            cursor = conn.cursor()
+            for esquema in esquemas:
+                # Los archivos creados antes de la anulación de ventas no tienen la columna
+                cursor.execute(
+                    f'SELECT {_CABECERA}, {columna_venta(cursor, esquema, "anulada")} '
+                    f'FROM {esquema}.venta v WHERE v.id = ?', (id,)
+                )
+                row = cursor.fetchone()
+                if not row:
+                    continue
+                venta = _cabecera(row)
+                cursor.execute(f'''
+                    SELECT d.cantidad, d.precio_unitario, d.subtotal, p.nombre 
+                    FROM {esquema}.detalle_venta d
+                    JOIN main.producto p ON d.fk_producto = p.id
+                    WHERE d.fk_venta = ?
+                ''', (id,))
+                venta["items"] = [
+                    {"cantidad": d[0], "precio": d[1], "subtotal": d[2], "producto": d[3]}
+                    for d in cursor.fetchall()
+                ]
+                return venta
+        return None
+
+    @staticmethod
+    def resumen(desde=None, hasta=None, agrupar=('dia',)):
+        """
+        Totales de ventas desde la tabla resumen_ventas (no recorre el detalle).
+        desde/hasta son días (YYYY-MM-DD) inclusive; agrupar es una lista de
+        columnas de CLAVES.
+        """
+        agrupar = list(agrupar or [])
+        invalidas = [c for c in agrupar if c not in CLAVES]
+        if invalidas:
+            raise Exception(f"No se puede agrupar por: {', '.join(invalidas)}")
+
+        condiciones, params = [], []
+        for condicion, valor in (('dia >= ?', desde), ('dia <= ?', hasta)):
+            if valor is not None:
+                condiciones.append(condicion)
+                params.append(valor)
+        if 'fk_producto' in agrupar:
+            # Tickets que incluyen cada producto
+            condiciones.append('fk_producto <> ?')
+            params.append(PRODUCTO_VENTAS)
+            ventas = 'SUM(ventas)'
+        else:
+            # Tickets: solo las filas por venta, para no contarlos una vez por producto
+            ventas = f'SUM(CASE WHEN fk_producto = {PRODUCTO_VENTAS} THEN ventas ELSE 0 END)'
+
+        columnas = ', '.join(agrupar + [f'{ventas} AS ventas', 'SUM(cantidad) AS cantidad', 'SUM(importe) AS importe'])
+        where = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+        group = ('GROUP BY ' + ', '.join(agrupar) + ' ORDER BY ' + ', '.join(agrupar)) if agrupar else ''
+
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f'SELECT {columnas} FROM resumen_ventas {where} {group}', params)
+            nombres = [d[0] for d in cursor.description]
+            return [dict(zip(nombres, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
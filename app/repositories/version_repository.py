@@ -0,0 +1,17 @@
+"""
+Repositorio de versiones de tablas
+Los triggers de la migración 10 suman 1 a la versión en cada escritura.
+"""
+from app.database.connection import get_read_connection
+
+class VersionRepository:
+
+    @staticmethod
+    def obtener(tabla):
+        """Versión actual de la tabla (0 si no está versionada)"""
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT version FROM tabla_version WHERE tabla = ?', (tabla,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else 0
@@ -1,4 +1,6 @@
 from datetime import datetime
+from app.database.connection import lectura_consistente
+from app.database.group_commit import ejecutar_escritura
 from app.repositories.caja_repository import CajaRepository
 from app.models.caja import Caja
 
@@ -18,19 +20,47 @@ class CajaService:
 
     @staticmethod
     def cerrar_caja(monto_final, fk_usuario):
+        # Lectura de totales y cierre en la misma transacción: ninguna venta
+        # puede colarse entre la conciliación y el cambio de estado
+        return ejecutar_escritura(CajaService._cerrar, monto_final, fk_usuario)
+
+    @staticmethod
+    def _cerrar(monto_final, fk_usuario):
         # 1. Buscar la caja que vamos a cerrar
         caja_abierta = CajaRepository.obtener_abierta_por_usuario(fk_usuario)
         if not caja_abierta:
             raise Exception("No hay ninguna caja abierta para cerrar.")
             
         fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        totales = CajaService._conciliacion(caja_abierta, CajaRepository.obtener_totales(caja_abierta.id))
         
         CajaRepository.cerrar(caja_abierta.id, fecha_actual, monto_final)
-        return True
+        # Diferencia entre lo contado y el efectivo que debería haber en la caja
+        return dict(totales, caja_id=caja_abierta.id, monto_final=monto_final,
+                    diferencia=round(monto_final - totales['efectivo_esperado'], 2))
 
     @staticmethod
     def obtener_caja_actual(fk_usuario):
-        return CajaRepository.obtener_abierta_por_usuario(fk_usuario)
+        # Caja y totales de la misma foto de la base de datos
+        with lectura_consistente():
+            caja = CajaRepository.obtener_abierta_por_usuario(fk_usuario)
+            if caja:
+                caja.totales = CajaService._conciliacion(caja, CajaRepository.obtener_totales(caja.id))
+        return caja
+
+    @staticmethod
+    def _conciliacion(caja, por_metodo):
+        """Cifras de la caja a partir de sus totales acumulados (sin recorrer ventas)"""
+        efectivo = por_metodo.get('Efectivo', {})
+        return {
+            'monto_inicial': caja.monto_inicial,
+            'ventas': sum(t['ventas'] for t in por_metodo.values()),
+            'total': round(sum(t['total'] for t in por_metodo.values()), 2),
+            'recibido': round(sum(t['recibido'] for t in por_metodo.values()), 2),
+            'cambio': round(sum(t['cambio'] for t in por_metodo.values()), 2),
+            'efectivo_esperado': round((caja.monto_inicial or 0) + efectivo.get('recibido', 0) - efectivo.get('cambio', 0), 2),
+            'por_metodo': por_metodo,
+        }
         
     @staticmethod
     def listar_cajas():
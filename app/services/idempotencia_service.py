@@ -0,0 +1,91 @@
+"""
+Servicio de idempotencia para POST /api/ventas
+La respuesta de cada venta con Idempotency-Key se guarda en la tabla
+idempotencia (en la misma transacción de la venta) y en una caché en memoria
+acotada (LRU) con vencimiento. Un reintento con la misma clave recibe la
+respuesta original sin tocar el stock ni abrir una transacción.
+
+Variables de entorno:
+- IDEMPOTENCIA_TTL_HORAS vigencia de una clave (por defecto 24)
+- IDEMPOTENCIA_MAX_CACHE claves en memoria (por defecto 10000)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from app.repositories.idempotencia_repository import IdempotenciaRepository
+
+IDEMPOTENCIA_TTL_S = float(os.environ.get('IDEMPOTENCIA_TTL_HORAS', '24')) * 3600
+IDEMPOTENCIA_MAX_CACHE = int(os.environ.get('IDEMPOTENCIA_MAX_CACHE', '10000'))
+# Cada cuántas claves nuevas se purgan de la tabla las vencidas
+PURGA_CADA = 200
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # clave -> (huella, respuesta, creado)
+_nuevas = 0
+
+
+class IdempotenciaService:
+
+    @staticmethod
+    def huella(*datos):
+        """Resumen del contenido de la petición (la misma clave con otra venta es un error)"""
+        return hashlib.sha256(repr(datos).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def buscar(clave, huella):
+        """Respuesta original guardada para la clave, o None si no existe o ya venció"""
+        with _lock:
+            entrada = _cache.get(clave)
+            if entrada is not None:
+                _cache.move_to_end(clave)
+        if entrada is None:
+            entrada = IdempotenciaRepository.obtener(clave)
+            if entrada is None:
+                return None
+            entrada = tuple(entrada)
+            IdempotenciaService._guardar_en_cache(clave, entrada)
+
+        if time.time() - entrada[2] > IDEMPOTENCIA_TTL_S:
+            return None
+        if entrada[0] != huella:
+            raise Exception("La clave de idempotencia ya se usó con una venta distinta")
+        return json.loads(entrada[1])
+
+    @staticmethod
+    def registrar(clave, huella, respuesta):
+        """
+        Guarda la respuesta en la tabla. Debe llamarse dentro de la transacción
+        de la venta; devuelve la entrada para recordar() tras el commit.
+        """
+        entrada = (huella, json.dumps(respuesta), time.time())
+        IdempotenciaRepository.guardar(clave, *entrada)
+        return entrada
+
+    @staticmethod
+    def recordar(clave, entrada):
+        """Lleva a la caché una entrada ya confirmada y purga la tabla cada tanto"""
+        global _nuevas
+        if entrada is None:
+            return
+        IdempotenciaService._guardar_en_cache(clave, entrada)
+        with _lock:
+            _nuevas += 1
+            purgar = _nuevas % PURGA_CADA == 0
+        if purgar:
+            IdempotenciaRepository.eliminar_vencidas(time.time() - IDEMPOTENCIA_TTL_S)
+
+    @staticmethod
+    def _guardar_en_cache(clave, entrada):
+        with _lock:
+            _cache[clave] = entrada
+            _cache.move_to_end(clave)
+            while len(_cache) > IDEMPOTENCIA_MAX_CACHE:
+                _cache.popitem(last=False)
+
+    @staticmethod
+    def limpiar_cache():
+        with _lock:
+            _cache.clear()
@@ -3,7 +3,9 @@ Servicio de Inventario
 RF10 - Actualización automática de inventario
 RF11 - Alertas de stock bajo
 """
+from app.database.connection import lectura_consistente
 from app.repositories.producto_repository import ProductoRepository
+from app.repositories.version_repository import VersionRepository
 from app.models.producto import Producto
 
 class InventarioService:
@@ -64,6 +66,24 @@ class InventarioService:
         productos = ProductoRepository.listar()
         return [p.to_dict() for p in productos]
     
+    @staticmethod
+    def cambios_productos(desde):
+        """
+        Sincronización de terminales: productos cambiados desde la versión dada.
+        La terminal guarda la `version` devuelta y la manda en la siguiente consulta.
+        """
+        if desde < 0:
+            raise Exception("La versión no puede ser negativa")
+        # Versión y filas de la misma foto: ningún cambio queda entre ambas
+        with lectura_consistente():
+            version = VersionRepository.obtener('producto')
+            activos, eliminados = ProductoRepository.listar_cambios(desde)
+        return {
+            'version': version,
+            'productos': [p.to_dict() for p in activos],
+            'eliminados': eliminados
+        }
+
     @staticmethod
     def buscar_producto(id):
         """Busca un producto por ID"""
@@ -72,6 +92,19 @@ class InventarioService:
             return producto.to_dict()
         return None
     @staticmethod
+    def buscar_productos(texto, limite=20):
+        """Búsqueda por nombre o código para el punto de venta"""
+        return [p.to_dict() for p in ProductoRepository.buscar(texto, limite)]
+
+    @staticmethod
+    def buscar_por_codigo_barras(codigo):
+        """Producto activo con ese código de barras (escaneo en el punto de venta)"""
+        producto = ProductoRepository.obtener_por_codigo_barras(codigo)
+        if producto:
+            return producto.to_dict()
+        return None
+
+    @staticmethod
     def eliminar_producto(id):
         if not ProductoRepository.obtener_por_id(id):
             raise Exception("Producto no encontrado")
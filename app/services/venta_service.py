@@ -1,15 +1,131 @@
+import csv
+import io
+import json
 from datetime import datetime
-from app.repositories.venta_repository import VentaRepository
+from app.repositories.venta_repository import VentaRepository, EXPORT_COLUMNAS
 from app.repositories.producto_repository import ProductoRepository
 from app.repositories.caja_repository import CajaRepository
 from app.models.venta import Venta
+from app.services.idempotencia_service import IdempotenciaService
+from app.database.group_commit import ejecutar_escritura
+from app.database.connection import lectura_consistente, transaccion
+
+# Ventas confirmadas por transacción al procesar un lote (POST /api/ventas/batch)
+VENTAS_POR_TRANSACCION = 50
+MAX_VENTAS_LOTE = 1000
+# Formatos de GET /api/ventas/exportar
+FORMATOS_EXPORTACION = ('csv', 'ndjson')
 
 class VentaService:
     
     @staticmethod
-    def realizar_venta(items_request, fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia):
+    def realizar_venta(items_request, fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia,
+                       clave_idempotencia=None):
+        # Toda la venta (stock + cabecera + detalle) es una sola transacción:
+        # un único commit y nada queda a medias si algo falla en el camino.
+        # Con DB_GROUP_COMMIT=1 la transacción la ejecuta el escritor único.
+        if clave_idempotencia:
+            return VentaService._realizar_venta_idempotente(
+                clave_idempotencia,
+                items_request, fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia
+            )
+        return ejecutar_escritura(
+            VentaService._procesar_venta,
+            items_request, fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia
+        )
+
+    @staticmethod
+    def _realizar_venta_idempotente(clave, items_request, fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia):
+        huella = IdempotenciaService.huella(
+            [(item.producto_id, item.cantidad) for item in items_request],
+            fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia
+        )
+        previa = IdempotenciaService.buscar(clave, huella)
+        if previa is not None:
+            # Reintento: respuesta original, sin tocar stock ni abrir transacción
+            return Venta(**previa)
+
+        venta, entrada = ejecutar_escritura(
+            VentaService._procesar_venta_con_clave,
+            clave, huella, items_request, fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia
+        )
+        IdempotenciaService.recordar(clave, entrada)
+        return venta
+
+    @staticmethod
+    def _procesar_venta_con_clave(clave, huella, *datos_venta):
+        # Otro reintento con la misma clave pudo confirmarse mientras esperábamos el bloqueo
+        previa = IdempotenciaService.buscar(clave, huella)
+        if previa is not None:
+            return Venta(**previa), None
+        venta = VentaService._procesar_venta(*datos_venta)
+        respuesta = {k: v for k, v in venta.to_dict().items() if k != 'items'}
+        # La clave se guarda en la misma transacción: venta y clave se confirman juntas
+        return venta, IdempotenciaService.registrar(clave, huella, respuesta)
+
+    @staticmethod
+    def realizar_ventas_lote(ventas):
+        """
+        Registra ventas encoladas por terminales sin conexión.
+        Se confirman en tramos de VENTAS_POR_TRANSACCION; cada venta corre en
+        su propio SAVEPOINT, así una venta rechazada no afecta a las demás.
+        Devuelve un resultado por venta, en el mismo orden recibido.
+        """
+        if len(ventas) > MAX_VENTAS_LOTE:
+            raise Exception(f"El lote no puede tener más de {MAX_VENTAS_LOTE} ventas")
+
+        resultados = []
+        for inicio in range(0, len(ventas), VENTAS_POR_TRANSACCION):
+            tramo = ventas[inicio:inicio + VENTAS_POR_TRANSACCION]
+            try:
+                resultados.extend(ejecutar_escritura(VentaService._procesar_tramo, tramo, inicio))
+            except Exception as e:
+                # Falló la transacción del tramo: ninguna de sus ventas quedó guardada
+                resultados.extend(
+                    {'indice': inicio + i, 'success': False, 'message': str(e)}
+                    for i in range(len(tramo))
+                )
+        return resultados
+
+    @staticmethod
+    def _procesar_tramo(tramo, inicio):
+        # Productos y cajas de todo el tramo se resuelven en una consulta cada uno
+        productos = ProductoRepository.obtener_por_ids(
+            [item.producto_id for venta in tramo for item in venta.items]
+        )
+        cajas = CajaRepository.obtener_abiertas_por_usuarios(
+            [venta.fk_usuario if venta.fk_usuario else 1 for venta in tramo]
+        )
+
+        resultados = []
+        for i, venta_request in enumerate(tramo):
+            usuario_id = venta_request.fk_usuario if venta_request.fk_usuario else 1
+            try:
+                with transaccion():  # SAVEPOINT por venta
+                    venta = VentaService._procesar_venta(
+                        venta_request.items, venta_request.fk_cliente, usuario_id,
+                        venta_request.metodo_pago, venta_request.monto_pago, venta_request.referencia,
+                        productos=productos, caja=cajas.get(usuario_id)
+                    )
+            except Exception as e:
+                resultados.append({'indice': inicio + i, 'success': False, 'message': str(e)})
+                continue
+            # Las siguientes ventas del tramo validan contra el stock ya descontado
+            for item in venta_request.items:
+                productos[item.producto_id].stock -= item.cantidad
+            resultados.append({
+                'indice': inicio + i, 'success': True,
+                'venta_id': venta.id, 'total': venta.total, 'cambio': venta.cambio
+            })
+        return resultados
+
+    @staticmethod
+    def _procesar_venta(items_request, fk_cliente, fk_usuario, metodo_pago, monto_pago, referencia,
+                        productos=None, caja=None):
+        # productos/caja pueden venir ya resueltos (ventas en lote)
         # 1. Validar Caja
-        caja = CajaRepository.obtener_abierta_por_usuario(fk_usuario)
+        if caja is None:
+            caja = CajaRepository.obtener_abierta_por_usuario(fk_usuario)
         if not caja:
             raise Exception("No puedes vender porque no tienes una caja abierta.")
 
@@ -17,6 +133,10 @@ class VentaService:
         items_procesados = []
 
         # 2. Procesar Items y Stock
+        # Todos los productos del carrito se leen en una sola consulta
+        if productos is None:
+            productos = ProductoRepository.obtener_por_ids([item.producto_id for item in items_request])
+        cantidades = {}
         for item in items_request:
             # === CORRECCIÓN AQUÍ ===
             # Antes (Error): prod_id = item['producto_id']
@@ -25,16 +145,18 @@ class VentaService:
             cantidad = item.cantidad
             # =======================
 
-            producto = ProductoRepository.obtener_por_id(prod_id)
+            producto = productos.get(prod_id)
             if not producto: 
                 raise Exception(f"Producto ID {prod_id} no encontrado")
-            
-            if producto.stock < cantidad: 
+        
+            # Un mismo producto puede venir en varias líneas del carrito
+            cantidades[prod_id] = cantidades.get(prod_id, 0) + cantidad
+            if producto.stock < cantidades[prod_id]: 
                 raise Exception(f"Stock insuficiente para '{producto.nombre}'")
-            
+        
             subtotal = producto.precio * cantidad
             total_venta += subtotal
-            
+        
             # Aquí sí guardamos como diccionario para el repositorio
             items_procesados.append({
                 "producto_id": prod_id, 
@@ -42,8 +164,9 @@ class VentaService:
                 "precio": producto.precio, 
                 "subtotal": subtotal
             })
-            
-            ProductoRepository.actualizar_stock(prod_id, producto.stock - cantidad)
+
+        # Descuento condicional: si otra venta se llevó el stock, se aborta toda la venta
+        ProductoRepository.descontar_stock(cantidades)
 
         # 3. Lógica de Pago
         cambio = 0
@@ -76,9 +199,67 @@ class VentaService:
         return VentaRepository.crear_venta(nueva_venta)
 
     @staticmethod
-    def listar_ventas():
-        return VentaRepository.listar()
+    def listar_ventas(desde=None, hasta=None, limite=None, antes_de=None,
+                      fk_caja=None, fk_usuario=None, fk_cliente=None, metodo_pago=None,
+                      incluir_items=False):
+        return VentaRepository.listar(
+            desde, hasta, fk_caja=fk_caja, fk_usuario=fk_usuario, fk_cliente=fk_cliente,
+            metodo_pago=metodo_pago, limite=limite, antes_de=antes_de, incluir_items=incluir_items
+        )
+
+    @staticmethod
+    def anular_venta(id, motivo=None):
+        # Marca, stock, resumen y totales de caja se confirman en un único commit
+        fecha_anulacion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return ejecutar_escritura(VentaRepository.anular, id, fecha_anulacion, motivo)
+
+    @staticmethod
+    def exportar_ventas(desde=None, hasta=None, formato='csv'):
+        """
+        Texto del libro de ventas en trozos (uno por lote leído), para
+        transmitirlo sin armar la exportación completa en memoria
+        """
+        if formato not in FORMATOS_EXPORTACION:
+            raise Exception(f"Formato no soportado: {formato}. Use {' o '.join(FORMATOS_EXPORTACION)}")
+        lotes = VentaRepository.exportar(desde, hasta)
+        if formato == 'csv':
+            return VentaService._como_csv(lotes)
+        return VentaService._como_ndjson(lotes)
+
+    @staticmethod
+    def _como_csv(lotes):
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(EXPORT_COLUMNAS)
+        for filas in lotes:
+            escritor.writerows(filas)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        # Encabezado solo, si el rango no tiene ventas
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def _como_ndjson(lotes):
+        for filas in lotes:
+            yield ''.join(
+                json.dumps(dict(zip(EXPORT_COLUMNAS, fila)), ensure_ascii=False) + '\n'
+                for fila in filas
+            )
+
+    @staticmethod
+    def resumen_ventas(desde=None, hasta=None, agrupar=('dia',)):
+        return VentaRepository.resumen(desde, hasta, agrupar)
+
+    @staticmethod
+    def obtener_ventas(ids):
+        # Cabeceras y detalles se leen del mismo snapshot
+        with lectura_consistente():
+            return VentaRepository.obtener_por_ids(ids)
         
     @staticmethod
     def obtener_venta(id):
-        return VentaRepository.obtener_por_id(id)
\ No newline at end of file
+        # Cabecera y detalle se leen del mismo snapshot
+        with lectura_consistente():
+            return VentaRepository.obtener_por_id(id)
\ No newline at end of file
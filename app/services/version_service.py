@@ -0,0 +1,53 @@
+"""
+Caché de listados por versión de tabla
+La respuesta JSON de un listado se serializa una vez por versión de su tabla
+y se reutiliza (bytes) hasta la próxima escritura. El ETag es la versión, así
+el navegador puede preguntar con If-None-Match y recibir 304 sin cuerpo.
+"""
+import json
+import threading
+from app.database.connection import lectura_consistente
+from app.repositories.version_repository import VersionRepository
+
+_lock = threading.Lock()
+_cache = {}  # clave -> (etag, cuerpo)
+
+
+class VersionService:
+
+    @staticmethod
+    def respuesta(clave, tabla, generar):
+        """
+        (etag, cuerpo) del listado `clave`. generar() devuelve el dict del
+        controlador y solo se llama si la tabla cambió desde la última vez.
+        Si generar() falla devuelve (None, resultado) y no se guarda nada.
+        """
+        # Versión y datos de la misma foto: el ETag siempre describe el cuerpo
+        with lectura_consistente():
+            version = VersionRepository.obtener(tabla)
+            etag = f'"{clave}-{version}"'
+            with _lock:
+                entrada = _cache.get(clave)
+            if entrada is not None and entrada[0] == etag:
+                return entrada
+
+            resultado = generar()
+        if not resultado.get('success'):
+            return None, resultado
+        entrada = (etag, json.dumps(resultado, ensure_ascii=False).encode('utf-8'))
+        with _lock:
+            _cache[clave] = entrada
+        return entrada
+
+    @staticmethod
+    def coincide(etag, if_none_match):
+        """Indica si el encabezado If-None-Match del cliente incluye el ETag actual"""
+        if not if_none_match:
+            return False
+        etiquetas = [e.strip() for e in if_none_match.split(',')]
+        return '*' in etiquetas or etag in etiquetas or f'W/{etag}' in etiquetas
+
+    @staticmethod
+    def limpiar_cache():
+        with _lock:
+            _cache.clear()
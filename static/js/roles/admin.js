@@ -199,7 +199,7 @@ async function cargarResumenVentas() {
     const tbody = document.getElementById("tabla-ventas-resumen");
 
     try {
-        const response = await fetch("/api/ventas");
+        const response = await fetch("/api/ventas?limite=5");
         const resultado = await response.json();
 
         if (response.ok && resultado.success) {
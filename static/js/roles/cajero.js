@@ -16,6 +16,14 @@ async function verificarEstadoCaja() {
             // Llenar datos
             document.getElementById("fecha_apertura_display").textContent = resultado.caja.fecha_apertura;
             document.getElementById("base_inicial_display").textContent = "$" + resultado.caja.monto_inicial;
+
+            // Totales acumulados del turno (los mantiene cada venta)
+            const totales = resultado.caja.totales;
+            if (totales) {
+                document.getElementById("ventas_turno_display").textContent = totales.ventas;
+                document.getElementById("total_turno_display").textContent = "$" + totales.total.toFixed(2);
+                document.getElementById("efectivo_esperado_display").textContent = "$" + totales.efectivo_esperado.toFixed(2);
+            }
         } else {
             // CAJA CERRADA
             document.getElementById("view-closed").style.display = "block";
@@ -86,7 +94,10 @@ async function cerrarCaja() {
         const resultado = await response.json();
 
         if (resultado.success) {
-            alert("Turno cerrado correctamente.");
+            const cierre = resultado.data;
+            alert("Turno cerrado correctamente." + (cierre
+                ? `\nEfectivo esperado: $${cierre.efectivo_esperado.toFixed(2)}\nDiferencia: $${cierre.diferencia.toFixed(2)}`
+                : ""));
             location.reload(); // Recargar para volver a la pantalla de apertura
         } else {
             alert("Error: " + resultado.message);
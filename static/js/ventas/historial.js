@@ -1,24 +1,66 @@
+// Paginación por cursor: el backend devuelve "siguiente" con el id desde donde seguir
+const TAMANO_PAGINA = 50;
+let cursorSiguiente = null;
+// Items de las ventas ya cargadas (include=items): el detalle se muestra sin otra petición
+const itemsPorVenta = new Map();
+
 document.addEventListener("DOMContentLoaded", () => {
-    cargarVentas();
+    aplicarFiltros();
 });
 
+function aplicarFiltros() {
+    cursorSiguiente = null;
+    itemsPorVenta.clear();
+    document.getElementById("tabla-ventas").innerHTML = "";
+    cargarVentas();
+}
+
+function construirUrl() {
+    const params = new URLSearchParams({ limite: TAMANO_PAGINA, include: "items" });
+    const desde = document.getElementById("filtro-desde").value;
+    const hasta = document.getElementById("filtro-hasta").value;
+    const metodo = document.getElementById("filtro-metodo").value;
+
+    if (desde) params.append("desde", desde);
+    if (hasta) params.append("hasta", hasta);
+    if (metodo) params.append("metodo_pago", metodo);
+    if (cursorSiguiente !== null) params.append("antes_de", cursorSiguiente);
+
+    return `/api/ventas?${params.toString()}`;
+}
+
+// Libro de ventas del rango elegido (el servidor lo transmite por partes)
+function exportarVentas() {
+    const params = new URLSearchParams({ formato: "csv" });
+    const desde = document.getElementById("filtro-desde").value;
+    const hasta = document.getElementById("filtro-hasta").value;
+
+    if (desde) params.append("desde", desde);
+    if (hasta) params.append("hasta", hasta);
+
+    window.location.href = `/api/ventas/exportar?${params.toString()}`;
+}
+
 async function cargarVentas() {
     try {
-        const res = await fetch("/api/ventas");
+        const res = await fetch(construirUrl());
         const data = await res.json();
 
         const tbody = document.getElementById("tabla-ventas");
-        tbody.innerHTML = "";
+        const btnMas = document.getElementById("btn-cargar-mas");
 
         if (data.success) {
             data.ventas.forEach(v => {
+                itemsPorVenta.set(v.id, { total: v.total, items: v.items, anulada: v.anulada });
                 const tr = document.createElement("tr");
                 tr.innerHTML = `
                     <td><strong>#${v.id}</strong></td>
                     <td>${v.fecha}</td>
                     <td>${v.cliente}</td>
                     <td>${v.usuario}</td>
-                    <td style="font-weight:bold; color:#2E7D32;">$${v.total.toFixed(2)}</td>
+                    <td style="font-weight:bold; color:${v.anulada ? '#999' : '#2E7D32'};">
+                        $${v.total.toFixed(2)}${v.anulada ? ' <small style="color:#C62828;">ANULADA</small>' : ''}
+                    </td>
                     <td>
                         <button class="btn-detalle" onclick="verDetalle(${v.id})">
                             <i class="fas fa-eye"></i> Ver
@@ -27,6 +69,10 @@ async function cargarVentas() {
                 `;
                 tbody.appendChild(tr);
             });
+
+            // Las filas nuevas se agregan debajo; el botón solo aparece si hay más
+            cursorSiguiente = data.siguiente;
+            btnMas.style.display = cursorSiguiente !== null ? "inline-block" : "none";
         }
     } catch (error) {
         console.error("Error:", error);
@@ -35,11 +81,14 @@ async function cargarVentas() {
 
 async function verDetalle(id) {
     try {
-        const res = await fetch(`/api/ventas/${id}`);
-        const data = await res.json();
+        let v = itemsPorVenta.has(id) ? { id: id, ...itemsPorVenta.get(id) } : null;
+        if (!v) {
+            const res = await fetch(`/api/ventas/${id}`);
+            const data = await res.json();
+            if (data.success) v = data.venta;
+        }
 
-        if (data.success) {
-            const v = data.venta;
+        if (v) {
             document.getElementById("detalle-id").textContent = v.id;
             document.getElementById("detalle-total").textContent = "$" + v.total.toFixed(2);
 
@@ -56,10 +105,38 @@ async function verDetalle(id) {
                 lista.appendChild(div);
             });
 
+            document.getElementById("btn-anular").style.display = v.anulada ? "none" : "inline-block";
+
             // CORRECCIÓN: Usamos 'flex' para que el modal se centre gracias al CSS
             document.getElementById("modal-detalle").style.display = "flex";
         }
     } catch (error) {
         console.error("Error al ver detalle:", error);
     }
-}
\ No newline at end of file
+}
+
+// Anula la venta abierta en el modal: el servidor devuelve el stock de todas sus líneas
+async function anularVenta() {
+    const id = parseInt(document.getElementById("detalle-id").textContent);
+    const motivo = prompt(`Motivo de la anulación de la venta #${id}:`);
+    if (motivo === null) return;
+
+    try {
+        const res = await fetch(`/api/ventas/${id}/anular`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ motivo: motivo || null })
+        });
+        const data = await res.json();
+
+        if (data.success) {
+            alert("Venta anulada correctamente");
+            cerrarModal();
+            aplicarFiltros();
+        } else {
+            alert("Error: " + (data.detail || data.message));
+        }
+    } catch (error) {
+        console.error("Error al anular:", error);
+    }
+}
@@ -60,10 +60,49 @@ function renderizarProductos(lista) {
     });
 }
 
+// Búsqueda en el servidor (texto completo, sin acentos): se espera a que el
+// usuario deje de escribir y solo se pinta la respuesta de la última petición
+const LIMITE_BUSQUEDA = 20;
+let temporizadorBusqueda = null;
+let busquedaActual = 0;
+
 function filtrarProductos() {
-    const texto = document.getElementById("buscador").value.toLowerCase();
-    const filtrados = productosGlobal.filter(p => p.nombre.toLowerCase().includes(texto));
-    renderizarProductos(filtrados);
+    const texto = document.getElementById("buscador").value.trim();
+    clearTimeout(temporizadorBusqueda);
+    if (!texto) {
+        renderizarProductos(productosGlobal);
+        return;
+    }
+    temporizadorBusqueda = setTimeout(() => buscarProductos(texto), 150);
+}
+
+async function buscarProductos(texto) {
+    const numero = ++busquedaActual;
+    try {
+        const params = new URLSearchParams({ q: texto, limite: LIMITE_BUSQUEDA });
+        const res = await fetch(`/api/inventario/productos/buscar?${params.toString()}`);
+        const data = await res.json();
+        if (data.success && numero === busquedaActual) {
+            renderizarProductos(data.productos);
+        }
+    } catch (e) { console.error("Error buscando productos", e); }
+}
+
+// El lector de códigos escribe el código y envía Enter: se resuelve en el servidor
+async function escanearCodigo() {
+    const buscador = document.getElementById("buscador");
+    const codigo = buscador.value.trim();
+    if (!codigo) return;
+
+    try {
+        const res = await fetch(`/api/inventario/productos/barcode/${encodeURIComponent(codigo)}`);
+        if (res.ok) {
+            const data = await res.json();
+            agregarAlCarrito(data.producto);
+            buscador.value = "";
+            renderizarProductos(productosGlobal);
+        }
+    } catch (e) { console.error("Error buscando el código", e); }
 }
 
 // ==========================================
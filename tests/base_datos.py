@@ -0,0 +1,98 @@
+"""
+Base para las pruebas de integración con una base de datos SQLite temporal
+Cada test corre contra una base nueva creada por init_db (con todas las
+migraciones), con pools propios y el archivo histórico en el directorio
+temporal. Las cachés en memoria de los repositorios y servicios se vacían
+antes y después de cada test.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.database import archive, connection
+from app.database.connection import ConnectionPool, get_connection, init_db
+from app.repositories import producto_repository
+from app.services.idempotencia_service import IdempotenciaService
+from app.services.version_service import VersionService
+
+
+def items(*pares):
+    """Ítems de venta como los manda el punto de venta: items((producto_id, cantidad), ...)"""
+    return [SimpleNamespace(producto_id=p, cantidad=c) for p, c in pares]
+
+
+def _limpiar_caches():
+    producto_repository._olvidar_codigos()
+    producto_repository._olvidar_bajo_stock()
+    IdempotenciaService.limpiar_cache()
+    VersionService.limpiar_cache()
+
+
+class BaseDatosTestCase(unittest.TestCase):
+    """Base de datos temporal; las subclases cargan sus datos después de super().setUp()"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.path = os.path.join(self.tmpdir, 'test.db')
+        self.directorio = os.path.join(self.tmpdir, 'archivo')
+        self.pool = ConnectionPool(self.path, max_size=2)
+        self.read_pool = ConnectionPool(self.path, max_size=2, read_only=True)
+        self.addCleanup(self.pool.close_all)
+        self.addCleanup(self.read_pool.close_all)
+        self.parchear(connection, 'DB_PATH', self.path)
+        self.parchear(connection, '_pool', self.pool)
+        self.parchear(connection, '_read_pool', self.read_pool)
+        self.parchear(archive, 'ARCHIVE_DIR', self.directorio)
+        init_db()
+        _limpiar_caches()
+        self.addCleanup(_limpiar_caches)
+
+    def parchear(self, objetivo, atributo, valor):
+        """patch.object que se deshace al terminar el test"""
+        parche = patch.object(objetivo, atributo, valor)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def ejecutar(self, sql, params=()):
+        conn = get_connection()
+        try:
+            conn.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def ejecutar_muchos(self, sql, filas):
+        conn = get_connection()
+        try:
+            conn.executemany(sql, filas)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def consultar(self, sql, params=()):
+        conn = get_connection()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def crear_producto(self, id, nombre, precio=1.0, stock=100, **columnas):
+        columnas = dict(id=id, nombre=nombre, precio=precio, stock=stock, **columnas)
+        self.ejecutar(
+            f"INSERT INTO producto ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+            tuple(columnas.values())
+        )
+
+    def crear_caja(self, id, fecha_apertura='2025-01-01 08:00:00', estado='Abierta', fk_usuario=1, monto_inicial=0):
+        self.ejecutar(
+            'INSERT INTO caja (id, fecha_apertura, monto_inicial, fk_usuario, estado) VALUES (?, ?, ?, ?, ?)',
+            (id, fecha_apertura, monto_inicial, fk_usuario, estado)
+        )
+
+    def stock(self):
+        """Stock actual de cada producto, como {id: stock}"""
+        return dict(self.consultar('SELECT id, stock FROM producto ORDER BY id'))
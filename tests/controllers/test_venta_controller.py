@@ -279,6 +279,44 @@ class TestVentaController(unittest.TestCase):
         self.assertFalse(resultado['success'])
         self.assertIn("Error", resultado['message'])
 
+    # ==================== TESTS PARA VENTAS EN LOTE ====================
+
+    @patch('app.controllers.venta_controller.VentaService')
+    def test_realizar_ventas_lote_resumen(self, mock_venta_service):
+        """Test: El lote devuelve el resultado de cada venta y el resumen"""
+        # Arrange
+        lote = Mock()
+        lote.ventas = [Mock(), Mock(), Mock()]
+        mock_venta_service.realizar_ventas_lote.return_value = [
+            {'indice': 0, 'success': True, 'venta_id': 10, 'total': 5.0, 'cambio': 0},
+            {'indice': 1, 'success': False, 'message': "Stock insuficiente para 'Leche'"},
+            {'indice': 2, 'success': True, 'venta_id': 11, 'total': 3.0, 'cambio': 0},
+        ]
+
+        # Act
+        resultado = VentaController.realizar_ventas_lote(lote)
+
+        # Assert
+        self.assertTrue(resultado['success'])
+        self.assertEqual(resultado['registradas'], 2)
+        self.assertEqual(resultado['rechazadas'], 1)
+        self.assertEqual(len(resultado['resultados']), 3)
+        mock_venta_service.realizar_ventas_lote.assert_called_once_with(lote.ventas)
+
+    @patch('app.controllers.venta_controller.VentaService')
+    def test_realizar_ventas_lote_con_error(self, mock_venta_service):
+        """Test: Error al procesar el lote completo"""
+        # Arrange
+        lote = Mock()
+        mock_venta_service.realizar_ventas_lote.side_effect = Exception("El lote no puede tener más de 1000 ventas")
+
+        # Act
+        resultado = VentaController.realizar_ventas_lote(lote)
+
+        # Assert
+        self.assertFalse(resultado['success'])
+        self.assertIn("1000", resultado['message'])
+
 
 # ==================== TESTS CON PYTEST ====================
 
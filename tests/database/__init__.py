@@ -0,0 +1,3 @@
+"""
+Package de tests para la capa de base de datos
+"""
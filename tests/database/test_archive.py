@@ -0,0 +1,160 @@
+"""
+Pruebas unitarias para el archivo histórico de ventas
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import os
+import sqlite3
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from app.database import archive
+from app.repositories.venta_repository import VentaRepository
+from tests.base_datos import BaseDatosTestCase
+
+
+class TestArchivoVentas(BaseDatosTestCase):
+    """Suite de pruebas para archivar_ventas y las consultas de historial"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Arroz', 2.5)
+        self.crear_caja(1, '2023-03-01 08:00:00', 'Cerrada')
+        self.crear_caja(2, '2025-05-01 08:00:00')
+        ventas = [
+            (1, '2023-03-01 10:00:00', 1), (2, '2024-01-15 10:00:00', 1),
+            (3, '2024-02-01 10:00:00', 2), (4, '2025-05-20 10:00:00', 2),
+        ]
+        self.ejecutar_muchos('INSERT INTO venta (id, fecha, total, fk_caja) VALUES (?, ?, 5.0, ?)', ventas)
+        self.ejecutar_muchos(
+            'INSERT INTO detalle_venta (fk_venta, fk_producto, cantidad, precio_unitario, subtotal) VALUES (?, 1, 2, 2.5, 5.0)',
+            [(v[0],) for v in ventas]
+        )
+
+    def _archivar(self):
+        return archive.archivar_ventas(meses=12, ahora=datetime(2025, 6, 1), origen=self.path)
+
+    def test_mueve_solo_ventas_antiguas_de_cajas_cerradas(self):
+        """Test: Se archivan las ventas antiguas de cajas cerradas, agrupadas por año"""
+        # Act
+        resultado = self._archivar()
+
+        # Assert
+        self.assertEqual(resultado, {'2023': 1, '2024': 1})
+        self.assertEqual([v['id'] for v in VentaRepository.listar()], [4, 3])
+        self.assertTrue(os.path.exists(archive.ruta_archivo('2023')))
+
+    def test_rango_historico_adjunta_archivos(self):
+        """Test: Un rango de fechas antiguo incluye las ventas archivadas"""
+        # Arrange
+        self._archivar()
+
+        # Act
+        ventas = VentaRepository.listar('2023-01-01', '2024-12-31')
+
+        # Assert
+        self.assertEqual([v['id'] for v in ventas], [3, 2, 1])
+
+    def test_rango_historico_paginado(self):
+        """Test: La paginación por cursor recorre también las ventas archivadas"""
+        # Arrange
+        self._archivar()
+
+        # Act
+        pagina1 = VentaRepository.listar('2023-01-01', '2025-12-31', limite=3)
+        pagina2 = VentaRepository.listar('2023-01-01', '2025-12-31', limite=3, antes_de=pagina1[-1]['id'])
+
+        # Assert
+        self.assertEqual([v['id'] for v in pagina1], [4, 3, 2])
+        self.assertEqual([v['id'] for v in pagina2], [1])
+
+    def test_obtener_venta_archivada(self):
+        """Test: Una venta archivada se obtiene con su detalle"""
+        # Arrange
+        self._archivar()
+
+        # Act
+        venta = VentaRepository.obtener_por_id(2)
+
+        # Assert
+        self.assertEqual(venta['fecha'], '2024-01-15 10:00:00')
+        self.assertEqual(venta['items'], [{'cantidad': 2, 'precio': 2.5, 'subtotal': 5.0, 'producto': 'Arroz'}])
+
+    def test_archivo_sin_separar_descarta_la_conexion(self):
+        """Test: Si un archivo no se puede separar la conexión no vuelve al pool"""
+        # Arrange
+        self._archivar()
+        archivos = [('2023', archive.ruta_archivo('2023'))]
+
+        # Act: una sentencia sin agotar bloquea el DETACH
+        with archive.conexion_con_archivos(archivos) as (conn, esquemas):
+            cursor = conn.cursor()
+            cursor.execute('SELECT id FROM arch_2023.venta UNION ALL SELECT id FROM arch_2023.venta')
+            cursor.fetchone()
+        ventas = VentaRepository.listar('2023-01-01', '2023-12-31')
+
+        # Assert
+        self.assertEqual([v['id'] for v in ventas], [1])
+        self.assertEqual(self.read_pool.stats()['en_uso'], 0)
+
+    def test_venta_archivada_conserva_anulacion(self):
+        """Test: Una venta anulada sigue marcada como anulada después de archivarla"""
+        # Arrange
+        self.ejecutar('UPDATE venta SET anulada = 1 WHERE id = 2')
+        self._archivar()
+
+        # Act
+        ventas = [VentaRepository.obtener_por_id(id) for id in (1, 2)]
+
+        # Assert
+        self.assertEqual([v['anulada'] for v in ventas], [False, True])
+
+    def test_falla_entre_copia_y_borrado_no_pierde_ventas(self):
+        """Test: Si el job se corta después de copiar, las ventas siguen en la base principal"""
+        # Arrange
+        with patch.object(archive, '_borrar_archivadas', side_effect=sqlite3.OperationalError('disk I/O error')):
+            with self.assertRaises(sqlite3.OperationalError):
+                self._archivar()
+
+        # Act
+        en_principal = [r[0] for r in self.consultar('SELECT id FROM venta ORDER BY id')]
+        resultado = self._archivar()
+
+        # Assert
+        self.assertEqual(en_principal, [1, 2, 3, 4])
+        self.assertEqual(resultado, {'2023': 1, '2024': 1})
+        self.assertEqual([v['id'] for v in VentaRepository.listar('2000-01-01', '2099-12-31')], [4, 3, 2, 1])
+
+    def test_solo_borra_lo_que_esta_en_el_archivo(self):
+        """Test: Una venta que no llegó al archivo no se borra de la base principal"""
+        # Arrange
+        copiar = archive._copiar_periodo
+
+        def copia_incompleta(conn, cursor, periodo, limite):
+            copiar(conn, cursor, periodo, limite)
+            cursor.execute('DELETE FROM archivo.venta WHERE id = 1')
+            conn.commit()
+
+        # Act
+        with patch.object(archive, '_copiar_periodo', copia_incompleta):
+            resultado = self._archivar()
+
+        # Assert
+        self.assertEqual(resultado, {'2023': 0, '2024': 1})
+        self.assertEqual([v['id'] for v in VentaRepository.listar('2000-01-01', '2099-12-31')], [4, 3, 2, 1])
+
+    def test_volver_a_archivar_es_seguro(self):
+        """Test: Ejecutar el job dos veces no duplica ni pierde ventas"""
+        # Arrange
+        self._archivar()
+
+        # Act
+        resultado = self._archivar()
+
+        # Assert
+        self.assertEqual(resultado, {})
+        self.assertEqual(len(VentaRepository.listar('2000-01-01', '2099-12-31')), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
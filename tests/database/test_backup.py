@@ -0,0 +1,142 @@
+"""
+Pruebas unitarias para el respaldo en línea
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from app.database import backup
+
+
+class TestRespaldo(unittest.TestCase):
+    """Suite de pruebas para realizar_respaldo"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.origen = os.path.join(self.tmpdir, 'origen.db')
+        self.destino = os.path.join(self.tmpdir, 'respaldos')
+        conn = sqlite3.connect(self.origen)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, dato TEXT)')
+        conn.executemany('INSERT INTO t (dato) VALUES (?)', [('x' * 500,) for _ in range(2000)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _contar(self, ruta):
+        conn = sqlite3.connect(ruta)
+        total = conn.execute('SELECT COUNT(*) FROM t').fetchone()[0]
+        conn.close()
+        return total
+
+    def test_respaldo_comprimido_restaurable(self):
+        """Test: El respaldo gzip contiene todas las filas y reporta el progreso"""
+        # Act
+        info = backup.realizar_respaldo(destino=self.destino, paginas=16, pausa_ms=0, origen=self.origen)
+
+        # Assert
+        self.assertTrue(info['archivo'].endswith('.db.gz'))
+        restaurado = os.path.join(self.tmpdir, 'restaurado.db')
+        with gzip.open(info['ruta'], 'rb') as f_in, open(restaurado, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        self.assertEqual(self._contar(restaurado), 2000)
+        estado = backup.obtener_estado()
+        self.assertFalse(estado['en_curso'])
+        self.assertEqual(estado['porcentaje'], 100.0)
+        self.assertGreater(estado['paginas_totales'], 16)
+
+    def test_respaldo_con_escrituras_concurrentes(self):
+        """Test: Las ventas que entran durante el respaldo no lo bloquean ni lo reinician"""
+        # Arrange
+        detener = threading.Event()
+
+        def escribir():
+            conn = sqlite3.connect(self.origen, timeout=5)
+            while not detener.is_set():
+                conn.execute('INSERT INTO t (dato) VALUES (?)', ('nuevo',))
+                conn.commit()
+            conn.close()
+
+        hilo = threading.Thread(target=escribir)
+        hilo.start()
+
+        # Act
+        try:
+            info = backup.realizar_respaldo(destino=self.destino, paginas=4, pausa_ms=1,
+                                            comprimir=False, origen=self.origen)
+        finally:
+            detener.set()
+            hilo.join()
+
+        # Assert: el respaldo es una foto consistente tomada al inicio
+        self.assertGreaterEqual(self._contar(info['ruta']), 2000)
+        self.assertGreater(self._contar(self.origen), 2000)
+
+    def test_rotacion_conserva_los_mas_recientes(self):
+        """Test: Solo se conservan los N respaldos más recientes"""
+        # Act
+        for _ in range(3):
+            info = backup.realizar_respaldo(destino=self.destino, pausa_ms=0, conservar=2, origen=self.origen)
+
+        # Assert
+        respaldos = backup.listar_respaldos(self.destino)
+        self.assertEqual(len(respaldos), 2)
+        self.assertEqual(respaldos[0]['archivo'], info['archivo'])
+
+    def _con_archivo_historico(self):
+        historicos = os.path.join(self.tmpdir, 'archivo')
+        os.makedirs(historicos)
+        conn = sqlite3.connect(os.path.join(historicos, 'ventas-2021.db'))
+        conn.execute('CREATE TABLE venta (id INTEGER PRIMARY KEY, total REAL)')
+        conn.execute('INSERT INTO venta (id, total) VALUES (1, 9.5)')
+        conn.commit()
+        conn.close()
+        conn = sqlite3.connect(self.origen)
+        conn.execute('CREATE TABLE venta_archivo (periodo TEXT PRIMARY KEY, archivo TEXT NOT NULL)')
+        conn.execute("INSERT INTO venta_archivo VALUES ('2021', 'ventas-2021.db'), ('2022', 'ventas-2022.db')")
+        conn.commit()
+        conn.close()
+        return historicos
+
+    def test_respaldo_incluye_archivos_historicos(self):
+        """Test: Los archivos históricos registrados se copian junto al respaldo"""
+        # Arrange
+        historicos = self._con_archivo_historico()
+
+        # Act
+        info = backup.realizar_respaldo(destino=self.destino, pausa_ms=0, comprimir=False,
+                                        origen=self.origen, directorio_historicos=historicos)
+
+        # Assert
+        self.assertEqual(info['archivos_historicos'], ['ventas-2021.db'])
+        self.assertEqual(info['historicos_faltantes'], ['ventas-2022.db'])
+        copia = os.path.join(backup.directorio_archivos(self.destino, info['archivo']), 'ventas-2021.db')
+        conn = sqlite3.connect(copia)
+        self.assertEqual(conn.execute('SELECT total FROM venta').fetchall(), [(9.5,)])
+        conn.close()
+        self.assertEqual(backup.listar_respaldos(self.destino)[0]['archivos_historicos'], ['ventas-2021.db'])
+
+    def test_rotacion_elimina_los_archivos_historicos(self):
+        """Test: Al rotar un respaldo se borran también sus archivos históricos"""
+        # Arrange
+        historicos = self._con_archivo_historico()
+
+        # Act
+        for _ in range(3):
+            backup.realizar_respaldo(destino=self.destino, pausa_ms=0, conservar=1,
+                                     origen=self.origen, directorio_historicos=historicos)
+
+        # Assert
+        self.assertEqual(len([f for f in os.listdir(self.destino) if f.endswith(backup.SUFIJO_ARCHIVOS)]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
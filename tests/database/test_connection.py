@@ -0,0 +1,285 @@
+"""
+Pruebas unitarias para el pool de conexiones
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from app.database import connection
+from app.database.connection import ConnectionPool, PooledConnection
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Suite de pruebas para ConnectionPool"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'test.db')
+        self.pool = ConnectionPool(self.db_path, max_size=2, timeout=0.2)
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.pool.close_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_reutiliza_conexion_del_mismo_hilo(self):
+        """Test: Una conexión devuelta se reutiliza en la siguiente petición"""
+        # Act
+        primera = self.pool.acquire()
+        self.pool.release(primera)
+        segunda = self.pool.acquire()
+        self.pool.release(segunda)
+
+        # Assert
+        self.assertIs(primera, segunda)
+        stats = self.pool.stats()
+        self.assertEqual(stats['creadas'], 1)
+        self.assertEqual(stats['reutilizadas_mismo_hilo'], 1)
+        self.assertEqual(stats['libres'], 1)
+
+    def test_close_devuelve_al_pool(self):
+        """Test: close() de la envoltura no cierra la conexión real"""
+        # Arrange
+        conn = PooledConnection(self.pool, self.pool.acquire())
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+
+        # Act
+        conn.close()
+        conn.close()  # idempotente
+
+        # Assert
+        stats = self.pool.stats()
+        self.assertEqual(stats['en_uso'], 0)
+        self.assertEqual(stats['libres'], 1)
+
+    def test_descarta_transaccion_pendiente_al_devolver(self):
+        """Test: Lo que no se confirmó se revierte al devolver la conexión"""
+        # Arrange
+        conn = PooledConnection(self.pool, self.pool.acquire())
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+        conn.execute('INSERT INTO t VALUES (1)')
+
+        # Act
+        conn.close()
+        conn = PooledConnection(self.pool, self.pool.acquire())
+        total = conn.execute('SELECT COUNT(*) FROM t').fetchone()[0]
+        conn.close()
+
+        # Assert
+        self.assertEqual(total, 0)
+
+    def test_timeout_cuando_el_pool_esta_lleno(self):
+        """Test: Si no hay cupo se espera y luego se lanza un error"""
+        # Arrange
+        a = self.pool.acquire()
+        b = self.pool.acquire()
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            self.pool.acquire()
+        self.assertIn('No hay conexiones disponibles', str(context.exception))
+        self.assertEqual(self.pool.stats()['timeouts'], 1)
+
+        self.pool.release(a)
+        self.pool.release(b)
+
+    def test_espera_hasta_que_se_libere_una_conexion(self):
+        """Test: Un hilo en espera recibe la conexión que otro devuelve"""
+        # Arrange
+        a = self.pool.acquire()
+        b = self.pool.acquire()
+        threading.Timer(0.05, self.pool.release, args=(a,)).start()
+
+        # Act
+        c = self.pool.acquire()
+
+        # Assert
+        self.assertIs(c, a)
+        self.assertEqual(self.pool.stats()['esperas'], 1)
+        self.pool.release(b)
+        self.pool.release(c)
+
+
+    def test_aplica_perfil_de_pragmas(self):
+        """Test: Cada conexión nueva recibe los PRAGMA del perfil configurado"""
+        # Arrange
+        pool = ConnectionPool(self.db_path, max_size=1, profile='rendimiento')
+
+        # Act
+        raw = pool.acquire()
+        journal = raw.execute('PRAGMA journal_mode').fetchone()[0]
+        synchronous = raw.execute('PRAGMA synchronous').fetchone()[0]
+        pool.release(raw)
+        pool.close_all()
+
+        # Assert
+        self.assertEqual(journal, 'wal')
+        self.assertEqual(synchronous, 1)  # NORMAL
+
+    def test_perfil_desconocido(self):
+        """Test: Un perfil inexistente se rechaza al abrir la conexión"""
+        # Arrange
+        pool = ConnectionPool(self.db_path, max_size=1, profile='no_existe')
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            pool.acquire()
+        self.assertIn('Perfil de base de datos desconocido', str(context.exception))
+
+class TestTransaccion(unittest.TestCase):
+    """Suite de pruebas para la unidad de trabajo transaccion()"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.pool = ConnectionPool(os.path.join(self.tmpdir, 'test.db'), max_size=2)
+        self.patcher = patch.object(connection, '_pool', self.pool)
+        self.patcher.start()
+        conn = connection.get_connection()
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.patcher.stop()
+        self.pool.close_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _contar(self):
+        conn = connection.get_connection()
+        total = conn.execute('SELECT COUNT(*) FROM t').fetchone()[0]
+        conn.close()
+        return total
+
+    def _insertar(self, valor):
+        # Imita a un repositorio: conexión propia, commit y close
+        conn = connection.get_connection()
+        conn.cursor().execute('INSERT INTO t VALUES (?)', (valor,))
+        conn.commit()
+        conn.close()
+
+    def test_comparte_conexion_y_confirma_al_final(self):
+        """Test: Los repositorios dentro del bloque usan una sola conexión"""
+        # Act
+        with connection.transaccion():
+            self._insertar(1)
+            self._insertar(2)
+            self.assertTrue(connection.en_transaccion())
+
+        # Assert
+        self.assertFalse(connection.en_transaccion())
+        self.assertEqual(self._contar(), 2)
+        self.assertEqual(self.pool.stats()['creadas'], 1)
+
+    def test_revierte_todo_si_falla(self):
+        """Test: Una excepción deshace también lo que los repositorios 'confirmaron'"""
+        # Act
+        with self.assertRaises(ValueError):
+            with connection.transaccion():
+                self._insertar(1)
+                raise ValueError("fallo a mitad de la venta")
+
+        # Assert
+        self.assertEqual(self._contar(), 0)
+        self.assertEqual(self.pool.stats()['en_uso'], 0)
+
+    def test_transaccion_anidada_usa_savepoint(self):
+        """Test: Un bloque interno que falla no deshace el externo"""
+        # Act
+        with connection.transaccion():
+            self._insertar(1)
+            with self.assertRaises(ValueError):
+                with connection.transaccion():
+                    self._insertar(2)
+                    raise ValueError("falla solo el bloque interno")
+            self._insertar(3)
+
+        # Assert
+        self.assertEqual(self._contar(), 2)
+
+
+
+class TestLecturas(unittest.TestCase):
+    """Suite de pruebas para el pool de solo lectura y los snapshots"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, 'test.db')
+        self.pool = ConnectionPool(path, max_size=2)
+        self.read_pool = ConnectionPool(path, max_size=2, read_only=True)
+        self.patchers = [
+            patch.object(connection, '_pool', self.pool),
+            patch.object(connection, '_read_pool', self.read_pool),
+        ]
+        for p in self.patchers:
+            p.start()
+        conn = connection.get_connection()
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.execute('INSERT INTO t VALUES (1)')
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        for p in self.patchers:
+            p.stop()
+        self.pool.close_all()
+        self.read_pool.close_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _contar(self):
+        conn = connection.get_read_connection()
+        total = conn.execute('SELECT COUNT(*) FROM t').fetchone()[0]
+        conn.close()
+        return total
+
+    def _insertar_en_otro_hilo(self):
+        def insertar():
+            conn = connection.get_connection()
+            conn.execute('INSERT INTO t VALUES (2)')
+            conn.commit()
+            conn.close()
+        hilo = threading.Thread(target=insertar)
+        hilo.start()
+        hilo.join()
+
+    def test_conexion_de_lectura_no_puede_escribir(self):
+        """Test: Las conexiones del pool de lectura se abren con mode=ro"""
+        # Arrange
+        conn = connection.get_read_connection()
+
+        # Act & Assert
+        with self.assertRaises(sqlite3.OperationalError):
+            conn.execute('INSERT INTO t VALUES (2)')
+        conn.close()
+
+    def test_dentro_de_transaccion_lee_lo_escrito(self):
+        """Test: Dentro de transaccion() las lecturas usan la misma conexión"""
+        with connection.transaccion():
+            conn = connection.get_connection()
+            conn.execute('INSERT INTO t VALUES (2)')
+            self.assertEqual(self._contar(), 2)
+
+    def test_snapshot_no_ve_escrituras_concurrentes(self):
+        """Test: lectura_consistente() mantiene la misma foto durante el bloque"""
+        with connection.lectura_consistente():
+            antes = self._contar()
+            self._insertar_en_otro_hilo()
+            despues = self._contar()
+
+        # Assert
+        self.assertEqual(antes, 1)
+        self.assertEqual(despues, 1)
+        self.assertEqual(self._contar(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
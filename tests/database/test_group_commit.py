@@ -0,0 +1,177 @@
+"""
+Pruebas unitarias para el escritor con commit agrupado
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from app.database import connection
+from app.database.connection import ConnectionPool, get_connection
+from app.database.group_commit import GroupCommitWriter
+
+
+def _insertar(valor):
+    # Imita a un repositorio: conexión propia, commit y close
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO t (x) VALUES (?)', (valor,))
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def _fallar(valor):
+    _insertar(valor)
+    raise Exception("Stock insuficiente")
+
+
+class TestGroupCommitWriter(unittest.TestCase):
+    """Suite de pruebas para GroupCommitWriter"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.pool = ConnectionPool(os.path.join(self.tmpdir, 'test.db'), max_size=4)
+        self.patcher = patch.object(connection, '_pool', self.pool)
+        self.patcher.start()
+        conn = get_connection()
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, x INTEGER)')
+        conn.commit()
+        conn.close()
+        self.writer = GroupCommitWriter(ventana_ms=50, max_lote=10)
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.writer.stop()
+        self.patcher.stop()
+        self.pool.close_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _valores(self):
+        conn = get_connection()
+        filas = conn.execute('SELECT x FROM t ORDER BY x').fetchall()
+        conn.close()
+        return [f[0] for f in filas]
+
+    def test_cada_llamador_recibe_su_resultado(self):
+        """Test: Trabajos concurrentes se agrupan y cada uno recibe su id"""
+        # Arrange
+        resultados = {}
+
+        def enviar(valor):
+            resultados[valor] = self.writer.submit(_insertar, valor)
+
+        hilos = [threading.Thread(target=enviar, args=(i,)) for i in range(5)]
+
+        # Act
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        # Assert
+        self.assertEqual(self._valores(), [0, 1, 2, 3, 4])
+        self.assertEqual(len(set(resultados.values())), 5)
+        stats = self.writer.stats()
+        self.assertEqual(stats['trabajos'], 5)
+        self.assertLess(stats['lotes'], 5)
+
+    def test_error_solo_afecta_a_su_trabajo(self):
+        """Test: Un trabajo que falla se revierte sin afectar al resto del lote"""
+        # Arrange
+        errores = []
+
+        def enviar(fn, valor):
+            try:
+                self.writer.submit(fn, valor)
+            except Exception as e:
+                errores.append(str(e))
+
+        hilos = [
+            threading.Thread(target=enviar, args=(_insertar, 1)),
+            threading.Thread(target=enviar, args=(_fallar, 2)),
+            threading.Thread(target=enviar, args=(_insertar, 3)),
+        ]
+
+        # Act
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        # Assert
+        self.assertEqual(errores, ["Stock insuficiente"])
+        self.assertEqual(self._valores(), [1, 3])
+        self.assertEqual(self.writer.stats()['errores'], 1)
+
+    def test_stop_concurrente_no_deja_llamadores_colgados(self):
+        """Test: Los envíos que compiten con stop() terminan con resultado o con error"""
+        # Arrange
+        terminados = []
+
+        def enviar(valor):
+            try:
+                self.writer.submit(_insertar, valor)
+                terminados.append('ok')
+            except Exception:
+                terminados.append('error')
+
+        hilos = [threading.Thread(target=enviar, args=(i,), daemon=True) for i in range(40)]
+
+        # Act
+        for i, h in enumerate(hilos):
+            h.start()
+            if i == 20:
+                threading.Thread(target=self.writer.stop, daemon=True).start()
+        for h in hilos:
+            h.join(timeout=10)
+
+        # Assert
+        self.assertFalse(any(h.is_alive() for h in hilos))
+        self.assertEqual(len(terminados), 40)
+        self.assertEqual(terminados.count('ok'), len(self._valores()))
+
+    def test_stop_con_lote_trabado_rechaza_la_cola(self):
+        """Test: Si el lote en curso no termina a tiempo, los trabajos en cola reciben error"""
+        # Arrange
+        empezo = threading.Event()
+        liberar = threading.Event()
+        errores = []
+        writer = GroupCommitWriter(ventana_ms=0, max_lote=1)
+
+        def enviar(fn, valor):
+            try:
+                writer.submit(fn, valor)
+            except Exception as e:
+                errores.append(str(e))
+
+        def trabado(valor):
+            empezo.set()
+            liberar.wait(10)
+            return _insertar(valor)
+
+        primero = threading.Thread(target=enviar, args=(trabado, 1), daemon=True)
+        primero.start()
+        empezo.wait(5)
+        segundo = threading.Thread(target=enviar, args=(_insertar, 2), daemon=True)
+        segundo.start()
+        while not writer.stats()['en_cola']:
+            pass
+
+        # Act
+        writer.stop(timeout=0.1)
+        segundo.join(timeout=5)
+        liberar.set()
+        primero.join(timeout=5)
+
+        # Assert
+        self.assertFalse(segundo.is_alive() or primero.is_alive())
+        self.assertEqual(errores, ["El escritor de la base de datos está detenido"])
+        self.assertEqual(self._valores(), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Pruebas unitarias para las migraciones versionadas
+Utiliza unittest y una base de datos SQLite en memoria
+"""
+import sqlite3
+import unittest
+from app.database.migrations import MIGRATIONS, get_version, run_migrations, verificar_codigo_barras_unico
+
+
+class TestMigrations(unittest.TestCase):
+    """Suite de pruebas para run_migrations"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE t (x INTEGER, y INTEGER)')
+        self.conn.commit()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.conn.close()
+
+    def test_aplica_en_orden_y_guarda_version(self):
+        """Test: Las migraciones pendientes se aplican en orden ascendente"""
+        # Arrange
+        migraciones = [
+            (2, 'segunda', ['CREATE INDEX idx_t_y ON t (y)']),
+            (1, 'primera', ['CREATE INDEX idx_t_x ON t (x)']),
+        ]
+
+        # Act
+        aplicadas = run_migrations(self.conn, migraciones)
+
+        # Assert
+        self.assertEqual(aplicadas, [1, 2])
+        self.assertEqual(get_version(self.conn), 2)
+
+    def test_no_reaplica_migraciones(self):
+        """Test: Una segunda ejecución no vuelve a aplicar nada"""
+        # Arrange
+        migraciones = [(1, 'primera', ['CREATE INDEX idx_t_x ON t (x)'])]
+        run_migrations(self.conn, migraciones)
+
+        # Act
+        aplicadas = run_migrations(self.conn, migraciones)
+
+        # Assert
+        self.assertEqual(aplicadas, [])
+
+    def test_migracion_fallida_se_revierte(self):
+        """Test: Si un paso falla no queda nada aplicado de esa migración"""
+        # Arrange
+        migraciones = [(1, 'rota', [
+            'CREATE INDEX idx_t_x ON t (x)',
+            'CREATE INDEX idx_malo ON tabla_inexistente (x)',
+        ])]
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            run_migrations(self.conn, migraciones)
+        self.assertIn('migración 1', str(context.exception))
+        self.assertEqual(get_version(self.conn), 0)
+        indices = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        self.assertEqual(indices, [])
+
+    def test_pasos_con_funcion(self):
+        """Test: Un paso puede ser una función que recibe el cursor"""
+        # Arrange
+        llamadas = []
+        migraciones = [(1, 'funcion', [lambda cursor: llamadas.append(cursor)])]
+
+        # Act
+        run_migrations(self.conn, migraciones)
+
+        # Assert
+        self.assertEqual(len(llamadas), 1)
+
+    def test_versiones_unicas(self):
+        """Test: No hay dos migraciones con la misma versión"""
+        versiones = [m[0] for m in MIGRATIONS]
+        self.assertEqual(len(versiones), len(set(versiones)))
+
+
+class TestCodigoBarrasUnico(unittest.TestCase):
+    """Suite de pruebas para el índice único de códigos de barras"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE producto (id INTEGER PRIMARY KEY, codigo_barras TEXT, activo INTEGER DEFAULT 1)')
+        self.conn.executemany('INSERT INTO producto (id, codigo_barras) VALUES (?, ?)', [(1, '779'), (2, '779'), (3, ' ')])
+        self.conn.commit()
+        self.migracion = [m for m in MIGRATIONS if m[0] == 8]
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.conn.close()
+
+    def _indice(self):
+        return self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'idx_producto_codigo_barras_activo'"
+        ).fetchone()
+
+    def test_repetidos_avisan_sin_crear_el_indice(self):
+        """Test: Con códigos repetidos la migración avisa y no crea el índice"""
+        # Act
+        with self.assertLogs('app.database.migrations', level='WARNING') as logs:
+            run_migrations(self.conn, self.migracion)
+
+        # Assert
+        self.assertIn('779', logs.output[0])
+        self.assertIsNone(self._indice())
+        self.assertEqual(get_version(self.conn), 8)
+
+    def test_arranque_crea_el_indice_al_corregir_repetidos(self):
+        """Test: Corregidos los repetidos, el siguiente arranque crea el índice"""
+        # Arrange
+        with self.assertLogs('app.database.migrations', level='WARNING'):
+            run_migrations(self.conn, self.migracion)
+            pendientes = verificar_codigo_barras_unico(self.conn)
+        self.conn.execute('UPDATE producto SET activo = 0 WHERE id = 2')
+        self.conn.commit()
+
+        # Act
+        repetidos = verificar_codigo_barras_unico(self.conn)
+
+        # Assert
+        self.assertEqual(pendientes, ['779'])
+        self.assertEqual(repetidos, [])
+        self.assertIsNotNone(self._indice())
+
+
+if __name__ == '__main__':
+    unittest.main()
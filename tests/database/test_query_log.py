@@ -0,0 +1,114 @@
+"""
+Pruebas unitarias para la instrumentación de consultas
+Utiliza unittest, mocking y una base de datos SQLite en memoria
+"""
+import sqlite3
+import unittest
+from unittest.mock import Mock, patch
+from app.database import query_log
+from app.database.query_log import InstrumentedCursor
+
+
+class TestQueryLog(unittest.TestCase):
+    """Suite de pruebas para InstrumentedCursor y el slow query log"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        query_log.reset_query_stats()
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE caja (id INTEGER PRIMARY KEY, fk_usuario INTEGER, estado TEXT)')
+        self.conn.executemany('INSERT INTO caja (fk_usuario, estado) VALUES (?, ?)',
+                              [(i % 3, 'Abierta') for i in range(10)])
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.conn.close()
+        query_log.reset_query_stats()
+
+    def _consultar(self):
+        cursor = InstrumentedCursor(self.conn.cursor(), self.conn)
+        cursor.execute("SELECT * FROM caja WHERE fk_usuario = ? AND estado = 'Abierta'", (1,))
+        return cursor.fetchall()
+
+    def test_registra_tiempo_filas_y_origen(self):
+        """Test: Cada sentencia acumula ejecuciones y filas"""
+        # Act
+        filas = self._consultar()
+        self._consultar()
+
+        # Assert
+        stats = query_log.get_query_stats()['sentencias']
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['ejecuciones'], 2)
+        self.assertEqual(stats[0]['filas'], 2 * len(filas))
+        # Fuera de app.* no hay método de repositorio que reportar
+        self.assertEqual(stats[0]['origen'], 'desconocido')
+
+    def test_filas_afectadas_en_update(self):
+        """Test: En INSERT/UPDATE/DELETE se registran las filas afectadas"""
+        # Act
+        cursor = InstrumentedCursor(self.conn.cursor(), self.conn)
+        cursor.execute("UPDATE caja SET estado = 'Cerrada' WHERE fk_usuario = ?", (0,))
+        cursor.close()
+
+        # Assert
+        stats = query_log.get_query_stats()['sentencias']
+        self.assertEqual(stats[0]['filas'], 4)
+
+    @patch.object(query_log, 'SLOW_QUERY_MS', 0)
+    def test_consulta_lenta_incluye_plan_y_marca_scan(self):
+        """Test: Sobre el umbral se guarda el EXPLAIN QUERY PLAN y se marca el SCAN"""
+        # Act
+        with self.assertLogs('app.database.slow_query', level='WARNING') as logs:
+            self._consultar()
+
+        # Assert
+        lentas = query_log.get_query_stats()['lentas']
+        self.assertEqual(len(lentas), 1)
+        self.assertTrue(lentas[0]['scan_completo'])
+        self.assertTrue(any('SCAN caja' in p for p in lentas[0]['plan']))
+        self.assertIn('SCAN COMPLETO', logs.output[0])
+
+    @patch.object(query_log, 'SLOW_QUERY_MS', 0)
+    def test_con_indice_no_marca_scan(self):
+        """Test: Con el índice adecuado la consulta ya no se marca como SCAN"""
+        # Arrange
+        self.conn.execute('CREATE INDEX idx_caja_usuario_estado ON caja (fk_usuario, estado)')
+
+        # Act
+        with self.assertLogs('app.database.slow_query', level='WARNING'):
+            self._consultar()
+
+        # Assert
+        lentas = query_log.get_query_stats()['lentas']
+        self.assertFalse(lentas[0]['scan_completo'])
+
+    def test_consultas_rapidas_no_recorren_la_pila(self):
+        """Test: Bajo el umbral el origen solo se busca la primera vez que aparece la sentencia"""
+        # Arrange
+        origen = Mock(wraps=query_log._origen)
+
+        # Act
+        with patch.object(query_log, '_origen', origen):
+            for _ in range(5):
+                self._consultar()
+
+        # Assert
+        self.assertEqual(origen.call_count, 1)
+        self.assertEqual(query_log.get_query_stats()['sentencias'][0]['ejecuciones'], 5)
+
+    @patch.object(query_log, 'SLOW_QUERY_MS', 0)
+    def test_consultas_lentas_anotan_origen(self):
+        """Test: Cada consulta lenta se registra con su origen"""
+        # Act
+        with self.assertLogs('app.database.slow_query', level='WARNING'):
+            self._consultar()
+            self._consultar()
+
+        # Assert
+        lentas = query_log.get_query_stats()['lentas']
+        self.assertEqual([l['origen'] for l in lentas], ['desconocido', 'desconocido'])
+
+
+if __name__ == '__main__':
+    unittest.main()
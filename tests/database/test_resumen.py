@@ -0,0 +1,86 @@
+"""
+Pruebas de integración para la tabla resumen_ventas
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from datetime import datetime
+from app.database import archive
+from app.database.resumen import reconstruir_resumen
+from app.repositories.venta_repository import VentaRepository
+from app.services.venta_service import VentaService
+from tests.base_datos import BaseDatosTestCase, items
+
+
+class TestResumenVentas(BaseDatosTestCase):
+    """Suite de pruebas para el mantenimiento y la lectura del resumen"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Leche', 2.0)
+        self.crear_producto(2, 'Pan', 0.5)
+        self.crear_caja(1, '2023-03-01 08:00:00', 'Cerrada')
+        self.crear_caja(2, '2025-05-01 08:00:00')
+        # Historial cargado sin pasar por crear_venta
+        for id in (1, 2):
+            self.ejecutar("INSERT INTO venta (id, fecha, total, fk_usuario, fk_caja, metodo_pago) VALUES (?, ?, 4.5, 1, 1, 'Efectivo')",
+                          (id, f'2023-03-01 {9 + id}:00:00'))
+            self.ejecutar_muchos('INSERT INTO detalle_venta (fk_venta, fk_producto, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?)',
+                                 [(id, 1, 2, 2.0, 4.0), (id, 2, 1, 0.5, 0.5)])
+
+    def test_reconstruir_desde_el_historial(self):
+        """Test: La reconstrucción agrega las ventas existentes por día"""
+        # Act
+        reconstruir_resumen(origen=self.path)
+        resumen = VentaRepository.resumen()
+
+        # Assert
+        self.assertEqual(resumen, [{'dia': '2023-03-01', 'ventas': 2, 'cantidad': 6, 'importe': 9.0}])
+
+    def test_venta_nueva_actualiza_el_resumen(self):
+        """Test: crear_venta suma la venta en el resumen en el mismo commit"""
+        # Act
+        venta = VentaService.realizar_venta(items((1, 3), (2, 2)), None, 1, 'Tarjeta', 7.0, 'ref-1')
+        resumen = VentaRepository.resumen(agrupar=['dia', 'metodo_pago', 'fk_caja'])
+
+        # Assert
+        self.assertEqual(resumen, [
+            {'dia': venta.fecha[:10], 'metodo_pago': 'Tarjeta', 'fk_caja': 2, 'ventas': 1, 'cantidad': 5, 'importe': 7.0},
+        ])
+
+    def test_agrupar_por_producto(self):
+        """Test: Por producto, ventas cuenta los tickets que lo incluyen"""
+        # Arrange
+        reconstruir_resumen(origen=self.path)
+
+        # Act
+        resumen = VentaRepository.resumen('2023-03-01', '2023-03-01', agrupar=['fk_producto'])
+
+        # Assert
+        self.assertEqual(resumen, [
+            {'fk_producto': 1, 'ventas': 2, 'cantidad': 4, 'importe': 8.0},
+            {'fk_producto': 2, 'ventas': 2, 'cantidad': 2, 'importe': 1.0},
+        ])
+
+    def test_reconstruir_incluye_ventas_archivadas(self):
+        """Test: Las ventas movidas al archivo histórico siguen en el resumen"""
+        # Arrange
+        archive.archivar_ventas(meses=12, ahora=datetime(2025, 6, 1), origen=self.path)
+
+        # Act
+        reconstruir_resumen(origen=self.path)
+
+        # Assert
+        self.assertEqual(VentaRepository.resumen(agrupar=['hora'])[0], {'hora': 10, 'ventas': 1, 'cantidad': 3, 'importe': 4.5})
+
+    def test_agrupar_por_columna_desconocida(self):
+        """Test: Solo se puede agrupar por las claves del resumen"""
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            VentaRepository.resumen(agrupar=['total; DROP TABLE venta'])
+
+        self.assertIn("No se puede agrupar", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Pruebas unitarias para la política de reintentos ante bloqueos
+Utiliza unittest y mocking
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+from app.database import connection, retry
+from app.database.connection import ConnectionPool, get_connection
+from app.database.retry import con_reintentos, es_bloqueo, reintentar_si_bloqueada
+
+
+class TestRetry(unittest.TestCase):
+    """Suite de pruebas para con_reintentos y reintentar_si_bloqueada"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.bloqueo = sqlite3.OperationalError('database is locked')
+        # Sin esperas reales en los tests
+        self.sleep_patcher = patch('app.database.retry.time.sleep')
+        self.mock_sleep = self.sleep_patcher.start()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.sleep_patcher.stop()
+
+    def test_es_bloqueo(self):
+        """Test: Solo 'locked'/'busy' cuentan como bloqueo transitorio"""
+        self.assertTrue(es_bloqueo(self.bloqueo))
+        self.assertTrue(es_bloqueo(sqlite3.OperationalError('database table is locked')))
+        self.assertFalse(es_bloqueo(sqlite3.OperationalError('no such table: venta')))
+        self.assertFalse(es_bloqueo(Exception('database is locked')))
+
+    def test_reintenta_hasta_tener_exito(self):
+        """Test: Un bloqueo breve se resuelve con reintentos"""
+        # Arrange
+        fn = Mock(side_effect=[self.bloqueo, self.bloqueo, 'ok'])
+        antes = retry.get_retry_stats()
+
+        # Act
+        resultado = con_reintentos(fn, 1, x=2)
+
+        # Assert
+        self.assertEqual(resultado, 'ok')
+        self.assertEqual(fn.call_count, 3)
+        fn.assert_called_with(1, x=2)
+        despues = retry.get_retry_stats()
+        self.assertEqual(despues['reintentos'] - antes['reintentos'], 2)
+        self.assertEqual(despues['exitos_tras_reintento'] - antes['exitos_tras_reintento'], 1)
+
+    def test_backoff_exponencial_con_tope(self):
+        """Test: Cada espera está acotada por base * 2^intento y por el máximo"""
+        # Arrange
+        fn = Mock(side_effect=[self.bloqueo] * 6 + ['ok'])
+
+        # Act
+        with patch('app.database.retry.random.uniform', side_effect=lambda a, b: b):
+            con_reintentos(fn)
+
+        # Assert
+        esperas = [c.args[0] * 1000 for c in self.mock_sleep.call_args_list]
+        esperados = [min(retry.RETRY_MAX_MS, retry.RETRY_BASE_MS * 2 ** i) for i in range(6)]
+        for real, esperado in zip(esperas, esperados):
+            self.assertAlmostEqual(real, esperado)
+
+    @patch.object(retry, 'RETRY_DEADLINE_MS', 0)
+    def test_abandona_al_vencer_el_plazo(self):
+        """Test: Pasado el plazo se abandona con un mensaje para el cajero"""
+        # Arrange
+        fn = Mock(side_effect=self.bloqueo)
+        antes = retry.get_retry_stats()['abandonos']
+
+        # Act & Assert
+        with patch('app.database.retry.random.uniform', return_value=1.0):
+            with self.assertRaises(Exception) as context:
+                con_reintentos(fn)
+        self.assertIn('ocupada', str(context.exception))
+        self.assertEqual(retry.get_retry_stats()['abandonos'] - antes, 1)
+
+    def test_no_reintenta_otros_errores(self):
+        """Test: Los errores que no son de bloqueo se propagan de inmediato"""
+        # Arrange
+        fn = Mock(side_effect=Exception('Stock insuficiente'))
+
+        # Act & Assert
+        with self.assertRaises(Exception):
+            con_reintentos(fn)
+        self.assertEqual(fn.call_count, 1)
+
+    @patch('app.database.retry.en_transaccion', return_value=True)
+    def test_no_reintenta_dentro_de_transaccion(self, mock_en_transaccion):
+        """Test: Dentro de transaccion() el decorador no reintenta"""
+        # Arrange
+        fn = Mock(side_effect=self.bloqueo)
+        decorada = reintentar_si_bloqueada(fn)
+
+        # Act & Assert
+        with self.assertRaises(sqlite3.OperationalError):
+            decorada()
+        self.assertEqual(fn.call_count, 1)
+
+
+class TestRetryConBloqueoReal(unittest.TestCase):
+    """Reintentos contra un bloqueo de escritura real, con el perfil por defecto"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'test.db')
+        self.pool = ConnectionPool(self.path, max_size=2)
+        self.pool_patcher = patch.object(connection, '_pool', self.pool)
+        self.pool_patcher.start()
+        conn = get_connection()
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.pool_patcher.stop()
+        self.pool.close_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _insertar(self):
+        conn = get_connection()
+        try:
+            conn.execute('INSERT INTO t (x) VALUES (1)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def test_bloqueo_breve_se_resuelve_reintentando(self):
+        """Test: La espera de SQLite es corta y el backoff llega a reintentar"""
+        # Arrange: otra conexión retiene el bloqueo de escritura 1 segundo
+        bloqueo = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        bloqueo.execute('BEGIN IMMEDIATE')
+        liberar = threading.Timer(1.0, bloqueo.rollback)
+        liberar.start()
+        antes = retry.get_retry_stats()
+
+        # Act
+        inicio = time.perf_counter()
+        try:
+            con_reintentos(self._insertar)
+        finally:
+            liberar.join()
+            bloqueo.close()
+        transcurrido = time.perf_counter() - inicio
+
+        # Assert
+        despues = retry.get_retry_stats()
+        self.assertGreaterEqual(despues['reintentos'] - antes['reintentos'], 1)
+        self.assertEqual(despues['exitos_tras_reintento'] - antes['exitos_tras_reintento'], 1)
+        self.assertEqual(despues['abandonos'], antes['abandonos'])
+        self.assertLess(transcurrido, retry.RETRY_DEADLINE_MS / 1000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Pruebas unitarias para las inserciones masivas
+Utiliza unittest y una base de datos SQLite en memoria
+"""
+import sqlite3
+import unittest
+from unittest.mock import Mock
+from app.repositories.bulk import insertar_lote, sql_insert
+
+
+class TestInsertarLote(unittest.TestCase):
+    """Suite de pruebas para insertar_lote"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE detalle (id INTEGER PRIMARY KEY, fk_venta INTEGER, cantidad INTEGER)')
+
+    def tearDown(self):
+        """Limpieza después de cada test"""
+        self.conn.close()
+
+    def test_sql_insert(self):
+        """Test: El INSERT se arma con un marcador por columna"""
+        self.assertEqual(
+            sql_insert('detalle', ('fk_venta', 'cantidad')),
+            'INSERT INTO detalle (fk_venta, cantidad) VALUES (?, ?)'
+        )
+
+    def test_inserta_todas_las_filas(self):
+        """Test: Miles de filas se insertan con un solo executemany"""
+        # Arrange
+        filas = [(1, i) for i in range(5000)]
+
+        # Act
+        total = insertar_lote(self.conn.cursor(), 'detalle', ('fk_venta', 'cantidad'), filas)
+
+        # Assert
+        self.assertEqual(total, 5000)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*), SUM(cantidad) FROM detalle').fetchone(), (5000, sum(range(5000))))
+
+    def test_una_sola_preparacion(self):
+        """Test: Se usa executemany y no un execute por fila"""
+        # Arrange
+        cursor = Mock()
+
+        # Act
+        insertar_lote(cursor, 'detalle', ('fk_venta', 'cantidad'), ((1, n) for n in range(3)))
+
+        # Assert
+        cursor.executemany.assert_called_once_with(
+            'INSERT INTO detalle (fk_venta, cantidad) VALUES (?, ?)', [(1, 0), (1, 1), (1, 2)]
+        )
+        cursor.execute.assert_not_called()
+
+    def test_lote_vacio(self):
+        """Test: Un lote vacío no ejecuta nada"""
+        # Arrange
+        cursor = Mock()
+
+        # Act
+        total = insertar_lote(cursor, 'detalle', ('fk_venta', 'cantidad'), [])
+
+        # Assert
+        self.assertEqual(total, 0)
+        cursor.executemany.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -55,21 +55,21 @@ class TestCajaRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado, caja)
 
-    @patch('app.repositories.caja_repository.get_connection')
-    def test_obtener_por_id_existe(self, mock_get_connection):
+    @patch('app.repositories.caja_repository.get_read_connection')
+    def test_obtener_por_id_existe(self, mock_get_read_connection):
         """Test: Obtener caja por ID cuando existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = (1, '2025-12-25', None, 100.0, None, 1, 'Abierta')
 
         # Act
         resultado = CajaRepository.obtener_por_id(1)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM caja WHERE id = ?', (1,))
         mock_conn.close.assert_called_once()
@@ -77,62 +77,62 @@ class TestCajaRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado.fecha_apertura, '2025-12-25')
 
-    @patch('app.repositories.caja_repository.get_connection')
-    def test_obtener_por_id_no_existe(self, mock_get_connection):
+    @patch('app.repositories.caja_repository.get_read_connection')
+    def test_obtener_por_id_no_existe(self, mock_get_read_connection):
         """Test: Obtener caja por ID cuando no existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = None
 
         # Act
         resultado = CajaRepository.obtener_por_id(999)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM caja WHERE id = ?', (999,))
         mock_conn.close.assert_called_once()
         self.assertIsNone(resultado)
 
-    @patch('app.repositories.caja_repository.get_connection')
-    def test_obtener_caja_abierta_existe(self, mock_get_connection):
+    @patch('app.repositories.caja_repository.get_read_connection')
+    def test_obtener_caja_abierta_existe(self, mock_get_read_connection):
         """Test: Obtener caja abierta cuando existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = (1, '2025-12-25', None, 100.0, None, 1, 'Abierta')
 
         # Act
         resultado = CajaRepository.obtener_caja_abierta()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with("SELECT * FROM caja WHERE estado = 'Abierta' ORDER BY fecha_apertura DESC LIMIT 1")
         mock_conn.close.assert_called_once()
         self.assertIsInstance(resultado, Caja)
         self.assertEqual(resultado.estado, 'Abierta')
 
-    @patch('app.repositories.caja_repository.get_connection')
-    def test_obtener_caja_abierta_no_existe(self, mock_get_connection):
+    @patch('app.repositories.caja_repository.get_read_connection')
+    def test_obtener_caja_abierta_no_existe(self, mock_get_read_connection):
         """Test: Obtener caja abierta cuando no existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = None
 
         # Act
         resultado = CajaRepository.obtener_caja_abierta()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with("SELECT * FROM caja WHERE estado = 'Abierta' ORDER BY fecha_apertura DESC LIMIT 1")
         mock_conn.close.assert_called_once()
@@ -160,14 +160,14 @@ class TestCajaRepository(unittest.TestCase):
         mock_conn.commit.assert_called_once()
         mock_conn.close.assert_called_once()
 
-    @patch('app.repositories.caja_repository.get_connection')
-    def test_listar(self, mock_get_connection):
+    @patch('app.repositories.caja_repository.get_read_connection')
+    def test_listar(self, mock_get_read_connection):
         """Test: Listar todas las cajas"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchall.return_value = [
             (1, '2025-12-25', None, 100.0, None, 1, 'Abierta'),
             (2, '2025-12-24', '2025-12-24 18:00:00', 100.0, 150.0, 1, 'Cerrada')
@@ -177,7 +177,7 @@ class TestCajaRepository(unittest.TestCase):
         resultado = CajaRepository.listar()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM caja ORDER BY fecha_apertura DESC')
         mock_conn.close.assert_called_once()
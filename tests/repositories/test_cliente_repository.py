@@ -36,7 +36,15 @@ class TestClienteRepository(unittest.TestCase):
             activo=1
         )
 
+        # Las lecturas usan el pool de solo lectura: apuntan al mismo archivo
+        self.read_patcher = patch(
+            'app.repositories.cliente_repository.get_read_connection',
+            side_effect=self._mock_get_connection
+        )
+        self.read_patcher.start()
+
     def tearDown(self):
+        self.read_patcher.stop()
         os.close(self.db_fd)
         os.unlink(self.db_path)
 
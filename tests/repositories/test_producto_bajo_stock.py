@@ -0,0 +1,109 @@
+"""
+Pruebas de integración para las alertas de stock bajo
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from unittest.mock import patch
+from app.database.connection import transaccion
+from app.repositories import producto_repository
+from app.repositories.producto_repository import ProductoRepository
+from app.services.inventario_service import InventarioService
+from app.services.venta_service import VentaService
+from tests.base_datos import BaseDatosTestCase, items
+
+
+class TestProductosBajoStock(BaseDatosTestCase):
+    """Suite de pruebas para ProductoRepository.obtener_productos_bajo_stock"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Leche', 1.0, 12, stock_minimo=10)
+        self.crear_producto(2, 'Pan', 0.5, 3, stock_minimo=5)
+        self.crear_producto(3, 'Arroz', 2.0, 50, stock_minimo=5)
+        self.crear_caja(1, '2025-05-01 08:00:00')
+
+    def _alertas(self):
+        return [p.id for p in ProductoRepository.obtener_productos_bajo_stock()]
+
+    def test_carga_inicial(self):
+        """Test: La primera consulta trae los productos en el mínimo o por debajo"""
+        # Act & Assert
+        self.assertEqual(self._alertas(), [2])
+        self.assertEqual(InventarioService.obtener_alertas_stock()[0]['nombre'], 'Pan')
+
+    def test_columnas_por_nombre(self):
+        """Test: En una base nueva activo y codigo_barras no se cruzan"""
+        # Arrange
+        self.crear_producto(4, 'Queso', 3.0, 1, stock_minimo=5, codigo_barras='7790004')
+
+        # Act
+        queso = ProductoRepository.obtener_productos_bajo_stock()[-1]
+
+        # Assert
+        self.assertEqual((queso.id, queso.activo, queso.codigo_barras), (4, 1, '7790004'))
+
+    def test_sin_escrituras_no_consulta_la_base(self):
+        """Test: Sin cambios de stock la alerta se responde desde memoria"""
+        # Arrange
+        self._alertas()
+
+        # Act
+        with patch.object(producto_repository, 'get_read_connection') as mock_conexion:
+            alertas = self._alertas()
+
+        # Assert
+        self.assertEqual(alertas, [2])
+        mock_conexion.assert_not_called()
+
+    def test_venta_y_reposicion_cruzan_el_umbral(self):
+        """Test: Una venta mete al producto en la alerta y la reposición lo saca"""
+        # Arrange
+        self._alertas()
+
+        # Act
+        venta = VentaService.realizar_venta(items((1, 2)), None, 1, 'Efectivo', 2.0, None)
+        despues_venta = self._alertas()
+        InventarioService.agregar_stock(2, 10)
+        despues_reposicion = self._alertas()
+        VentaService.anular_venta(venta.id)
+        despues_anulacion = self._alertas()
+
+        # Assert
+        self.assertEqual(despues_venta, [1, 2])
+        self.assertEqual(despues_reposicion, [1])
+        self.assertEqual(despues_anulacion, [])
+
+    def test_edicion_y_baja(self):
+        """Test: Subir el mínimo agrega el producto; darlo de baja lo quita"""
+        # Arrange
+        self._alertas()
+
+        # Act
+        InventarioService.actualizar_producto(3, 'Arroz', 2.0, 50, 60, None, None)
+        con_edicion = self._alertas()
+        ProductoRepository.eliminar(2)
+        con_baja = self._alertas()
+
+        # Assert
+        self.assertEqual(con_edicion, [2, 3])
+        self.assertEqual(con_baja, [3])
+
+    def test_transaccion_revertida_no_marca(self):
+        """Test: Un descuento revertido no deja productos por revisar"""
+        # Arrange
+        self._alertas()
+
+        # Act
+        with self.assertRaises(Exception):
+            with transaccion():
+                ProductoRepository.descontar_stock({1: 5})
+                raise Exception("Falla después de descontar")
+
+        # Assert
+        self.assertEqual(producto_repository._revisar, set())
+        self.assertEqual(self._alertas(), [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Pruebas de integración para la búsqueda de productos por texto completo
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from app.models.producto import Producto
+from app.repositories.producto_repository import ProductoRepository
+from tests.base_datos import BaseDatosTestCase
+
+
+class TestBusquedaProductos(BaseDatosTestCase):
+    """Suite de pruebas para ProductoRepository.buscar"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.ejecutar_muchos(
+            'INSERT INTO producto (id, nombre, precio, stock, codigo_barras) VALUES (?, ?, 1.0, 10, ?)',
+            [
+                (1, 'Café Molido Premium', '7790001'),
+                (2, 'Cafetera Italiana', '7790002'),
+                (3, 'Leche Entera', '7790003'),
+                (4, 'Azúcar Morena', None),
+            ]
+        )
+
+    def _ids(self, texto, limite=20):
+        return [p.id for p in ProductoRepository.buscar(texto, limite)]
+
+    def test_prefijo_sin_acentos(self):
+        """Test: Un prefijo sin tilde encuentra los nombres acentuados"""
+        # Act & Assert
+        self.assertEqual(sorted(self._ids('cafe')), [1, 2])
+        self.assertEqual(self._ids('azu'), [4])
+
+    def test_todas_las_palabras(self):
+        """Test: Varias palabras deben aparecer todas"""
+        # Act & Assert
+        self.assertEqual(self._ids('caf mol'), [1])
+
+    def test_por_codigo_de_barras(self):
+        """Test: También busca por el comienzo del código de barras"""
+        # Act & Assert
+        self.assertEqual(self._ids('7790003'), [3])
+
+    def test_limite(self):
+        """Test: Devuelve como máximo la cantidad pedida"""
+        # Act & Assert
+        self.assertEqual(len(self._ids('779', limite=2)), 2)
+
+    def test_se_sincroniza_con_las_escrituras(self):
+        """Test: Crear, renombrar y eliminar productos se refleja en la búsqueda"""
+        # Act
+        nuevo = ProductoRepository.crear(Producto(nombre='Té Verde', precio=2.0, stock=5, stock_minimo=1))
+        leche = Producto(id=3, nombre='Leche Descremada', precio=1.0, stock=10, stock_minimo=1, codigo_barras='7790003')
+        ProductoRepository.actualizar(leche)
+        ProductoRepository.eliminar(2)
+
+        # Assert
+        self.assertEqual(self._ids('te'), [nuevo.id])
+        self.assertEqual(self._ids('descrem'), [3])
+        self.assertEqual(self._ids('entera'), [])
+        self.assertEqual(self._ids('cafetera'), [])
+
+    def test_texto_con_comillas_y_vacio(self):
+        """Test: Las comillas no rompen la consulta y un texto vacío no busca"""
+        # Act & Assert
+        self.assertEqual(self._ids('"leche'), [3])
+        self.assertEqual(self._ids('   '), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
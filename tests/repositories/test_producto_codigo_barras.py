@@ -0,0 +1,183 @@
+"""
+Pruebas de integración para la búsqueda por código de barras
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from unittest.mock import patch
+from app.database import query_log
+from app.models.producto import Producto
+from app.repositories import producto_repository
+from app.repositories.producto_repository import ProductoRepository
+from tests.base_datos import BaseDatosTestCase
+
+
+def _producto(nombre, codigo):
+    return Producto(nombre=nombre, precio=1.0, stock=10, stock_minimo=1, codigo_barras=codigo)
+
+
+class TestCodigoBarras(BaseDatosTestCase):
+    """Suite de pruebas para ProductoRepository.obtener_por_codigo_barras"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.leche = ProductoRepository.crear(_producto('Leche', '7790001'))
+
+    def _consultas(self):
+        return [s['sql'] for s in query_log.get_query_stats(top=100)['sentencias']]
+
+    def test_busca_por_codigo(self):
+        """Test: Un código conocido devuelve el producto activo"""
+        # Act
+        producto = ProductoRepository.obtener_por_codigo_barras(' 7790001 ')
+
+        # Assert
+        self.assertEqual((producto.id, producto.nombre), (self.leche.id, 'Leche'))
+
+    @unittest.skipUnless(query_log.QUERY_LOG_ENABLED, "requiere la instrumentación de consultas")
+    def test_codigo_desconocido_en_cache_negativa(self):
+        """Test: Un código inexistente consulta la base una sola vez"""
+        # Arrange
+        ProductoRepository.obtener_por_codigo_barras('7790001')  # carga el mapa
+        query_log.reset_query_stats()
+
+        # Act
+        primero = ProductoRepository.obtener_por_codigo_barras('000')
+        segundo = ProductoRepository.obtener_por_codigo_barras('000')
+
+        # Assert
+        self.assertIsNone(primero)
+        self.assertIsNone(segundo)
+        self.assertEqual(len(self._consultas()), 1)
+
+    @unittest.skipUnless(query_log.QUERY_LOG_ENABLED, "requiere la instrumentación de consultas")
+    def test_codigo_conocido_una_lectura(self):
+        """Test: Un código del mapa cuesta solo la lectura del producto por id"""
+        # Arrange
+        ProductoRepository.obtener_por_codigo_barras('7790001')  # carga el mapa
+        query_log.reset_query_stats()
+
+        # Act
+        producto = ProductoRepository.obtener_por_codigo_barras('7790001')
+
+        # Assert
+        self.assertEqual(producto.codigo_barras, '7790001')
+        self.assertEqual(self._consultas(), [f'SELECT {producto_repository._COLUMNAS} FROM producto WHERE id = ?'])
+
+    def test_crear_quita_el_codigo_de_la_cache_negativa(self):
+        """Test: Un código buscado antes de existir se encuentra al crearlo"""
+        # Arrange
+        ProductoRepository.obtener_por_codigo_barras('7790002')
+
+        # Act
+        pan = ProductoRepository.crear(_producto('Pan', '7790002'))
+
+        # Assert
+        self.assertEqual(ProductoRepository.obtener_por_codigo_barras('7790002').id, pan.id)
+
+    def test_alta_durante_la_busqueda_no_queda_como_desconocido(self):
+        """Test: Un código creado mientras se consultaba la base no entra en la caché negativa"""
+        # Arrange
+        ProductoRepository.obtener_por_codigo_barras('7790001')  # carga el mapa
+        leer = producto_repository.get_read_connection
+        creados = []
+
+        def conexion_con_alta():
+            # Otro terminal confirma el alta después de la consulta y antes de cachear
+            conn = leer()
+            cerrar = conn.close
+
+            def close():
+                cerrar()
+                if not creados:
+                    creados.append(ProductoRepository.crear(_producto('Pan', '7790002')))
+            conn.close = close
+            return conn
+
+        # Act
+        with patch.object(producto_repository, 'get_read_connection', conexion_con_alta):
+            durante = ProductoRepository.obtener_por_codigo_barras('7790002')
+        despues = ProductoRepository.obtener_por_codigo_barras('7790002')
+
+        # Assert
+        self.assertIsNone(durante)
+        self.assertEqual(despues.id, creados[0].id)
+
+    def test_actualizar_cambia_el_codigo(self):
+        """Test: Al cambiar el código el anterior deja de resolverse"""
+        # Arrange
+        ProductoRepository.obtener_por_codigo_barras('7790001')
+        self.leche.codigo_barras = '7790009'
+
+        # Act
+        ProductoRepository.actualizar(self.leche)
+
+        # Assert
+        self.assertIsNone(ProductoRepository.obtener_por_codigo_barras('7790001'))
+        self.assertEqual(ProductoRepository.obtener_por_codigo_barras('7790009').id, self.leche.id)
+
+    def test_eliminar_quita_el_codigo(self):
+        """Test: Un producto eliminado no se resuelve por su código"""
+        # Arrange
+        ProductoRepository.obtener_por_codigo_barras('7790001')
+
+        # Act
+        ProductoRepository.eliminar(self.leche.id)
+
+        # Assert
+        self.assertIsNone(ProductoRepository.obtener_por_codigo_barras('7790001'))
+
+    def test_codigo_repetido(self):
+        """Test: El índice único impide dos productos activos con el mismo código"""
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            ProductoRepository.crear(_producto('Otra leche', '7790001'))
+
+        self.assertIn("ya está asignado", str(context.exception))
+
+    def test_codigo_vacio_no_es_repetido(self):
+        """Test: Varios productos sin código no chocan con el índice único"""
+        # Act
+        ProductoRepository.crear(_producto('Pan', ''))
+        ProductoRepository.crear(_producto('Queso', None))
+
+        # Assert
+        sin_codigo = self.consultar('SELECT COUNT(*) FROM producto WHERE codigo_barras IS NULL')[0][0]
+        self.assertEqual(sin_codigo, 2)
+
+    def test_mapa_viejo_se_corrige_con_la_base(self):
+        """Test: Si la base cambió por fuera del repositorio se usa el índice"""
+        # Arrange
+        ProductoRepository.obtener_por_codigo_barras('7790001')
+        self.ejecutar("UPDATE producto SET codigo_barras = '7790005' WHERE id = ?", (self.leche.id,))
+
+        # Act & Assert
+        self.assertIsNone(ProductoRepository.obtener_por_codigo_barras('7790001'))
+        self.assertEqual(ProductoRepository.obtener_por_codigo_barras('7790005').id, self.leche.id)
+
+    def test_lecturas_mapean_por_columna(self):
+        """Test: En una base nueva listar y obtener no cruzan activo con codigo_barras"""
+        # Act
+        productos = [
+            ProductoRepository.listar()[0],
+            ProductoRepository.obtener_por_id(self.leche.id),
+            ProductoRepository.obtener_por_ids([self.leche.id])[self.leche.id],
+        ]
+
+        # Assert
+        for producto in productos:
+            self.assertEqual((producto.activo, producto.codigo_barras), (1, '7790001'))
+
+    def test_busqueda_usa_indice_unico(self):
+        """Test: El respaldo en la base usa el índice único parcial"""
+        # Act
+        plan = self.consultar(
+            'EXPLAIN QUERY PLAN SELECT * FROM producto WHERE codigo_barras = ? AND activo = 1', ('x',)
+        )
+
+        # Assert
+        self.assertIn('idx_producto_codigo_barras_activo', plan[0][3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -55,68 +55,77 @@ class TestProductoRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado, producto)
 
-    @patch('app.repositories.producto_repository.get_connection')
-    def test_obtener_por_id_existe(self, mock_get_connection):
+    @patch('app.repositories.producto_repository.get_read_connection')
+    def test_obtener_por_id_existe(self, mock_get_read_connection):
         """Test: Obtener producto por ID cuando existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
-        mock_cursor.fetchone.return_value = (1, 'Producto Test', 10.5, 100, 10, 1, 1)
+        mock_get_read_connection.return_value = mock_conn
+        mock_cursor.fetchone.return_value = (1, 'Producto Test', 10.5, 100, 10, 1, 1, None)
 
         # Act
         resultado = ProductoRepository.obtener_por_id(1)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cursor.execute.assert_called_once_with('SELECT * FROM producto WHERE id = ?', (1,))
+        mock_cursor.execute.assert_called_once_with(
+            'SELECT id, nombre, precio, stock, stock_minimo, fk_proveedor, activo, codigo_barras '
+            'FROM producto WHERE id = ?', (1,)
+        )
         mock_conn.close.assert_called_once()
         self.assertIsInstance(resultado, Producto)
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado.nombre, 'Producto Test')
 
-    @patch('app.repositories.producto_repository.get_connection')
-    def test_obtener_por_id_no_existe(self, mock_get_connection):
+    @patch('app.repositories.producto_repository.get_read_connection')
+    def test_obtener_por_id_no_existe(self, mock_get_read_connection):
         """Test: Obtener producto por ID cuando no existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = None
 
         # Act
         resultado = ProductoRepository.obtener_por_id(999)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cursor.execute.assert_called_once_with('SELECT * FROM producto WHERE id = ?', (999,))
+        mock_cursor.execute.assert_called_once_with(
+            'SELECT id, nombre, precio, stock, stock_minimo, fk_proveedor, activo, codigo_barras '
+            'FROM producto WHERE id = ?', (999,)
+        )
         mock_conn.close.assert_called_once()
         self.assertIsNone(resultado)
 
-    @patch('app.repositories.producto_repository.get_connection')
-    def test_listar(self, mock_get_connection):
+    @patch('app.repositories.producto_repository.get_read_connection')
+    def test_listar(self, mock_get_read_connection):
         """Test: Listar productos activos"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchall.return_value = [
-            (1, 'Producto 1', 10.5, 100, 10, 1, 1),
-            (2, 'Producto 2', 20.0, 50, 5, 2, 1)
+            (1, 'Producto 1', 10.5, 100, 10, 1, 1, None),
+            (2, 'Producto 2', 20.0, 50, 5, 2, 1, None)
         ]
 
         # Act
         resultado = ProductoRepository.listar()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cursor.execute.assert_called_once_with('SELECT * FROM producto WHERE activo = 1')
+        mock_cursor.execute.assert_called_once_with(
+            'SELECT id, nombre, precio, stock, stock_minimo, fk_proveedor, activo, codigo_barras '
+            'FROM producto WHERE activo = 1'
+        )
         mock_conn.close.assert_called_once()
         self.assertEqual(len(resultado), 2)
         self.assertIsInstance(resultado[0], Producto)
@@ -166,25 +175,28 @@ class TestProductoRepository(unittest.TestCase):
         mock_conn.commit.assert_called_once()
         mock_conn.close.assert_called_once()
 
-    @patch('app.repositories.producto_repository.get_connection')
-    def test_obtener_productos_bajo_stock(self, mock_get_connection):
+    @patch('app.repositories.producto_repository.get_read_connection')
+    def test_obtener_productos_bajo_stock(self, mock_get_read_connection):
         """Test: Obtener productos con stock bajo"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchall.return_value = [
-            (1, 'Producto Bajo Stock', 5.0, 5, 10, 1, 1)
+            (1, 'Producto Bajo Stock', 5.0, 5, 10, 1, 1, None)
         ]
 
         # Act
         resultado = ProductoRepository.obtener_productos_bajo_stock()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cursor.execute.assert_called_once_with('SELECT * FROM producto WHERE stock <= stock_minimo AND activo = 1')
+        mock_cursor.execute.assert_called_once_with(
+            'SELECT id, nombre, precio, stock, stock_minimo, fk_proveedor, activo, codigo_barras '
+            'FROM producto WHERE stock <= stock_minimo AND activo = 1'
+        )
         mock_conn.close.assert_called_once()
         self.assertEqual(len(resultado), 1)
         self.assertIsInstance(resultado[0], Producto)
@@ -210,5 +222,96 @@ class TestProductoRepository(unittest.TestCase):
         mock_conn.close.assert_called_once()
 
 
+    @patch('app.repositories.producto_repository.get_read_connection')
+    def test_obtener_por_ids(self, mock_get_read_connection):
+        """Test: Obtener varios productos en una sola consulta"""
+        # Arrange
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_read_connection.return_value = mock_conn
+        mock_cursor.fetchall.return_value = [
+            (1, 'Producto 1', 10.5, 100, 10, 1, 1, '111'),
+            (2, 'Producto 2', 20.0, 50, 5, 2, 1, '222')
+        ]
+
+        # Act
+        resultado = ProductoRepository.obtener_por_ids([1, 2, 1])
+
+        # Assert
+        mock_cursor.execute.assert_called_once_with(
+            'SELECT id, nombre, precio, stock, stock_minimo, fk_proveedor, activo, codigo_barras '
+            'FROM producto WHERE id IN (?, ?)', [1, 2]
+        )
+        mock_conn.close.assert_called_once()
+        self.assertEqual(sorted(resultado), [1, 2])
+        self.assertEqual(resultado[2].nombre, 'Producto 2')
+
+    @patch('app.repositories.producto_repository.get_connection')
+    def test_descontar_stock(self, mock_get_connection):
+        """Test: Descontar stock de varios productos con UPDATE condicional"""
+        # Arrange
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_cursor.rowcount = 2
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_conn
+
+        # Act
+        ProductoRepository.descontar_stock({1: 3, 2: 1})
+
+        # Assert
+        mock_cursor.executemany.assert_called_once_with(
+            "UPDATE producto SET stock = stock - ?, version = (SELECT version + 1 FROM tabla_version WHERE tabla = 'producto') "
+            'WHERE id = ? AND stock >= ?',
+            [(3, 1, 3), (1, 2, 1)]
+        )
+        mock_conn.commit.assert_called_once()
+        mock_conn.close.assert_called_once()
+
+    @patch('app.repositories.producto_repository.get_connection')
+    def test_descontar_stock_insuficiente(self, mock_get_connection):
+        """Test: Si a un producto no le alcanza el stock no se descuenta nada"""
+        # Arrange
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_cursor.rowcount = 1
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_conn
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            ProductoRepository.descontar_stock({1: 3, 2: 1})
+
+        self.assertIn("Stock insuficiente", str(context.exception))
+        mock_conn.rollback.assert_called_once()
+        mock_conn.commit.assert_not_called()
+        mock_conn.close.assert_called_once()
+
+    @patch('app.repositories.producto_repository.get_connection')
+    def test_crear_lote(self, mock_get_connection):
+        """Test: Crear muchos productos con una sola sentencia preparada"""
+        # Arrange
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_conn
+        productos = [
+            Producto(nombre='Arroz', precio=2.5, stock=10, stock_minimo=2, fk_proveedor=1, codigo_barras='111'),
+            Producto(nombre='Azúcar', precio=1.8, stock=5, stock_minimo=1, fk_proveedor=1, codigo_barras='222'),
+        ]
+
+        # Act
+        total = ProductoRepository.crear_lote(productos)
+
+        # Assert
+        self.assertEqual(total, 2)
+        mock_cursor.executemany.assert_called_once_with(
+            'INSERT INTO producto (nombre, precio, stock, stock_minimo, fk_proveedor, activo, codigo_barras) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [('Arroz', 2.5, 10, 2, 1, 1, '111'), ('Azúcar', 1.8, 5, 1, 1, 1, '222')]
+        )
+        mock_conn.commit.assert_called_once()
+        mock_conn.close.assert_called_once()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
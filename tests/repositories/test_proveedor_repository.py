@@ -53,21 +53,21 @@ class TestProveedorRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado, proveedor)
 
-    @patch('app.repositories.proveedor_repository.get_connection')
-    def test_obtener_por_id_existe(self, mock_get_connection):
+    @patch('app.repositories.proveedor_repository.get_read_connection')
+    def test_obtener_por_id_existe(self, mock_get_read_connection):
         """Test: Obtener proveedor por ID cuando existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = (1, 'Distribuidora Los Andes', '0991234567', 'Av. Principal 123', 1)
 
         # Act
         resultado = ProveedorRepository.obtener_por_id(1)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM proveedor WHERE id = ?', (1,))
         mock_conn.close.assert_called_once()
@@ -75,34 +75,34 @@ class TestProveedorRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado.nombre, 'Distribuidora Los Andes')
 
-    @patch('app.repositories.proveedor_repository.get_connection')
-    def test_obtener_por_id_no_existe(self, mock_get_connection):
+    @patch('app.repositories.proveedor_repository.get_read_connection')
+    def test_obtener_por_id_no_existe(self, mock_get_read_connection):
         """Test: Obtener proveedor por ID cuando no existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = None
 
         # Act
         resultado = ProveedorRepository.obtener_por_id(999)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM proveedor WHERE id = ?', (999,))
         mock_conn.close.assert_called_once()
         self.assertIsNone(resultado)
 
-    @patch('app.repositories.proveedor_repository.get_connection')
-    def test_listar(self, mock_get_connection):
+    @patch('app.repositories.proveedor_repository.get_read_connection')
+    def test_listar(self, mock_get_read_connection):
         """Test: Listar todos los proveedores activos"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchall.return_value = [
             (1, 'Distribuidora A', '099111', 'Dir A', 1),
             (2, 'Distribuidora B', '099222', 'Dir B', 1)
@@ -112,7 +112,7 @@ class TestProveedorRepository(unittest.TestCase):
         resultado = ProveedorRepository.listar()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM proveedor WHERE activo = 1')
         mock_conn.close.assert_called_once()
@@ -54,21 +54,21 @@ class TestUsuarioRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado, usuario)
 
-    @patch('app.repositories.usuario_repository.get_connection')
-    def test_obtener_por_id_existe(self, mock_get_connection):
+    @patch('app.repositories.usuario_repository.get_read_connection')
+    def test_obtener_por_id_existe(self, mock_get_read_connection):
         """Test: Obtener usuario por ID cuando existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = (1, 'Usuario Test', 'testuser', 'hashed_password', 'Admin', 1)
 
         # Act
         resultado = UsuarioRepository.obtener_por_id(1)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM usuario WHERE id = ?', (1,))
         mock_conn.close.assert_called_once()
@@ -76,75 +76,75 @@ class TestUsuarioRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado.nombre, 'Usuario Test')
 
-    @patch('app.repositories.usuario_repository.get_connection')
-    def test_obtener_por_id_no_existe(self, mock_get_connection):
+    @patch('app.repositories.usuario_repository.get_read_connection')
+    def test_obtener_por_id_no_existe(self, mock_get_read_connection):
         """Test: Obtener usuario por ID cuando no existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = None
 
         # Act
         resultado = UsuarioRepository.obtener_por_id(999)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM usuario WHERE id = ?', (999,))
         mock_conn.close.assert_called_once()
         self.assertIsNone(resultado)
 
-    @patch('app.repositories.usuario_repository.get_connection')
-    def test_obtener_por_username_existe(self, mock_get_connection):
+    @patch('app.repositories.usuario_repository.get_read_connection')
+    def test_obtener_por_username_existe(self, mock_get_read_connection):
         """Test: Obtener usuario por username cuando existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = (1, 'Usuario Test', 'testuser', 'hashed_password', 'Admin', 1)
 
         # Act
         resultado = UsuarioRepository.obtener_por_username('testuser')
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM usuario WHERE username = ?', ('testuser',))
         mock_conn.close.assert_called_once()
         self.assertIsInstance(resultado, Usuario)
         self.assertEqual(resultado.username, 'testuser')
 
-    @patch('app.repositories.usuario_repository.get_connection')
-    def test_obtener_por_username_no_existe(self, mock_get_connection):
+    @patch('app.repositories.usuario_repository.get_read_connection')
+    def test_obtener_por_username_no_existe(self, mock_get_read_connection):
         """Test: Obtener usuario por username cuando no existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = None
 
         # Act
         resultado = UsuarioRepository.obtener_por_username('nonexistent')
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM usuario WHERE username = ?', ('nonexistent',))
         mock_conn.close.assert_called_once()
         self.assertIsNone(resultado)
 
-    @patch('app.repositories.usuario_repository.get_connection')
-    def test_listar(self, mock_get_connection):
+    @patch('app.repositories.usuario_repository.get_read_connection')
+    def test_listar(self, mock_get_read_connection):
         """Test: Listar usuarios activos"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchall.return_value = [
             (1, 'Usuario 1', 'user1', 'hash1', 'Admin', 1),
             (2, 'Usuario 2', 'user2', 'hash2', 'Cajero', 1)
@@ -154,7 +154,7 @@ class TestUsuarioRepository(unittest.TestCase):
         resultado = UsuarioRepository.listar()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM usuario WHERE activo = 1')
         mock_conn.close.assert_called_once()
@@ -0,0 +1,110 @@
+"""
+Pruebas de integración para el historial paginado de VentaRepository
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from app.database import query_log
+from app.repositories.venta_repository import VentaRepository
+from tests.base_datos import BaseDatosTestCase
+
+
+class TestHistorialVentas(BaseDatosTestCase):
+    """Suite de pruebas para VentaRepository.listar con filtros y cursor"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.ejecutar("INSERT INTO usuario (id, nombre, username, password_hash, rol) VALUES (1, 'Ana', 'ana', 'x', 'Cajero')")
+        self.ejecutar_muchos(
+            'INSERT INTO venta (id, fecha, total, fk_usuario, fk_caja, metodo_pago) VALUES (?, ?, ?, 1, ?, ?)',
+            [(i, f'2025-01-{i:02d} 10:00:00', float(i), 1 if i <= 10 else 2,
+              'Efectivo' if i % 2 else 'Tarjeta') for i in range(1, 21)]
+        )
+        self.crear_producto(1, 'Leche', 1.0)
+        self.crear_producto(2, 'Pan', 0.5)
+        self.ejecutar_muchos(
+            'INSERT INTO detalle_venta (fk_venta, fk_producto, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?)',
+            [(i, 1, i, 1.0, float(i)) for i in range(1, 21)] + [(i, 2, 2, 0.5, 1.0) for i in range(1, 21, 5)]
+        )
+
+    def test_paginacion_por_cursor(self):
+        """Test: Las páginas siguen desde el último id sin repetir ni saltar ventas"""
+        # Act
+        pagina1 = VentaRepository.listar(limite=8)
+        pagina2 = VentaRepository.listar(limite=8, antes_de=pagina1[-1]['id'])
+        pagina3 = VentaRepository.listar(limite=8, antes_de=pagina2[-1]['id'])
+
+        # Assert
+        ids = [v['id'] for v in pagina1 + pagina2 + pagina3]
+        self.assertEqual(ids, list(range(20, 0, -1)))
+        self.assertEqual(len(pagina3), 4)
+        self.assertEqual(pagina1[0]['usuario'], 'ana')
+
+    def test_filtros_combinados(self):
+        """Test: Los filtros de fecha, caja y método de pago se combinan"""
+        # Act
+        ventas = VentaRepository.listar(desde='2025-01-05', hasta='2025-01-15', fk_caja=2, metodo_pago='Tarjeta')
+
+        # Assert
+        self.assertEqual([v['id'] for v in ventas], [14, 12])
+
+    def _sentencias_de_repositorio(self):
+        return sum(
+            s['ejecuciones'] for s in query_log.get_query_stats(top=100)['sentencias']
+            if s['origen'].startswith('VentaRepository')
+        )
+
+    @unittest.skipUnless(query_log.QUERY_LOG_ENABLED, "requiere la instrumentación de consultas")
+    def test_pagina_con_items_en_dos_consultas(self):
+        """Test: Una página con include=items cuesta dos consultas"""
+        # Arrange
+        query_log.reset_query_stats()
+
+        # Act
+        ventas = VentaRepository.listar(limite=10, incluir_items=True)
+
+        # Assert
+        self.assertEqual(self._sentencias_de_repositorio(), 2)
+        self.assertEqual([v['id'] for v in ventas], list(range(20, 10, -1)))
+        self.assertEqual(ventas[0]['items'], [{'cantidad': 20, 'precio': 1.0, 'subtotal': 20.0, 'producto': 'Leche'}])
+        self.assertEqual([i['producto'] for i in ventas[4]['items']], ['Leche', 'Pan'])  # venta 16
+
+    @unittest.skipUnless(query_log.QUERY_LOG_ENABLED, "requiere la instrumentación de consultas")
+    def test_obtener_por_ids(self):
+        """Test: Varias ventas con sus items en dos consultas y en el orden pedido"""
+        # Arrange
+        query_log.reset_query_stats()
+
+        # Act
+        ventas = VentaRepository.obtener_por_ids([6, 2, 6, 999])
+
+        # Assert
+        self.assertEqual(self._sentencias_de_repositorio(), 2 + 2)  # + la búsqueda del id inexistente
+        self.assertEqual([v['id'] for v in ventas], [6, 2])
+        self.assertEqual(len(ventas[0]['items']), 2)
+        self.assertEqual(ventas[1]['items'][0]['cantidad'], 2)
+
+    def test_filtros_usan_indices(self):
+        """Test: Ningún filtro recorre la tabla venta completa"""
+        # Arrange
+        consultas = [
+            'SELECT id FROM venta v WHERE v.fk_usuario = ? AND v.id < ? ORDER BY v.id DESC LIMIT 50',
+            'SELECT id FROM venta v WHERE v.fk_cliente = ? AND v.id < ? ORDER BY v.id DESC LIMIT 50',
+            'SELECT id FROM venta v WHERE v.fk_caja = ? AND v.id < ? ORDER BY v.id DESC LIMIT 50',
+            'SELECT id FROM venta v WHERE v.metodo_pago = ? AND v.id < ? ORDER BY v.id DESC LIMIT 50',
+        ]
+
+        # Act
+        planes = [
+            [f[3] for f in self.consultar('EXPLAIN QUERY PLAN ' + q, (1, 100))]
+            for q in consultas
+        ]
+
+        # Assert
+        for plan in planes:
+            self.assertTrue(all(p.startswith('SEARCH') for p in plan), plan)
+            self.assertFalse(any('TEMP B-TREE' in p for p in plan), plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
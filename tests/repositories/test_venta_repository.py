@@ -89,56 +89,62 @@ class TestVentaRepository(unittest.TestCase):
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado, detalle)
 
-    @patch('app.repositories.venta_repository.get_connection')
-    def test_obtener_por_id_existe(self, mock_get_connection):
+    @patch('app.repositories.venta_repository.get_read_connection')
+    def test_obtener_por_id_existe(self, mock_get_read_connection):
         """Test: Obtener venta por ID cuando existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = (1, '2025-12-25 10:00:00', 100.0, 1, 1, 1)
 
         # Act
         resultado = VentaRepository.obtener_por_id(1)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cursor.execute.assert_called_once_with('SELECT * FROM venta WHERE id = ?', (1,))
+        mock_cursor.execute.assert_called_once_with(
+            'SELECT v.id, v.fecha, v.total, v.fk_cliente, v.fk_usuario, v.fk_caja, v.anulada '
+            'FROM venta v WHERE v.id = ?', (1,)
+        )
         mock_conn.close.assert_called_once()
         self.assertIsInstance(resultado, Venta)
         self.assertEqual(resultado.id, 1)
         self.assertEqual(resultado.total, 100.0)
 
-    @patch('app.repositories.venta_repository.get_connection')
-    def test_obtener_por_id_no_existe(self, mock_get_connection):
+    @patch('app.repositories.venta_repository.get_read_connection')
+    def test_obtener_por_id_no_existe(self, mock_get_read_connection):
         """Test: Obtener venta por ID cuando no existe"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchone.return_value = None
 
         # Act
         resultado = VentaRepository.obtener_por_id(999)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
-        mock_cursor.execute.assert_called_once_with('SELECT * FROM venta WHERE id = ?', (999,))
+        mock_cursor.execute.assert_called_once_with(
+            'SELECT v.id, v.fecha, v.total, v.fk_cliente, v.fk_usuario, v.fk_caja, v.anulada '
+            'FROM venta v WHERE v.id = ?', (999,)
+        )
         mock_conn.close.assert_called_once()
         self.assertIsNone(resultado)
 
-    @patch('app.repositories.venta_repository.get_connection')
-    def test_obtener_detalles(self, mock_get_connection):
+    @patch('app.repositories.venta_repository.get_read_connection')
+    def test_obtener_detalles(self, mock_get_read_connection):
         """Test: Obtener detalles de una venta"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchall.return_value = [
             (1, 1, 1, 2, 10.5, 21.0),
             (2, 1, 2, 1, 20.0, 20.0)
@@ -148,7 +154,7 @@ class TestVentaRepository(unittest.TestCase):
         resultado = VentaRepository.obtener_detalles(1)
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM detalle_venta WHERE fk_venta = ?', (1,))
         mock_conn.close.assert_called_once()
@@ -157,14 +163,14 @@ class TestVentaRepository(unittest.TestCase):
         self.assertEqual(resultado[0].id, 1)
         self.assertEqual(resultado[1].id, 2)
 
-    @patch('app.repositories.venta_repository.get_connection')
-    def test_listar(self, mock_get_connection):
+    @patch('app.repositories.venta_repository.get_read_connection')
+    def test_listar(self, mock_get_read_connection):
         """Test: Listar todas las ventas"""
         # Arrange
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
-        mock_get_connection.return_value = mock_conn
+        mock_get_read_connection.return_value = mock_conn
         mock_cursor.fetchall.return_value = [
             (1, '2025-12-25 10:00:00', 100.0, 1, 1, 1),
             (2, '2025-12-25 11:00:00', 50.0, 2, 1, 1)
@@ -174,7 +180,7 @@ class TestVentaRepository(unittest.TestCase):
         resultado = VentaRepository.listar()
 
         # Assert
-        mock_get_connection.assert_called_once()
+        mock_get_read_connection.assert_called_once()
         mock_conn.cursor.assert_called_once()
         mock_cursor.execute.assert_called_once_with('SELECT * FROM venta ORDER BY fecha DESC')
         mock_conn.close.assert_called_once()
@@ -0,0 +1,75 @@
+"""
+Pruebas de integración para los totales acumulados de caja
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from app.database import query_log
+from app.services.caja_service import CajaService
+from app.services.venta_service import VentaService
+from tests.base_datos import BaseDatosTestCase, items
+
+
+class TestTotalesCaja(BaseDatosTestCase):
+    """Suite de pruebas para la conciliación de caja sin recorrer ventas"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Leche', 2.5)
+        CajaService.abrir_caja(50.0, 1)
+
+    def _vender(self):
+        VentaService.realizar_venta(items((1, 2)), None, 1, 'Efectivo', 10.0, None)   # total 5, cambio 5
+        VentaService.realizar_venta(items((1, 4)), None, 1, 'Efectivo', 10.0, None)   # total 10, cambio 0
+        VentaService.realizar_venta(items((1, 1)), None, 1, 'Tarjeta', 0, 'ref-1')    # total 2.5
+
+    def test_caja_actual_con_totales(self):
+        """Test: La caja actual trae los totales acumulados por cada venta"""
+        # Arrange
+        self._vender()
+
+        # Act
+        totales = CajaService.obtener_caja_actual(1).totales
+
+        # Assert
+        self.assertEqual((totales['ventas'], totales['total'], totales['cambio']), (3, 17.5, 5.0))
+        self.assertEqual(totales['efectivo_esperado'], 65.0)
+        self.assertEqual(totales['por_metodo']['Tarjeta'], {'ventas': 1, 'total': 2.5, 'recibido': 2.5, 'cambio': 0})
+
+    @unittest.skipUnless(query_log.QUERY_LOG_ENABLED, "requiere la instrumentación de consultas")
+    def test_caja_actual_no_recorre_ventas(self):
+        """Test: Consultar la caja no lee la tabla venta"""
+        # Arrange
+        self._vender()
+        query_log.reset_query_stats()
+
+        # Act
+        CajaService.obtener_caja_actual(1)
+
+        # Assert
+        sentencias = [s['sql'] for s in query_log.get_query_stats(top=100)['sentencias']]
+        self.assertFalse(any('venta ' in s.lower() for s in sentencias), sentencias)
+
+    def test_cierre_con_diferencia(self):
+        """Test: El cierre compara lo contado con el efectivo esperado"""
+        # Arrange
+        self._vender()
+
+        # Act
+        cierre = CajaService.cerrar_caja(63.0, 1)
+
+        # Assert
+        self.assertEqual((cierre['efectivo_esperado'], cierre['diferencia']), (65.0, -2.0))
+        self.assertIsNone(CajaService.obtener_caja_actual(1))
+
+    def test_cierre_sin_ventas(self):
+        """Test: Sin ventas el efectivo esperado es el monto inicial"""
+        # Act
+        cierre = CajaService.cerrar_caja(50.0, 1)
+
+        # Assert
+        self.assertEqual((cierre['ventas'], cierre['diferencia']), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Pruebas de integración para las ventas con Idempotency-Key
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from unittest.mock import patch
+from app.services import idempotencia_service, venta_service
+from app.services.idempotencia_service import IdempotenciaService
+from app.services.venta_service import VentaService
+from tests.base_datos import BaseDatosTestCase, items
+
+
+class TestVentaIdempotente(BaseDatosTestCase):
+    """Suite de pruebas para realizar_venta con clave de idempotencia"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Leche', 2.0, 10)
+        self.crear_caja(1)
+
+    def _vender(self, clave, cantidad=2):
+        return VentaService.realizar_venta(items((1, cantidad)), None, 1, 'Efectivo', 20.0, None,
+                                           clave_idempotencia=clave)
+
+    def _contar(self):
+        return self.consultar('SELECT COUNT(*) FROM venta')[0][0], self.stock()[1]
+
+    def test_reintento_devuelve_la_venta_original(self):
+        """Test: Repetir la clave no registra otra venta ni abre transacción"""
+        # Arrange
+        original = self._vender('clave-1')
+
+        # Act
+        with patch.object(venta_service, 'ejecutar_escritura') as mock_escritura:
+            repetida = self._vender('clave-1')
+
+        # Assert
+        mock_escritura.assert_not_called()
+        self.assertEqual((repetida.id, repetida.total, repetida.cambio), (original.id, 4.0, 16.0))
+        self.assertEqual(self._contar(), (1, 8))
+
+    def test_clave_persistida_sobrevive_a_la_cache(self):
+        """Test: Sin la caché en memoria la clave se encuentra en la tabla"""
+        # Arrange
+        original = self._vender('clave-2')
+        IdempotenciaService.limpiar_cache()
+
+        # Act
+        repetida = self._vender('clave-2')
+
+        # Assert
+        self.assertEqual(repetida.id, original.id)
+        self.assertEqual(self._contar(), (1, 8))
+
+    def test_misma_clave_con_otra_venta(self):
+        """Test: Reutilizar la clave con otro contenido es un error"""
+        # Arrange
+        self._vender('clave-3')
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            self._vender('clave-3', cantidad=5)
+
+        self.assertIn("venta distinta", str(context.exception))
+        self.assertEqual(self._contar(), (1, 8))
+
+    def test_clave_vencida_registra_nueva_venta(self):
+        """Test: Pasado el TTL la clave deja de deduplicar"""
+        # Arrange
+        self._vender('clave-4')
+
+        # Act
+        with patch.object(idempotencia_service, 'IDEMPOTENCIA_TTL_S', -1):
+            self._vender('clave-4')
+
+        # Assert
+        self.assertEqual(self._contar(), (2, 6))
+
+    def test_cache_acotada(self):
+        """Test: La caché en memoria no supera el máximo configurado"""
+        # Act
+        with patch.object(idempotencia_service, 'IDEMPOTENCIA_MAX_CACHE', 2):
+            for i in range(4):
+                self._vender(f'clave-lru-{i}', cantidad=1)
+
+        # Assert
+        self.assertEqual(list(idempotencia_service._cache), ['clave-lru-2', 'clave-lru-3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
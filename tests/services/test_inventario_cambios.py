@@ -0,0 +1,98 @@
+"""
+Pruebas de integración para la sincronización de productos por versión
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from app.models.producto import Producto
+from app.repositories.producto_repository import ProductoRepository
+from app.repositories.version_repository import VersionRepository
+from app.services.inventario_service import InventarioService
+from tests.base_datos import BaseDatosTestCase
+
+
+class TestCambiosProductos(BaseDatosTestCase):
+    """Suite de pruebas para InventarioService.cambios_productos"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Leche', 1.0, 10)
+        self.crear_producto(2, 'Pan', 0.5, 10)
+
+    def test_desde_cero_devuelve_todo(self):
+        """Test: Una terminal nueva recibe el catálogo completo"""
+        # Act
+        cambios = InventarioService.cambios_productos(0)
+
+        # Assert
+        self.assertEqual([p['nombre'] for p in cambios['productos']], ['Leche', 'Pan'])
+        self.assertEqual(cambios['eliminados'], [])
+        self.assertGreater(cambios['version'], 0)
+
+    def test_sin_cambios_respuesta_vacia(self):
+        """Test: Con la versión actual no hay nada que descargar"""
+        # Arrange
+        version = InventarioService.cambios_productos(0)['version']
+
+        # Act
+        cambios = InventarioService.cambios_productos(version)
+
+        # Assert
+        self.assertEqual(cambios, {'version': version, 'productos': [], 'eliminados': []})
+
+    def test_venta_y_edicion_solo_devuelven_lo_tocado(self):
+        """Test: El stock de una venta y una edición llegan como cambios"""
+        # Arrange
+        version = InventarioService.cambios_productos(0)['version']
+
+        # Act
+        ProductoRepository.descontar_stock({1: 3})
+        cambios = InventarioService.cambios_productos(version)
+        ProductoRepository.actualizar(Producto(id=2, nombre='Pan integral', precio=0.6, stock=10, stock_minimo=0))
+        siguientes = InventarioService.cambios_productos(cambios['version'])
+
+        # Assert
+        self.assertEqual([(p['id'], p['stock']) for p in cambios['productos']], [(1, 7)])
+        self.assertEqual([p['nombre'] for p in siguientes['productos']], ['Pan integral'])
+        self.assertGreater(siguientes['version'], cambios['version'])
+
+    def test_una_version_por_linea_de_venta(self):
+        """Test: Descontar el stock de una línea suma una sola versión y la fila queda con ella"""
+        # Arrange
+        antes = VersionRepository.obtener('producto')
+
+        # Act
+        ProductoRepository.descontar_stock({1: 2})
+        despues_venta = VersionRepository.obtener('producto')
+        ProductoRepository.actualizar_stock(2, 5)
+        despues_reposicion = VersionRepository.obtener('producto')
+
+        # Assert
+        self.assertEqual(despues_venta, antes + 1)
+        self.assertEqual(despues_reposicion, antes + 2)
+        self.assertEqual(self.consultar('SELECT id, version FROM producto ORDER BY id'), [(1, antes + 1), (2, antes + 2)])
+
+    def test_baja_devuelve_lapida(self):
+        """Test: Un producto dado de baja se informa en eliminados"""
+        # Arrange
+        version = InventarioService.cambios_productos(0)['version']
+
+        # Act
+        ProductoRepository.eliminar(2)
+        cambios = InventarioService.cambios_productos(version)
+
+        # Assert
+        self.assertEqual(cambios['productos'], [])
+        self.assertEqual(cambios['eliminados'], [2])
+
+    def test_version_negativa(self):
+        """Test: La versión de partida no puede ser negativa"""
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            InventarioService.cambios_productos(-1)
+
+        self.assertIn("no puede ser negativa", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Pruebas de integración para la anulación de ventas
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from app.database import query_log
+from app.repositories.venta_repository import VentaRepository
+from app.services.caja_service import CajaService
+from app.services.venta_service import VentaService
+from tests.base_datos import BaseDatosTestCase, items
+
+
+class TestAnulacionVenta(BaseDatosTestCase):
+    """Suite de pruebas para VentaService.anular_venta"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.ejecutar_muchos(
+            'INSERT INTO producto (id, nombre, precio, stock) VALUES (?, ?, 1.0, 100)',
+            [(i, f'Producto {i}') for i in range(1, 41)]
+        )
+        CajaService.abrir_caja(20.0, 1)
+        # Ticket de 40 líneas (con un producto repetido)
+        self.venta = VentaService.realizar_venta(
+            items(*[(i, 2) for i in range(1, 41)], (1, 3)), None, 1, 'Efectivo', 100.0, None
+        )
+    def test_anular_restaura_stock(self):
+        """Test: Anular devuelve al stock todas las líneas de la venta"""
+        # Act
+        anulacion = VentaService.anular_venta(self.venta.id, 'Cliente desistió')
+
+        # Assert
+        self.assertEqual(anulacion['productos'], 40)
+        self.assertEqual(set(self.stock().values()), {100})
+        self.assertTrue(VentaRepository.obtener_por_id(self.venta.id)['anulada'])
+
+    @unittest.skipUnless(query_log.QUERY_LOG_ENABLED, "requiere la instrumentación de consultas")
+    def test_stock_en_una_sentencia(self):
+        """Test: El stock de las 40 líneas se restaura con una sola sentencia"""
+        # Arrange
+        query_log.reset_query_stats()
+
+        # Act
+        VentaService.anular_venta(self.venta.id)
+
+        # Assert
+        sentencias = query_log.get_query_stats(top=100)['sentencias']
+        stock = [s for s in sentencias if s['sql'].lower().startswith('update producto')]
+        self.assertEqual(sum(s['ejecuciones'] for s in stock), 1)
+
+    def test_revierte_totales_y_resumen(self):
+        """Test: La caja y el resumen dejan de contar la venta anulada"""
+        # Act
+        VentaService.anular_venta(self.venta.id)
+
+        # Assert
+        totales = CajaService.obtener_caja_actual(1).totales
+        self.assertEqual((totales['ventas'], totales['total'], totales['efectivo_esperado']), (0, 0, 20.0))
+        resumen = VentaRepository.resumen()
+        self.assertEqual((resumen[0]['ventas'], resumen[0]['importe']), (0, 0))
+
+    def test_no_se_anula_dos_veces(self):
+        """Test: Una venta anulada no vuelve a devolver stock"""
+        # Arrange
+        VentaService.anular_venta(self.venta.id)
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            VentaService.anular_venta(self.venta.id)
+
+        self.assertIn("ya está anulada", str(context.exception))
+        self.assertEqual(self.stock()[1], 100)
+
+    def test_caja_cerrada(self):
+        """Test: No se anulan ventas de una caja ya cerrada"""
+        # Arrange
+        CajaService.cerrar_caja(50.0, 1)
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            VentaService.anular_venta(self.venta.id)
+
+        self.assertIn("caja abierta", str(context.exception))
+        self.assertEqual(self.stock()[1], 95)
+
+    def test_venta_inexistente(self):
+        """Test: Anular una venta que no existe es un error"""
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            VentaService.anular_venta(999)
+
+        self.assertEqual(str(context.exception), "Venta no encontrada")
+
+    def test_listado_marca_anuladas(self):
+        """Test: El historial indica qué ventas están anuladas"""
+        # Act
+        VentaService.anular_venta(self.venta.id)
+
+        # Assert
+        self.assertTrue(VentaRepository.listar()[0]['anulada'])
+
+    def test_obtener_por_ids_marca_anuladas(self):
+        """Test: La consulta por varios ids lee anulada por nombre de columna"""
+        # Arrange
+        otra = VentaService.realizar_venta(items((2, 1)), None, 1, 'Efectivo', 1.0, None)
+
+        # Act
+        VentaService.anular_venta(self.venta.id)
+        ventas = VentaRepository.obtener_por_ids([self.venta.id, otra.id])
+
+        # Assert
+        self.assertEqual([v['anulada'] for v in ventas], [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
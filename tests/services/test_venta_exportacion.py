@@ -0,0 +1,126 @@
+"""
+Pruebas de integración para la exportación del libro de ventas
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import csv
+import io
+import json
+import unittest
+from datetime import datetime
+from app.database import archive
+from app.repositories.venta_repository import VentaRepository, EXPORT_COLUMNAS
+from app.services.venta_service import VentaService
+from tests.base_datos import BaseDatosTestCase
+
+
+class TestExportacionVentas(BaseDatosTestCase):
+    """Suite de pruebas para VentaService.exportar_ventas"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Café, molido', 3.0)
+        self.crear_producto(2, 'Pan', 0.5)
+        self.crear_caja(1, '2023-03-01 08:00:00', 'Cerrada')
+        self.crear_caja(2, '2025-05-01 08:00:00')
+        ventas = [
+            (1, '2023-03-01 10:00:00', 1, 'Efectivo', 10.0, 6.5, 3.5),
+            (2, '2025-05-20 09:00:00', 2, 'Tarjeta', 3.5, 3.5, 0),
+            (3, '2025-05-20 18:30:00', 2, 'Efectivo', 3.0, 5.0, 2.0),
+        ]
+        self.ejecutar_muchos(
+            '''INSERT INTO venta (id, fecha, total, fk_usuario, fk_caja, metodo_pago, monto_pago, cambio)
+               VALUES (?, ?, ?, 1, ?, ?, ?, ?)''',
+            [(id, fecha, total, caja, metodo, pago, cambio) for id, fecha, caja, metodo, pago, total, cambio in ventas]
+        )
+        self.ejecutar_muchos(
+            'INSERT INTO detalle_venta (fk_venta, fk_producto, cantidad, precio_unitario, subtotal) VALUES (?, ?, ?, ?, ?)',
+            [(1, 1, 2, 3.0, 6.0), (1, 2, 1, 0.5, 0.5), (2, 1, 1, 3.0, 3.0), (2, 2, 1, 0.5, 0.5), (3, 1, 1, 3.0, 3.0)]
+        )
+
+    def test_csv_una_fila_por_linea(self):
+        """Test: El CSV trae encabezado y una fila por línea de venta con los datos de pago"""
+        # Act
+        texto = ''.join(VentaService.exportar_ventas('2025-05-20', '2025-05-20', 'csv'))
+
+        # Assert
+        filas = list(csv.reader(io.StringIO(texto)))
+        self.assertEqual(tuple(filas[0]), EXPORT_COLUMNAS)
+        self.assertEqual([f[0] for f in filas[1:]], ['2', '2', '3'])
+        self.assertEqual(filas[1][5:9], ['Tarjeta', '3.5', '3.5', '0.0'])
+        self.assertEqual(filas[1][11], 'Café, molido')
+
+    def test_ndjson(self):
+        """Test: Cada línea NDJSON es un objeto con las columnas exportadas"""
+        # Act
+        lineas = ''.join(VentaService.exportar_ventas(formato='ndjson')).splitlines()
+
+        # Assert
+        registros = [json.loads(l) for l in lineas]
+        self.assertEqual(len(registros), 5)
+        self.assertEqual(registros[-1]['venta_id'], 3)
+        self.assertEqual(registros[-1]['cambio'], 2.0)
+
+    def test_lee_por_lotes(self):
+        """Test: Las filas se entregan en lotes del tamaño pedido"""
+        # Act
+        lotes = list(VentaRepository.exportar(lote=2))
+
+        # Assert
+        self.assertEqual([len(l) for l in lotes], [2, 2, 1])
+
+    def test_incluye_ventas_archivadas(self):
+        """Test: Un rango antiguo exporta también las ventas del archivo histórico"""
+        # Arrange
+        archive.archivar_ventas(meses=12, ahora=datetime(2025, 6, 1), origen=self.path)
+
+        # Act
+        filas = [f for lote in VentaRepository.exportar('2023-01-01', '2025-12-31') for f in lote]
+
+        # Assert
+        self.assertEqual([f[0] for f in filas], [1, 1, 2, 2, 3])
+
+    def test_exportacion_cortada_libera_los_archivos(self):
+        """Test: Cerrar la exportación a medias separa los archivos y devuelve la conexión"""
+        # Arrange
+        self.ejecutar_muchos(
+            '''INSERT INTO venta (id, fecha, total, fk_usuario, fk_caja, metodo_pago, monto_pago, cambio)
+               VALUES (?, '2023-03-02 10:00:00', 3.0, 1, 1, 'Efectivo', 3.0, 0)''',
+            [(i,) for i in range(10, 210)]
+        )
+        self.ejecutar_muchos(
+            'INSERT INTO detalle_venta (fk_venta, fk_producto, cantidad, precio_unitario, subtotal) VALUES (?, 1, 1, 3.0, 3.0)',
+            [(i,) for i in range(10, 210)]
+        )
+        archive.archivar_ventas(meses=12, ahora=datetime(2025, 6, 1), origen=self.path)
+
+        # Act
+        lotes = VentaRepository.exportar('2023-01-01', '2025-12-31', lote=10)
+        primero = next(lotes)
+        lotes.close()
+        ventas = VentaRepository.listar('2023-01-01', '2025-12-31')
+
+        # Assert
+        self.assertEqual(len(primero), 10)
+        self.assertEqual(len(ventas), 203)
+        self.assertEqual(self.read_pool.stats()['en_uso'], 0)
+
+    def test_rango_sin_ventas(self):
+        """Test: Sin ventas en el rango el CSV trae solo el encabezado"""
+        # Act
+        texto = ''.join(VentaService.exportar_ventas('2030-01-01', '2030-12-31'))
+
+        # Assert
+        self.assertEqual(texto.strip(), ','.join(EXPORT_COLUMNAS))
+
+    def test_formato_no_soportado(self):
+        """Test: Solo se aceptan CSV y NDJSON"""
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            VentaService.exportar_ventas(formato='xlsx')
+
+        self.assertIn("Formato no soportado", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Pruebas de integración para VentaService.realizar_ventas_lote
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import unittest
+from types import SimpleNamespace
+from app.services import venta_service
+from app.services.venta_service import VentaService
+from tests.base_datos import BaseDatosTestCase, items
+
+
+def _venta(*lineas, fk_usuario=1, monto_pago=100.0):
+    return SimpleNamespace(
+        items=items(*lineas),
+        fk_cliente=None, fk_usuario=fk_usuario, metodo_pago='Efectivo',
+        monto_pago=monto_pago, referencia=None
+    )
+
+
+class TestVentasLote(BaseDatosTestCase):
+    """Suite de pruebas para el registro de ventas en lote"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.parchear(venta_service, 'VENTAS_POR_TRANSACCION', 2)
+        self.crear_producto(1, 'Leche', 2.0, 5)
+        self.crear_producto(2, 'Pan', 1.0, 10)
+        self.crear_caja(1)
+
+    def test_resultado_por_venta(self):
+        """Test: Cada venta del lote recibe su resultado y las rechazadas no afectan al resto"""
+        # Arrange
+        ventas = [
+            _venta((1, 2), (2, 1)),
+            _venta((1, 2)),
+            _venta((1, 2)),           # ya no alcanza: quedan 1
+            _venta((2, 3)),
+            _venta((2, 1), fk_usuario=7),  # usuario sin caja abierta
+        ]
+
+        # Act
+        resultados = VentaService.realizar_ventas_lote(ventas)
+
+        # Assert
+        self.assertEqual([r['indice'] for r in resultados], [0, 1, 2, 3, 4])
+        self.assertEqual([r['success'] for r in resultados], [True, True, False, True, False])
+        self.assertIn("Stock insuficiente", resultados[2]['message'])
+        self.assertIn("caja abierta", resultados[4]['message'])
+        self.assertEqual(resultados[0]['total'], 5.0)
+        self.assertEqual(self.stock(), {1: 1, 2: 6})
+
+        self.assertEqual(self.consultar('SELECT COUNT(*) FROM venta'), [(3,)])
+        self.assertEqual(self.consultar('SELECT COUNT(*) FROM detalle_venta'), [(4,)])
+
+    def test_lote_demasiado_grande(self):
+        """Test: Se rechaza un lote que supera el máximo"""
+        # Arrange
+        ventas = [_venta((2, 1))] * (venta_service.MAX_VENTAS_LOTE + 1)
+
+        # Act & Assert
+        with self.assertRaises(Exception) as context:
+            VentaService.realizar_ventas_lote(ventas)
+
+        self.assertIn("no puede tener más de", str(context.exception))
+        self.assertEqual(self.stock(), {1: 5, 2: 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Pruebas de integración para la caché de listados por versión (ETag)
+Utiliza unittest y una base de datos SQLite temporal
+"""
+import json
+import unittest
+from unittest.mock import Mock
+from app.controllers.inventario_controller import InventarioController
+from app.repositories.producto_repository import ProductoRepository
+from app.repositories.version_repository import VersionRepository
+from app.services.version_service import VersionService
+from tests.base_datos import BaseDatosTestCase
+
+
+class TestVersionService(BaseDatosTestCase):
+    """Suite de pruebas para VersionService.respuesta"""
+
+    def setUp(self):
+        """Configuración inicial para cada test"""
+        super().setUp()
+        self.crear_producto(1, 'Leche', 1.0, 10)
+        self.generar = Mock(side_effect=InventarioController.listar_productos)
+
+    def _respuesta(self):
+        return VersionService.respuesta('productos', 'producto', self.generar)
+
+    def test_misma_version_no_vuelve_a_generar(self):
+        """Test: Sin escrituras el listado se sirve desde los bytes guardados"""
+        # Act
+        etag1, cuerpo1 = self._respuesta()
+        etag2, cuerpo2 = self._respuesta()
+
+        # Assert
+        self.generar.assert_called_once()
+        self.assertEqual(etag1, etag2)
+        self.assertIs(cuerpo1, cuerpo2)
+        self.assertEqual(json.loads(cuerpo1)['productos'][0]['nombre'], 'Leche')
+
+    def test_escritura_cambia_la_version(self):
+        """Test: Cualquier escritura en la tabla invalida el listado guardado"""
+        # Arrange
+        etag1, _ = self._respuesta()
+
+        # Act
+        ProductoRepository.descontar_stock({1: 2})
+        etag2, cuerpo2 = self._respuesta()
+
+        # Assert
+        self.assertNotEqual(etag1, etag2)
+        self.assertEqual(self.generar.call_count, 2)
+        self.assertEqual(json.loads(cuerpo2)['productos'][0]['stock'], 8)
+
+    def test_triggers_por_tabla(self):
+        """Test: Insertar, actualizar y borrar avanzan la versión solo de su tabla"""
+        # Arrange
+        antes = (VersionRepository.obtener('producto'), VersionRepository.obtener('cliente'))
+
+        # Act
+        self.crear_producto(2, 'Pan', 0.5, 10)
+        self.ejecutar("UPDATE producto SET precio = 0.6 WHERE id = 2")
+        self.ejecutar("DELETE FROM producto WHERE id = 2")
+
+        # Assert
+        self.assertGreaterEqual(VersionRepository.obtener('producto'), antes[0] + 3)
+        self.assertEqual(VersionRepository.obtener('cliente'), antes[1])
+
+    def test_error_no_se_guarda(self):
+        """Test: Un listado con error no queda en la caché"""
+        # Arrange
+        fallo = Mock(return_value={'success': False, 'message': 'Error de prueba'})
+
+        # Act
+        etag, resultado = VersionService.respuesta('productos', 'producto', fallo)
+        self._respuesta()
+
+        # Assert
+        self.assertIsNone(etag)
+        self.assertEqual(resultado['message'], 'Error de prueba')
+        self.generar.assert_called_once()
+
+    def test_coincide_if_none_match(self):
+        """Test: If-None-Match acepta listas, ETag débil y comodín"""
+        # Act & Assert
+        self.assertTrue(VersionService.coincide('"productos-3"', '"productos-2", "productos-3"'))
+        self.assertTrue(VersionService.coincide('"productos-3"', 'W/"productos-3"'))
+        self.assertTrue(VersionService.coincide('"productos-3"', '*'))
+        self.assertFalse(VersionService.coincide('"productos-3"', '"productos-2"'))
+        self.assertFalse(VersionService.coincide('"productos-3"', None))
+
+
+if __name__ == '__main__':
+    unittest.main()